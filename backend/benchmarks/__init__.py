@@ -0,0 +1 @@
+# Benchmarks executáveis manualmente (não fazem parte da API)
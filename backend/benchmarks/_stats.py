@@ -0,0 +1,17 @@
+"""Estatísticas compartilhadas pelos benchmarks"""
+import asyncio
+import time
+
+def percentile(values, p):
+    """Percentil p (0-100) pelo vizinho mais próximo"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+async def monitor_loop(stop, interval=0.005):
+    """Mede o maior atraso do event loop enquanto o benchmark roda"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
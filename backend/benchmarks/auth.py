@@ -0,0 +1,84 @@
+"""Benchmark do custo da autenticação por requisição
+
+Mede, por verificação de token:
+  - decode: verificação HS256 completa a cada requisição (sem cache)
+  - cache: claims já verificadas no LRU + checagem de revogação
+e, através de uma aplicação FastAPI mínima (httpx ASGITransport, sem rede),
+a diferença de latência entre uma rota sem autenticação e a mesma rota com a
+dependência get_current_user. Não requer MongoDB.
+
+Uso:
+    cd backend && python -m benchmarks.auth --tokens 1000 --requests 20000
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import time
+
+from bson import ObjectId
+from fastapi import Depends, FastAPI
+import httpx
+
+from services import auth
+from services.auth import Authenticator, create_access_token, get_current_user
+
+def make_tokens(n):
+    return [
+        create_access_token({"_id": ObjectId(), "username": f"fan{i}", "email": f"fan{i}@furia.gg",
+                             "created_at": datetime.utcnow()})
+        for i in range(n)
+    ]
+
+def per_call_us(fn, tokens, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/public")
+    async def public():
+        return {"ok": True}
+
+    @app.get("/private")
+    async def private(current_user: dict = Depends(get_current_user)):
+        return {"ok": True}
+
+    return app
+
+async def http_per_request_us(client, path, tokens, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        response = await client.get(path, headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - start) / requests * 1e6
+
+async def main(args):
+    tokens = make_tokens(args.tokens)
+
+    authenticator = Authenticator()
+    decode_us = per_call_us(authenticator.decode, tokens, args.requests)
+    for token in tokens:
+        authenticator.verify(token)
+    cached_us = per_call_us(authenticator.verify, tokens, args.requests)
+    print(f"decode HS256 por requisição:  {decode_us:7.1f}µs")
+    print(f"claims em cache:              {cached_us:7.1f}µs  ({decode_us / cached_us:.0f}x)")
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await http_per_request_us(client, "/private", tokens, len(tokens))
+        public_us = await http_per_request_us(client, "/public", tokens, args.requests)
+        private_us = await http_per_request_us(client, "/private", tokens, args.requests)
+        auth.authenticator.cache = auth.VerifiedTokenCache(max_entries=0)
+        uncached_us = await http_per_request_us(client, "/private", tokens, args.requests)
+    print(f"rota sem autenticação:        {public_us:7.1f}µs/req")
+    print(f"rota autenticada (cache):     {private_us:7.1f}µs/req  (+{private_us - public_us:.1f}µs)")
+    print(f"rota autenticada (sem cache): {uncached_us:7.1f}µs/req  (+{uncached_us - public_us:.1f}µs)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=1000, help="tokens distintos (usuários ativos)")
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Benchmark do painel: GET /api/dashboard x as quatro requisições separadas
+
+Mede a latência (p50/p95) para montar o painel de um fã com uma única
+chamada à rota agregada e com as quatro chamadas que o frontend fazia
+(perfil, documentos, redes sociais e e-sports), em sequência como o
+Streamlit faz e em paralelo. Requer a API rodando.
+
+Uso:
+    cd backend && python -m benchmarks.dashboard --user-id <id> --iterations 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks._stats import percentile
+
+API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+FAN_OUT = [
+    "/api/profiles/{user_id}",
+    "/api/documents/status/{user_id}",
+    "/api/social/user/{user_id}",
+    "/api/esports/user/{user_id}",
+]
+
+async def aggregated(client, user_id):
+    response = await client.get(f"/api/dashboard/{user_id}")
+    response.raise_for_status()
+
+async def fan_out_sequential(client, user_id):
+    for path in FAN_OUT:
+        await client.get(path.format(user_id=user_id))
+
+async def fan_out_parallel(client, user_id):
+    await asyncio.gather(*(client.get(path.format(user_id=user_id)) for path in FAN_OUT))
+
+async def measure(client, strategy, user_id, iterations, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await strategy(client, user_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(iterations)))
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency * len(FAN_OUT))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits) as client:
+        strategies = [
+            ("agregado (1 chamada)", aggregated),
+            ("4 chamadas em sequência", fan_out_sequential),
+            ("4 chamadas em paralelo", fan_out_parallel),
+        ]
+        # Aquecimento das conexões
+        for _, strategy in strategies:
+            await measure(client, strategy, args.user_id, 20, args.concurrency)
+
+        print(f"{args.iterations} painéis, concorrência {args.concurrency}")
+        for name, strategy in strategies:
+            rate, p50, p95 = await measure(client, strategy, args.user_id, args.iterations, args.concurrency)
+            print(f"{name:24s} {rate:7.1f} painéis/s  p50={p50:7.2f}ms  p95={p95:7.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=API_URL)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
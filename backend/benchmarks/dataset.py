@@ -0,0 +1,250 @@
+"""Gerador de base sintética de fãs para dimensionamento do MongoDB
+
+Gera users, profiles, documents, social_accounts e esports_profiles no
+formato gravado pelas rotas, com distribuições brasileiras: estado pela
+população (IBGE), cidades dentro do estado, mix de interesses nos jogos da
+FURIA e proporções de plataformas. O resultado é determinístico para a
+mesma --seed, exceto _ids e datas (relativas ao momento da geração): cada
+lote usa uma semente derivada do seu número, então os lotes podem ser
+gerados em paralelo em qualquer ordem.
+
+A carga usa processos (a geração é CPU) com um cliente pymongo cada e
+insert_many não ordenado. Por padrão os índices são criados depois da carga,
+o que é bem mais rápido que manter os índices durante as inserções. Os
+arquivos dos documentos não são gerados (file_path aponta para blobs
+inexistentes).
+
+Uso:
+    cd backend && python -m benchmarks.dataset --users 1000000 --processes 8 --db furia_kyf_bench
+    cd backend && python -m benchmarks.queries --db furia_kyf_bench
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import hashlib
+import multiprocessing
+import os
+import random
+import time
+
+from bson import ObjectId
+import pymongo
+
+from services.blobstore import blob_key
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+BENCH_DB = "furia_kyf_bench"
+
+# Participação aproximada de cada estado na população (IBGE, Censo 2022, %)
+STATES = {
+    "SP": 21.9, "MG": 10.0, "RJ": 7.9, "BA": 6.9, "PR": 5.6, "RS": 5.3, "PE": 4.5, "CE": 4.3,
+    "PA": 4.0, "SC": 3.8, "GO": 3.5, "MA": 3.4, "PB": 1.9, "AM": 1.9, "ES": 1.9, "MT": 1.8,
+    "RN": 1.6, "PI": 1.6, "AL": 1.5, "DF": 1.4, "MS": 1.4, "SE": 1.1, "RO": 0.8, "TO": 0.7,
+    "AC": 0.4, "AP": 0.4, "RR": 0.3,
+}
+
+# Principais cidades por estado; o restante do estado cai em "interior"
+CITIES = {
+    "SP": [("São Paulo", 45), ("Campinas", 5), ("Guarulhos", 5), ("Santo André", 3), ("Santos", 2)],
+    "MG": [("Belo Horizonte", 12), ("Uberlândia", 3), ("Contagem", 3), ("Juiz de Fora", 3)],
+    "RJ": [("Rio de Janeiro", 40), ("Niterói", 3), ("São Gonçalo", 6), ("Duque de Caxias", 5)],
+    "BA": [("Salvador", 17), ("Feira de Santana", 4)],
+    "PR": [("Curitiba", 15), ("Londrina", 5), ("Maringá", 3)],
+    "RS": [("Porto Alegre", 12), ("Caxias do Sul", 4)],
+    "PE": [("Recife", 16), ("Jaboatão dos Guararapes", 7)],
+    "CE": [("Fortaleza", 27)],
+    "PA": [("Belém", 16)],
+    "SC": [("Florianópolis", 7), ("Joinville", 8)],
+    "GO": [("Goiânia", 20), ("Aparecida de Goiânia", 8)],
+    "AM": [("Manaus", 53)],
+    "DF": [("Brasília", 100)],
+}
+
+# Interesses (jogos e modalidades com time da FURIA) e seus pesos
+INTERESTS = {
+    "CS2": 40, "Valorant": 20, "League of Legends": 14, "Rainbow Six": 8, "Kings League": 8,
+    "Rocket League": 4, "Apex Legends": 3, "Free Fire": 3,
+}
+EVENTS = ["IEM Rio 2022", "IEM Rio 2023", "IEM Rio 2024", "BLAST Premier", "CBLOL Final", "FURIA Fan Fest"]
+PURCHASES = ["Camisa oficial", "Moletom", "Boné", "Mousepad", "Jaqueta Adidas x FURIA"]
+
+SOCIAL_PLATFORMS = {"instagram": 45, "twitter": 30, "twitch": 12, "discord": 9, "facebook": 4}
+ESPORTS_PLATFORMS = {"steam": 45, "riot": 30, "faceit": 15, "epic": 7, "battlefy": 3}
+DOCUMENT_TYPES = {"rg": 55, "cnh": 35, "cpf": 8, "passport": 2}
+DOCUMENT_STATUSES = {"verified": 70, "pending": 25, "rejected": 5}
+FACE_MATCH_STATUSES = {"matched": 80, None: 12, "not_matched": 6, "duplicate_suspected": 2}
+
+# Quantidade de itens por fã (0, 1, 2, ...) e seus pesos
+SOCIAL_COUNTS = [25, 40, 20, 10, 5]
+ESPORTS_COUNTS = [35, 45, 15, 5]
+DOCUMENT_COUNTS = [30, 55, 15]
+
+def weighted(rng, table):
+    return rng.choices(list(table), weights=list(table.values()))[0]
+
+def sample_distinct(rng, table, count):
+    """count itens distintos, sorteados pelos pesos"""
+    remaining = dict(table)
+    chosen = []
+    for _ in range(min(count, len(remaining))):
+        item = weighted(rng, remaining)
+        chosen.append(item)
+        del remaining[item]
+    return chosen
+
+def city_for(rng, state):
+    cities = CITIES.get(state, [])
+    roll = rng.uniform(0, 100)
+    for city, share in cities:
+        if roll < share:
+            return city
+        roll -= share
+    return f"Interior ({state})"
+
+def generate_chunk(seed, chunk, chunk_size, total_users, password_hash):
+    """Documentos de um lote de fãs; retorna {coleção: [documentos]}"""
+    rng = random.Random(f"{seed}:{chunk}")
+    now = datetime.utcnow()
+    collections = {"users": [], "profiles": [], "documents": [], "social_accounts": [], "esports_profiles": []}
+
+    for i in range(chunk * chunk_size, min((chunk + 1) * chunk_size, total_users)):
+        user_oid = ObjectId()
+        user_id = str(user_oid)
+        username = f"fan{i}"
+        created_at = now - timedelta(days=rng.uniform(0, 730))
+        collections["users"].append({
+            "_id": user_oid,
+            "username": username,
+            "email": f"{username}@furia.gg",
+            "password_hash": password_hash,
+            "created_at": created_at,
+        })
+
+        # Nem todo cadastro chega ao perfil completo
+        if rng.random() < 0.85:
+            state = weighted(rng, STATES)
+            collections["profiles"].append({
+                "full_name": f"Fã {i}",
+                "cpf": f"{rng.randrange(10 ** 11):011d}",
+                "address": {
+                    "street": None, "number": None, "complement": None, "neighborhood": None,
+                    "city": city_for(rng, state), "state": state, "country": "Brasil",
+                    "zipcode": f"{rng.randrange(10 ** 8):08d}",
+                },
+                "interests": sample_distinct(rng, INTERESTS, rng.choice([1, 1, 2, 2, 3, 4])),
+                "furia_fan_since": str(rng.randint(2017, 2024)),
+                "attended_events": rng.sample(EVENTS, rng.choice([0, 0, 0, 1, 1, 2])),
+                "purchases": rng.sample(PURCHASES, rng.choice([0, 0, 1, 1, 2, 3])),
+                "user_id": user_id,
+                "created_at": created_at,
+            })
+
+        for document_type in sample_distinct(rng, DOCUMENT_TYPES, rng.choices(range(len(DOCUMENT_COUNTS)), DOCUMENT_COUNTS)[0]):
+            sha256 = hashlib.sha256(f"{user_id}:{document_type}".encode()).hexdigest()
+            status = weighted(rng, DOCUMENT_STATUSES)
+            document = {
+                "user_id": user_id,
+                "document_type": document_type,
+                "file_path": blob_key(sha256, "jpeg"),
+                "sha256": sha256,
+                "size": rng.randint(150_000, 3_000_000),
+                "upload_date": created_at + timedelta(hours=rng.uniform(0, 48)),
+                "verification_status": status,
+            }
+            face_match_status = weighted(rng, FACE_MATCH_STATUSES)
+            if face_match_status:
+                document["face_match_status"] = face_match_status
+            collections["documents"].append(document)
+
+        for platform in sample_distinct(rng, SOCIAL_PLATFORMS, rng.choices(range(len(SOCIAL_COUNTS)), SOCIAL_COUNTS)[0]):
+            collections["social_accounts"].append({
+                "platform": platform,
+                "username": f"{username}_{platform}",
+                "profile_url": f"https://{platform}.com/{username}",
+                "user_id": user_id,
+                "connected_at": created_at + timedelta(days=rng.uniform(0, 30)),
+                "relevance_score": round(rng.betavariate(2, 3), 4),
+            })
+
+        for platform in sample_distinct(rng, ESPORTS_PLATFORMS, rng.choices(range(len(ESPORTS_COUNTS)), ESPORTS_COUNTS)[0]):
+            verified = rng.random() < 0.4
+            collections["esports_profiles"].append({
+                "platform": platform,
+                "username": f"{username}_{platform}",
+                "profile_url": f"https://{platform}.com/{username}",
+                "user_id": user_id,
+                "created_at": created_at + timedelta(days=rng.uniform(0, 30)),
+                "verified": verified,
+                "verification_status": "verified" if verified else rng.choice([None, "pending", "rejected"]),
+            })
+    return collections
+
+_client = None
+
+def _init_process(uri):
+    global _client
+    _client = pymongo.MongoClient(uri)
+
+def load_chunk(db_name, seed, chunk, chunk_size, total_users, password_hash):
+    """Gera e insere um lote; retorna o número de documentos inseridos"""
+    db = _client[db_name]
+    inserted = 0
+    for collection, documents in generate_chunk(seed, chunk, chunk_size, total_users, password_hash).items():
+        if documents:
+            db[collection].insert_many(documents, ordered=False)
+            inserted += len(documents)
+    return inserted
+
+def main():
+    from indexes import apply_indexes
+    from services.passwords import build_context
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=BENCH_DB)
+    parser.add_argument("--indexes", choices=["after", "before"], default="after",
+                        help="criar os índices depois (mais rápido) ou antes da carga")
+    parser.add_argument("--drop", action="store_true", help="apaga o banco antes de gerar")
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(MONGODB_URI)
+    db = client[args.db]
+    if args.drop:
+        client.drop_database(args.db)
+    if args.indexes == "before":
+        apply_indexes(db)
+
+    # Um único hash para todos os fãs: a senha de cada um é "senha-furia"
+    password_hash = build_context(bcrypt_rounds=4).hash("senha-furia")
+    chunks = -(-args.users // args.chunk_size)
+    start = time.perf_counter()
+    inserted = 0
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.processes, mp_context=context,
+                             initializer=_init_process, initargs=(MONGODB_URI,)) as pool:
+        futures = [
+            pool.submit(load_chunk, args.db, args.seed, chunk, args.chunk_size, args.users, password_hash)
+            for chunk in range(chunks)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            inserted += future.result()
+            elapsed = time.perf_counter() - start
+            print(f"lote {done}/{chunks}: {inserted} documentos ({inserted / elapsed:,.0f} docs/s)")
+    load_seconds = time.perf_counter() - start
+
+    if args.indexes == "after":
+        index_start = time.perf_counter()
+        apply_indexes(db)
+        print(f"índices criados em {time.perf_counter() - index_start:.1f}s")
+
+    print(f"{args.users} fãs, {inserted} documentos em {load_seconds:.1f}s "
+          f"({inserted / load_seconds:,.0f} docs/s)")
+    for collection in ("users", "profiles", "documents", "social_accounts", "esports_profiles"):
+        print(f"  {collection}: {db[collection].estimated_document_count()}")
+    client.close()
+
+if __name__ == "__main__":
+    main()
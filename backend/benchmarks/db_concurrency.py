@@ -0,0 +1,98 @@
+"""Benchmark de concorrência: pymongo síncrono x Motor assíncrono
+
+Simula N handlers `async def` concorrentes fazendo leituras no MongoDB e mede
+vazão, latência (p50/p99) e o atraso máximo do event loop. Requer um mongod local.
+
+Uso:
+    cd backend && python -m benchmarks.db_concurrency --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import pymongo
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from benchmarks._stats import monitor_loop
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+BENCH_DB = "furia_kyf_bench"
+
+def seed(n_users):
+    """Cria usuários de teste em um banco separado"""
+    client = pymongo.MongoClient(MONGODB_URI)
+    coll = client[BENCH_DB].users
+    coll.drop()
+    coll.insert_many(
+        [{"username": f"fan{i}", "email": f"fan{i}@furia.gg"} for i in range(n_users)],
+        ordered=False
+    )
+    coll.create_index("username", unique=True)
+    client.close()
+
+async def run(handler, total, concurrency, n_users):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await handler({"username": f"fan{i % n_users}"})
+            latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    worst_lag = await lag_task
+
+    latencies.sort()
+    return {
+        "req_s": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_loop_lag_ms": worst_lag * 1000,
+    }
+
+async def main(args):
+    seed(args.users)
+
+    sync_client = pymongo.MongoClient(MONGODB_URI)
+    sync_users = sync_client[BENCH_DB].users
+
+    async def sync_handler(query):
+        # Padrão antigo: chamada bloqueante dentro de um handler async
+        return sync_users.find_one(query)
+
+    motor_client = AsyncIOMotorClient(MONGODB_URI)
+    motor_users = motor_client[BENCH_DB].users
+
+    async def motor_handler(query):
+        return await motor_users.find_one(query)
+
+    # Aquecimento das conexões
+    await run(sync_handler, 100, 10, args.users)
+    await run(motor_handler, 100, 10, args.users)
+
+    for name, handler in [("pymongo (bloqueante)", sync_handler), ("motor (async)", motor_handler)]:
+        result = await run(handler, args.requests, args.concurrency, args.users)
+        print(
+            f"{name:22s} {result['req_s']:9.0f} req/s  "
+            f"p50={result['p50_ms']:7.2f}ms  p99={result['p99_ms']:7.2f}ms  "
+            f"lag_max={result['max_loop_lag_ms']:7.2f}ms"
+        )
+
+    sync_client.drop_database(BENCH_DB)
+    sync_client.close()
+    motor_client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--users", type=int, default=10000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,65 @@
+"""Benchmark do índice de rostos (busca de contas duplicadas)
+
+Carrega N encodings sintéticos normalizados, treina o IVF e mede a latência
+da busca (p50/p99) e o recall do vizinho mais próximo contra a busca exata.
+
+Uso:
+    cd backend && python -m benchmarks.face_index --vectors 1000000 --queries 500
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from services.face_index import FaceIndex
+
+def main(args):
+    rng = np.random.default_rng(42)
+    # Encodings sintéticos em grupos (pessoas parecidas), como rostos reais
+    centers = rng.normal(size=(max(1, args.vectors // 50), 128)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), args.vectors)] + \
+        rng.normal(scale=0.3, size=(args.vectors, 128)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    user_ids = [f"fan{i}" for i in range(args.vectors)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = FaceIndex(tmp, nlist=args.nlist, nprobe=args.nprobe)
+        start = time.perf_counter()
+        for chunk in range(0, args.vectors, 100_000):
+            index.add_many(user_ids[chunk:chunk + 100_000], vectors[chunk:chunk + 100_000])
+        print(f"carga de {args.vectors} vetores: {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        index.maybe_train()
+        print(f"treino: {time.perf_counter() - start:.1f}s  {index.stats()}")
+
+        queries = rng.choice(args.vectors, args.queries, replace=False)
+        noisy = vectors[queries] + rng.normal(scale=0.02, size=(args.queries, 128)).astype(np.float32)
+
+        latencies = []
+        hits = 0
+        for query_row, query in zip(queries, noisy):
+            start = time.perf_counter()
+            results = index.search(query, k=1)
+            latencies.append((time.perf_counter() - start) * 1000)
+            exact = int(np.argmin(np.linalg.norm(vectors - query, axis=1)))
+            hits += bool(results) and results[0][0] == user_ids[exact]
+
+        latencies.sort()
+        print(
+            f"busca IVF (nprobe={args.nprobe}): p50={latencies[len(latencies) // 2]:.2f}ms  "
+            f"p99={latencies[int(len(latencies) * 0.99) - 1]:.2f}ms  recall@1={hits / args.queries:.3f}"
+        )
+
+        start = time.perf_counter()
+        for query in noisy[:50]:
+            np.argmin(np.linalg.norm(vectors - query, axis=1))
+        print(f"busca exata (força bruta): {(time.perf_counter() - start) / 50 * 1000:.2f}ms por consulta")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    main(parser.parse_args())
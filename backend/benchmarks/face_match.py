@@ -0,0 +1,57 @@
+"""Benchmark de verificações faciais por segundo na CPU
+
+Usa as fotos de um diretório (jpg/png com rostos), forma pares
+(documento, selfie) e mede a vazão do FaceMatchEngine variando o tamanho
+máximo do lote e a redução das imagens.
+
+Uso:
+    cd backend && python -m benchmarks.face_match --images ./fotos --verifications 64
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+from services.face_match import FaceMatchEngine
+
+async def measure(engine, pairs, verifications):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        engine.verify(*pairs[i % len(pairs)]) for i in range(verifications)
+    ))
+    elapsed = time.perf_counter() - start
+    stats = engine.batcher.stats()
+    engine.batcher.shutdown()
+    found = sum(1 for r in results if r["distance"] is not None)
+    return verifications / elapsed, stats["avg_batch_size"], found
+
+async def main(args):
+    files = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    if len(files) < 2:
+        raise SystemExit("São necessárias pelo menos duas imagens com rostos em --images")
+    images = [f.read_bytes() for f in files]
+    pairs = [(images[i], images[(i + 1) % len(images)]) for i in range(len(images))]
+
+    # Carrega os modelos antes de medir
+    warm = FaceMatchEngine()
+    warm.load()
+    warm.encode(images[0])
+
+    print(f"{len(images)} imagens, {args.verifications} verificações por configuração")
+    for max_side in args.max_sides:
+        for batch_size in args.batch_sizes:
+            engine = FaceMatchEngine(max_image_side=max_side, batch_size=batch_size)
+            engine._face_recognition = warm._face_recognition
+            rate, avg_batch, found = await measure(engine, pairs, args.verifications)
+            print(
+                f"max_side={max_side:5d} batch={batch_size:3d}  {rate:7.2f} verificações/s  "
+                f"lote médio={avg_batch:5.1f}  pares com rosto={found}/{args.verifications}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--verifications", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--max-sides", type=int, nargs="+", default=[400, 800, 1600])
+    asyncio.run(main(parser.parse_args()))
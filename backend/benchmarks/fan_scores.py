@@ -0,0 +1,113 @@
+"""Benchmark do atraso de atualização da coleção fan_scores sob carga de escrita
+
+Simula escritores concorrentes atualizando contas sociais (como a rota de
+análise faz) e mede o atraso entre a escrita confirmada e a pontuação do fã
+refletir o novo valor, comparando:
+  - incremental: refresh() só do componente alterado (o que as rotas fazem)
+  - completo: recálculo de todos os componentes do usuário a cada escrita
+Ao final, mede também o tempo da reconstrução completa (rebuild). Requer um
+mongod local.
+
+Uso:
+    cd backend && python -m benchmarks.fan_scores --users 5000 --writes 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+import pymongo
+
+from indexes import apply_indexes
+from services import fan_scores
+from benchmarks._stats import percentile
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+BENCH_DB = "furia_kyf_bench"
+
+async def seed(db, n_users):
+    """Usuários com perfil, conta social e perfil de esports em um banco separado"""
+    await db.client.drop_database(BENCH_DB)
+    sync_client = pymongo.MongoClient(MONGODB_URI)
+    apply_indexes(sync_client[BENCH_DB])
+    sync_client.close()
+    rng = random.Random(42)
+    user_ids = [ObjectId() for _ in range(n_users)]
+    await db.users.insert_many(
+        [{"_id": _id, "username": f"fan{i}", "email": f"fan{i}@furia.gg"} for i, _id in enumerate(user_ids)],
+        ordered=False
+    )
+    user_ids = [str(_id) for _id in user_ids]
+    await db.profiles.insert_many([
+        {"user_id": user_id, "full_name": "Fã", "cpf": "000", "address": {"city": "São Paulo", "state": "SP"}}
+        for user_id in user_ids
+    ], ordered=False)
+    await db.social_accounts.insert_many([
+        {"user_id": user_id, "platform": "twitter", "username": user_id, "relevance_score": rng.random()}
+        for user_id in user_ids
+    ], ordered=False)
+    await db.esports_profiles.insert_many([
+        {"user_id": user_id, "platform": "steam", "verified": rng.random() < 0.3}
+        for user_id in user_ids
+    ], ordered=False)
+    return user_ids
+
+async def run(db, user_ids, writes, concurrency, components):
+    rng = random.Random(7)
+    semaphore = asyncio.Semaphore(concurrency)
+    lags = []
+
+    async def one(_):
+        user_id = rng.choice(user_ids)
+        async with semaphore:
+            await db.social_accounts.update_one(
+                {"user_id": user_id, "platform": "twitter"},
+                {"$set": {"relevance_score": rng.random()}}
+            )
+            written = time.perf_counter()
+            await fan_scores.refresh(db, user_id, *components)
+            lags.append(time.perf_counter() - written)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(writes)))
+    elapsed = time.perf_counter() - start
+    lags.sort()
+    return {
+        "writes_s": writes / elapsed,
+        "p50_ms": percentile(lags, 50) * 1000,
+        "p95_ms": percentile(lags, 95) * 1000,
+        "p99_ms": percentile(lags, 99) * 1000,
+    }
+
+async def main(args):
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[BENCH_DB]
+    user_ids = await seed(db, args.users)
+
+    start = time.perf_counter()
+    await fan_scores.rebuild(db)
+    rebuild_seconds = time.perf_counter() - start
+
+    # Aquecimento das conexões
+    await run(db, user_ids, 200, 10, ["social"])
+
+    for name, components in [("incremental", ["social"]), ("completo", [])]:
+        result = await run(db, user_ids, args.writes, args.concurrency, components)
+        print(
+            f"{name:12s} {result['writes_s']:8.0f} escritas/s  atraso "
+            f"p50={result['p50_ms']:6.2f}ms p95={result['p95_ms']:6.2f}ms p99={result['p99_ms']:6.2f}ms"
+        )
+    print(f"rebuild de {args.users} usuários: {rebuild_seconds:.2f}s")
+
+    await client.drop_database(BENCH_DB)
+    client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
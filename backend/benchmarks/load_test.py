@@ -0,0 +1,268 @@
+"""Teste de carga HTTP com jornadas de fãs e relatório por rota
+
+Cada jornada é um fã novo fazendo o cadastro completo:
+    registro -> login -> perfil -> upload de documento -> rede social ->
+    perfil de e-sports -> leituras do painel (com revalidação por ETag)
+
+Dois modos de carga:
+  - fechado (padrão): --concurrency jornadas rodando em loop, uma nova assim
+    que a anterior termina
+  - aberto: --rate jornadas/s chegando em intervalos exponenciais (Poisson),
+    limitadas a --concurrency simultâneas; chegadas que encontram o limite
+    cheio são contadas como descartadas
+
+A saída é um JSON com vazão, p50/p95/p99 e erros por rota (e por jornada),
+com o commit e a configuração usados, para comparar execuções entre
+commits (--compare com um relatório anterior). Requer a API rodando com um
+mongod local, por exemplo:
+    cd backend && uvicorn main:app --port 8000
+
+Uso:
+    cd backend && python -m benchmarks.load_test --concurrency 20 --duration 60 --output carga.json
+    cd backend && python -m benchmarks.load_test --rate 5 --duration 60 --compare carga.json
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from benchmarks._stats import percentile
+
+API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def summarize(latencies, elapsed):
+    """Vazão e percentis (ms) de uma lista de latências em segundos"""
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "throughput_s": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+class Recorder:
+    """Latências e códigos de status por rota (método + modelo do caminho)"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    async def call(self, client, method, route, path=None, expect=(200,), **kwargs):
+        name = f"{method} {route}"
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path or route, **kwargs)
+        except httpx.HTTPError as e:
+            self.errors[name] += 1
+            self.statuses[name][type(e).__name__] += 1
+            raise JourneyFailed(name) from e
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][str(response.status_code)] += 1
+        if response.status_code not in expect:
+            self.errors[name] += 1
+            raise JourneyFailed(name)
+        return response
+
+    def report(self, elapsed):
+        routes = {}
+        for name in sorted(set(self.latencies) | set(self.statuses)):
+            routes[name] = {
+                **summarize(self.latencies[name], elapsed),
+                "errors": self.errors[name],
+                "statuses": dict(self.statuses[name]),
+            }
+        return routes
+
+class JourneyFailed(Exception):
+    """Uma etapa da jornada falhou; as seguintes dependem dela"""
+
+async def fan_journey(client, recorder, args):
+    """Cadastro completo de um fã novo seguido das leituras do painel"""
+    suffix = uuid.uuid4().hex[:12]
+    username = f"carga_{suffix}"
+    password = f"senha-{suffix}"
+
+    await recorder.call(client, "POST", "/api/users/register", json={
+        "username": username, "email": f"{username}@furia.gg", "password": password,
+    })
+    login = await recorder.call(client, "POST", "/api/users/login", json={
+        "username": username, "password": password,
+    })
+    user_id = login.json()["user_id"]
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    await recorder.call(client, "POST", "/api/profiles/", headers=headers, json={
+        "full_name": f"Fã {suffix}",
+        "cpf": f"{random.randint(0, 99999999999):011d}",
+        "address": {"city": "São Paulo", "state": "SP"},
+        "interests": ["CS2", "Valorant"],
+        "furia_fan_since": "2019",
+    })
+    # Conteúdo único por fã: o armazenamento deduplica arquivos repetidos
+    document = PNG_SIGNATURE + os.urandom(args.document_kb * 1024)
+    await recorder.call(
+        client, "POST", "/api/documents/upload", params={"document_type": "rg"}, headers=headers,
+        files={"file": (f"rg_{suffix}.png", document, "image/png")},
+    )
+    await recorder.call(client, "POST", "/api/social/", headers=headers, json={
+        "platform": "twitter", "username": username, "profile_url": f"https://x.com/{username}",
+    })
+    await recorder.call(client, "POST", "/api/esports/", headers=headers, json={
+        "platform": "steam", "username": username, "profile_url": f"https://steamcommunity.com/id/{username}",
+    })
+
+    # Leituras do painel: a primeira busca o corpo, as seguintes revalidam pelo ETag
+    etag = None
+    for _ in range(args.dashboard_reads):
+        read_headers = {**headers, "If-None-Match": etag} if etag else headers
+        response = await recorder.call(
+            client, "GET", "/api/dashboard/{user_id}", f"/api/dashboard/{user_id}",
+            expect=(200, 304), headers=read_headers,
+        )
+        etag = response.headers.get("etag", etag)
+    await recorder.call(client, "GET", "/api/users/me", headers=headers)
+
+async def run_journey(client, recorder, args, journeys):
+    start = time.perf_counter()
+    try:
+        await fan_journey(client, recorder, args)
+    except JourneyFailed as e:
+        journeys["failed"] += 1
+        journeys["failed_at"][str(e)] += 1
+    else:
+        journeys["latencies"].append(time.perf_counter() - start)
+
+async def closed_loop(client, recorder, args, journeys, deadline):
+    async def virtual_fan():
+        while time.perf_counter() < deadline:
+            await run_journey(client, recorder, args, journeys)
+
+    await asyncio.gather(*(virtual_fan() for _ in range(args.concurrency)))
+
+async def open_loop(client, recorder, args, journeys, deadline):
+    rng = random.Random(args.seed)
+    in_flight = set()
+    next_arrival = time.perf_counter()
+    while next_arrival < deadline:
+        await asyncio.sleep(max(0, next_arrival - time.perf_counter()))
+        if len(in_flight) >= args.concurrency:
+            journeys["dropped"] += 1
+        else:
+            task = asyncio.create_task(run_journey(client, recorder, args, journeys))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_arrival += rng.expovariate(args.rate)
+    if in_flight:
+        await asyncio.wait(in_flight)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report, baseline):
+    """Variação de vazão e p95 por rota em relação a um relatório anterior"""
+    lines = [f"comparação com {baseline['commit']} ({baseline['started_at']}):"]
+    for name, current in report["routes"].items():
+        previous = baseline["routes"].get(name)
+        if not previous or not previous.get("count") or not current.get("count"):
+            continue
+        throughput = (current["throughput_s"] / previous["throughput_s"] - 1) * 100
+        p95 = (current["p95_ms"] / previous["p95_ms"] - 1) * 100
+        lines.append(f"  {name:40s} vazão {throughput:+6.1f}%  p95 {p95:+6.1f}%")
+    return "\n".join(lines)
+
+async def main(args):
+    recorder = Recorder()
+    journeys = {"latencies": [], "failed": 0, "failed_at": defaultdict(int), "dropped": 0}
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    started_at = datetime.utcnow()
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        (await client.get("/")).raise_for_status()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            await open_loop(client, recorder, args, journeys, deadline)
+        else:
+            await closed_loop(client, recorder, args, journeys, deadline)
+        elapsed = time.perf_counter() - start
+
+    report = {
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "config": {
+            "url": args.url,
+            "mode": "aberto" if args.rate else "fechado",
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "document_kb": args.document_kb,
+            "dashboard_reads": args.dashboard_reads,
+        },
+        "journeys": {
+            **summarize(journeys["latencies"], elapsed),
+            "failed": journeys["failed"],
+            "failed_at": dict(journeys["failed_at"]),
+            "dropped": journeys["dropped"],
+        },
+        "routes": recorder.report(elapsed),
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    # Resumo legível no stderr (o stdout fica só com o JSON)
+    for name, stats in report["routes"].items():
+        if stats.get("count"):
+            print(
+                f"{name:40s} {stats['throughput_s']:8.1f}/s  p50={stats['p50_ms']:8.1f}ms "
+                f"p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms  erros={stats['errors']}",
+                file=sys.stderr
+            )
+    print(
+        f"jornadas: {report['journeys']['count']} completas, {journeys['failed']} com falha, "
+        f"{journeys['dropped']} descartadas em {elapsed:.1f}s",
+        file=sys.stderr
+    )
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--concurrency", type=int, default=10, help="jornadas simultâneas (máximo no modo aberto)")
+    parser.add_argument("--rate", type=float, default=0, help="chegadas de jornadas por segundo (0 = modo fechado)")
+    parser.add_argument("--duration", type=float, default=30, help="segundos iniciando novas jornadas")
+    parser.add_argument("--document-kb", type=int, default=200, help="tamanho do documento enviado")
+    parser.add_argument("--dashboard-reads", type=int, default=5, help="leituras do painel por jornada")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="arquivo do relatório JSON (padrão: stdout)")
+    parser.add_argument("--compare", help="relatório JSON anterior para comparar")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""Benchmark da contagem de menções em exportações de redes sociais (MB/s)
+
+Gera um arquivo no formato da exportação do Twitter/X (data/tweets.js com
+tweets em português, poucos citando a FURIA), compacta em um zip temporário
+e mede a vazão do scan_archive com o autômato nativo (pyahocorasick) e com
+o de Python puro.
+
+Uso:
+    cd backend && python -m benchmarks.mentions --size-mb 200
+"""
+import argparse
+import json
+import random
+import tempfile
+import zipfile
+
+from services.mentions import MB, ahocorasick, build_automaton, scan_archive
+
+PHRASES = [
+    "bom dia pessoal, hoje tem jogo",
+    "alguém viu o clutch de ontem? absurdo",
+    "café, código e Counter-Strike",
+    "que calor em São Paulo hoje",
+    "assistindo a final do Major com a galera",
+    "Vamos FÚRIA!!! #GoFURIA #DIADEFURIA",
+    "KSCERATO amassou de novo, @FURIA é outro nível",
+    "ingresso comprado pra ver a fúria na arena",
+]
+
+def write_archive(path, size_mb, seed=42):
+    rng = random.Random(seed)
+    target = size_mb * MB
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("data/tweets.js", "w", force_zip64=True) as member:
+            member.write(b"window.YTD.tweets.part0 = [\n")
+            written = 0
+            tweet_id = 10 ** 18
+            while written < target:
+                tweet_id += rng.randint(1, 10 ** 6)
+                tweet = {"tweet": {
+                    "id_str": str(tweet_id),
+                    "full_text": " ".join(rng.choice(PHRASES) for _ in range(rng.randint(1, 3))),
+                    "lang": "pt",
+                    "created_at": "Sat Jun 01 20:00:00 +0000 2024",
+                }}
+                line = (json.dumps(tweet, ensure_ascii=False) + ",\n").encode()
+                member.write(line)
+                written += len(line)
+            member.write(b"]\n")
+
+def main(args):
+    with tempfile.NamedTemporaryFile(suffix=".zip") as tmp:
+        write_archive(tmp.name, args.size_mb)
+        print(f"arquivo: {args.size_mb} MB de texto, zip com {tmp.seek(0, 2) / MB:.1f} MB")
+
+        implementations = [("python", False)]
+        if ahocorasick:
+            implementations.insert(0, ("pyahocorasick", True))
+        for name, native in implementations:
+            with open(tmp.name, "rb") as fileobj:
+                stats = scan_archive(fileobj, automaton=build_automaton(native=native))
+            print(
+                f"{name:14s} {stats['mb_per_second']:7.1f} MB/s  "
+                f"{stats['scan_seconds']:6.2f}s  menções={stats['total']}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+"""Benchmark do custo da instrumentação de métricas
+
+Mede:
+  - por requisição HTTP: uma rota mínima com e sem o MetricsMiddleware
+    (httpx ASGITransport, sem rede)
+  - por comando do MongoDB: started + succeeded no listener de comandos,
+    com eventos do próprio pymongo
+  - por check-out de conexão: o par de eventos do listener do pool
+Não requer MongoDB.
+
+Uso:
+    cd backend && python -m benchmarks.metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+import time
+
+from fastapi import FastAPI
+import httpx
+from pymongo import monitoring
+
+from services.metrics import MetricsMiddleware, MongoCommandListener, MongoPoolListener
+
+ADDRESS = ("localhost", 27017)
+
+def build_app(instrumented):
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, enabled=True)
+
+    @app.get("/api/profiles/{user_id}", tags=["Profiles"])
+    async def get_profile(user_id: str):
+        return {"user_id": user_id}
+
+    return app
+
+async def per_request_us(app, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/api/profiles/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/api/profiles/{i}")
+        return (time.perf_counter() - start) / requests * 1e6
+
+def per_command_us(calls):
+    listener = MongoCommandListener()
+    duration = timedelta(microseconds=800)
+    started = [
+        monitoring.CommandStartedEvent({"find": "profiles", "filter": {}}, "furia_kyf", i, ADDRESS, i)
+        for i in range(calls)
+    ]
+    succeeded = [
+        monitoring.CommandSucceededEvent(duration, {"ok": 1}, "find", i, ADDRESS, i)
+        for i in range(calls)
+    ]
+    start = time.perf_counter()
+    for i in range(calls):
+        listener.started(started[i])
+        listener.succeeded(succeeded[i])
+    return (time.perf_counter() - start) / calls * 1e6
+
+def per_checkout_us(calls):
+    listener = MongoPoolListener()
+    check_out_started = monitoring.ConnectionCheckOutStartedEvent(ADDRESS)
+    checked_out = monitoring.ConnectionCheckedOutEvent(ADDRESS, 1)
+    start = time.perf_counter()
+    for _ in range(calls):
+        listener.connection_check_out_started(check_out_started)
+        listener.connection_checked_out(checked_out)
+    return (time.perf_counter() - start) / calls * 1e6
+
+async def main(args):
+    plain_us = await per_request_us(build_app(False), args.requests)
+    instrumented_us = await per_request_us(build_app(True), args.requests)
+    print(f"requisição sem métricas:   {plain_us:7.1f}µs")
+    print(f"requisição com métricas:   {instrumented_us:7.1f}µs  (+{instrumented_us - plain_us:.1f}µs, "
+          f"{(instrumented_us / plain_us - 1) * 100:+.1f}%)")
+    print(f"listener de comandos:      {per_command_us(args.requests):7.2f}µs por comando")
+    print(f"listener do pool:          {per_checkout_us(args.requests):7.2f}µs por check-out")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+"""Benchmark de logins/s por núcleo para cada custo de hash
+
+Para cada configuração (rounds do bcrypt ou parâmetros do argon2), dispara
+verificações concorrentes pelo PasswordHasher usado na API e mede a vazão.
+
+Uso:
+    cd backend && python -m benchmarks.password_hashing --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from services.passwords import PasswordHasher, HasherSaturated, build_context
+
+BCRYPT_COSTS = [10, 11, 12, 13]
+ARGON2_COSTS = [(2, 19456), (2, 65536), (3, 65536)]  # (time_cost, memory_cost KiB)
+
+async def measure(context, workers, seconds):
+    hasher = PasswordHasher(context, workers=workers, max_pending=workers * 2)
+    hashed = context.hash("senha-furia-123")
+    done = 0
+    rejected = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        nonlocal done, rejected
+        while time.perf_counter() < deadline:
+            try:
+                valid, _ = await hasher.verify_and_update("senha-furia-123", hashed)
+                assert valid
+                done += 1
+            except HasherSaturated:
+                rejected += 1
+                await asyncio.sleep(0.001)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(workers * 2)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return done / elapsed, rejected
+
+async def main(args):
+    workers = args.workers
+    print(f"workers={workers} (núcleos disponíveis: {os.cpu_count()})")
+    configs = [(f"bcrypt rounds={r}", build_context("bcrypt", bcrypt_rounds=r)) for r in BCRYPT_COSTS]
+    if not args.skip_argon2:
+        configs += [
+            (f"argon2 t={t} m={m}KiB", build_context("argon2", argon2_time_cost=t, argon2_memory_cost=m))
+            for t, m in ARGON2_COSTS
+        ]
+    for name, context in configs:
+        rate, rejected = await measure(context, workers, args.seconds)
+        print(f"{name:28s} {rate:8.1f} logins/s  {rate / workers:7.1f} logins/s/núcleo  (503 simulados: {rejected})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--skip-argon2", action="store_true")
+    asyncio.run(main(parser.parse_args()))
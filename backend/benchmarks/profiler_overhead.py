@@ -0,0 +1,75 @@
+"""Benchmark do custo do profiler sob demanda por requisição
+
+Mede uma rota mínima (httpx ASGITransport, sem rede):
+  - sem o RequestProfilerMiddleware
+  - com o middleware e o profiler desligado (a situação normal)
+  - com uma sessão "requests" ativa em outra rota (requisição não sorteada)
+  - com uma sessão "requests" sorteando todas as requisições da rota
+As configurações se alternam em várias rodadas e vale a melhor de cada uma,
+para reduzir o ruído da máquina. Não requer MongoDB.
+
+Uso:
+    cd backend && python -m benchmarks.profiler_overhead --requests 5000 --rounds 5
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+import httpx
+
+from services.profiler import RequestProfilerMiddleware, profiler
+
+def build_app(instrumented):
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(RequestProfilerMiddleware)
+
+    @app.get("/api/profiles/{user_id}")
+    async def get_profile(user_id: str):
+        return {"user_id": user_id}
+
+    return app
+
+async def per_request_us(app, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(200):
+            await client.get(f"/api/profiles/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/api/profiles/{i}")
+        return (time.perf_counter() - start) / requests * 1e6
+
+async def with_session(app, requests, route):
+    profiler.start("requests", 600, 10, route=route)
+    try:
+        return await per_request_us(app, requests)
+    finally:
+        profiler.stop()
+
+async def main(args):
+    plain = build_app(False)
+    app = build_app(True)
+    configs = {
+        "sem middleware": lambda: per_request_us(plain, args.requests),
+        "profiler desligado": lambda: per_request_us(app, args.requests),
+        "sessão em outra rota": lambda: with_session(app, args.requests, "/api/users/login"),
+        "sessão sorteando todas": lambda: with_session(app, args.requests, "/api/profiles"),
+    }
+    best = {}
+    for _ in range(args.rounds):
+        for name, run in configs.items():
+            us = await run()
+            best[name] = min(us, best.get(name, us))
+
+    plain_us = best.pop("sem middleware")
+    print(f"{'sem middleware':24s} {plain_us:7.1f}µs")
+    for name, us in best.items():
+        print(f"{name:24s} {us:7.1f}µs  (+{us - plain_us:.1f}µs, {(us / plain_us - 1) * 100:+.1f}%)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
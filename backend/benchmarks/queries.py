@@ -0,0 +1,165 @@
+"""Micro-benchmark das consultas feitas pelas rotas e pelos jobs
+
+Executa cada consulta de indexes.ROUTER_QUERIES (as mesmas usadas na
+verificação de planos) com valores reais amostrados da base, mais a
+agregação do painel, e registra:
+  - latência p50/p95/p99 de cada consulta
+  - documentos e chaves de índice examinados x documentos retornados
+    (explain com executionStats), que mostram consultas que leem muito mais
+    do que devolvem mesmo usando índice
+Use sobre uma base gerada por benchmarks.dataset. Requer um mongod.
+
+Uso:
+    cd backend && python -m benchmarks.queries --db furia_kyf_bench --iterations 500 --output consultas.json
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import time
+
+from bson import ObjectId
+import pymongo
+
+from indexes import ROUTER_QUERIES, plan_stages
+from routes.dashboard import dashboard_pipeline
+from benchmarks._stats import percentile
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+BENCH_DB = "furia_kyf_bench"
+
+# Campos de data que aparecem como 0 nas consultas de ROUTER_QUERIES
+TIME_FIELDS = {"available_at", "lease_until", "finished_at", "updated_at", "expires_at", "revoked_at"}
+
+def sample(db, collection, size):
+    return list(db[collection].aggregate([{"$sample": {"size": size}}]))
+
+def sample_values(db, size):
+    """Valores reais para os marcadores de ROUTER_QUERIES (um conjunto por iteração)"""
+    users = sample(db, "users", size)
+    documents = sample(db, "documents", size) or [{"_id": ObjectId(), "file_path": ""}]
+    accounts = sample(db, "social_accounts", size) or [{"_id": ObjectId()}]
+    profiles = sample(db, "esports_profiles", size) or [{"_id": ObjectId()}]
+    if not users:
+        raise SystemExit("Base vazia: gere os dados com python -m benchmarks.dataset")
+    return [
+        {
+            "user123": str(user["_id"]),
+            "fan@furia.gg": user["email"],
+            "fan": user["username"],
+            "document_id": documents[i % len(documents)]["_id"],
+            "account_id": accounts[i % len(accounts)]["_id"],
+            "profile_id": profiles[i % len(profiles)]["_id"],
+            "uploads/blobs/aa/bb/x.png": documents[i % len(documents)]["file_path"],
+        }
+        for i, user in enumerate(users)
+    ]
+
+def bind(query, values, now, field=None):
+    """Troca os marcadores da consulta pelos valores amostrados"""
+    if isinstance(query, dict):
+        return {key: bind(value, values, now, key if not key.startswith("$") else field)
+                for key, value in query.items()}
+    if isinstance(query, list):
+        return [bind(value, values, now, field) for value in query]
+    if isinstance(query, str) and query in values:
+        return values[query]
+    if query == 0 and field in TIME_FIELDS:
+        return now
+    return query
+
+def sum_key(explain, key):
+    """Soma um contador em todos os estágios do explain (inclusive $lookup)"""
+    if isinstance(explain, dict):
+        return sum(value if k == key else sum_key(value, key) for k, value in explain.items())
+    if isinstance(explain, list):
+        return sum(sum_key(value, key) for value in explain)
+    return 0
+
+def run_query(db, collection, query):
+    return list(db[collection].find(query))
+
+def explain_find(db, collection, query):
+    explain = db.command("explain", {"find": collection, "filter": query}, verbosity="executionStats")
+    stats = explain["executionStats"]
+    stages = [stage for stage in plan_stages(explain["queryPlanner"]["winningPlan"]) if stage]
+    return {
+        "plan": " <- ".join(stages),
+        "keys_examined": stats["totalKeysExamined"],
+        "docs_examined": stats["totalDocsExamined"],
+        "returned": stats["nReturned"],
+    }
+
+def explain_aggregate(db, pipeline):
+    explain = db.command(
+        "explain", {"aggregate": 1, "pipeline": pipeline, "cursor": {}}, verbosity="executionStats"
+    )
+    return {
+        "plan": "aggregate",
+        "keys_examined": sum_key(explain, "totalKeysExamined"),
+        "docs_examined": sum_key(explain, "totalDocsExamined"),
+        "returned": 1,
+    }
+
+def measure(fn, iterations, values):
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(values[i % len(values)])
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+def average_explains(explains):
+    return {
+        "plan": explains[0]["plan"],
+        **{key: round(sum(e[key] for e in explains) / len(explains), 1)
+           for key in ("keys_examined", "docs_examined", "returned")},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=BENCH_DB)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=200, help="usuários/documentos amostrados")
+    parser.add_argument("--output", help="arquivo do relatório JSON")
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(MONGODB_URI)
+    db = client[args.db]
+    now = datetime.utcnow()
+    values = sample_values(db, args.samples)
+
+    results = []
+    for collection, query in ROUTER_QUERIES:
+        timings = measure(lambda v: run_query(db, collection, bind(query, v, now)), args.iterations, values)
+        # Médias de examinados/retornados sobre algumas amostras
+        explains = [explain_find(db, collection, bind(query, v, now)) for v in values[:10]]
+        results.append({"collection": collection, "query": json.dumps(query, default=str), **timings,
+                        **average_explains(explains)})
+
+    pipeline = lambda v: dashboard_pipeline(v["user123"])
+    timings = measure(lambda v: list(db.aggregate(pipeline(v))), args.iterations, values)
+    explains = [explain_aggregate(db, pipeline(v)) for v in values[:10]]
+    results.append({"collection": "(painel)", "query": "dashboard_pipeline", **timings, **average_explains(explains)})
+
+    print(f"{'coleção':18s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'chaves':>8s} {'docs':>8s} {'retorn.':>8s}  consulta")
+    for r in results:
+        flag = "  <-- examina >10x o retornado" if r["docs_examined"] > 10 * max(r["returned"], 1) else ""
+        print(
+            f"{r['collection']:18s} {r['p50_ms']:8.3f} {r['p95_ms']:8.3f} {r['p99_ms']:8.3f} "
+            f"{r['keys_examined']:8.1f} {r['docs_examined']:8.1f} {r['returned']:8.1f}  {r['query']}{flag}"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"db": args.db, "started_at": now.isoformat(), "iterations": args.iterations,
+                       "counts": {c: db[c].estimated_document_count() for c in {c for c, _ in ROUTER_QUERIES}},
+                       "queries": results}, f, indent=2, ensure_ascii=False)
+    client.close()
+
+if __name__ == "__main__":
+    main()
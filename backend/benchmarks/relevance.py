@@ -0,0 +1,65 @@
+"""Benchmark da pontuação de relevância na CPU
+
+Compara contas pontuadas por segundo com e sem micro-batching e com e sem
+quantização int8, além da latência p50/p95 por chamada.
+
+Uso:
+    cd backend && python -m benchmarks.relevance --requests 256 --concurrency 32
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from services.relevance import RELEVANCE_MODEL, RelevanceScorer
+from benchmarks._stats import percentile
+
+SAMPLE_TEXTS = [
+    "furia_fan_2024 https://twitter.com/furia_fan_2024 twitter",
+    "gabriel.cs https://instagram.com/gabriel.cs instagram",
+    "#GoFURIA sempre! https://twitch.tv/torcedorfuria twitch",
+    "receitas_da_vo https://instagram.com/receitas_da_vo instagram",
+    "valorant_br_clips https://youtube.com/@valorant_br_clips youtube",
+    "Ninguém segura a FURIA no Major, vamos pra cima! https://twitter.com/panteranegra twitter",
+]
+
+async def measure(scorer, texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(text):
+        async with semaphore:
+            start = time.perf_counter()
+            await scorer.score(text)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(t) for t in texts))
+    elapsed = time.perf_counter() - start
+    stats = scorer.batcher.stats()
+    scorer.batcher.shutdown()
+    return len(texts) / elapsed, percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000, stats["avg_batch_size"]
+
+async def main(args):
+    rng = random.Random(42)
+    texts = [rng.choice(SAMPLE_TEXTS) for _ in range(args.requests)]
+
+    print(f"modelo={args.model} requisições={args.requests} concorrência={args.concurrency}")
+    for quantize in (False, True):
+        for batch_size in args.batch_sizes:
+            scorer = RelevanceScorer(model_name=args.model, quantize=quantize, batch_size=batch_size)
+            # Carrega o modelo e aquece antes de medir
+            scorer.score_batch(SAMPLE_TEXTS)
+            rate, p50, p95, avg_batch = await measure(scorer, texts, args.concurrency)
+            print(
+                f"int8={str(quantize):5s} batch={batch_size:3d}  {rate:8.1f} contas/s  "
+                f"p50={p50:7.1f}ms p95={p95:7.1f}ms  lote médio={avg_batch:5.1f}"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=RELEVANCE_MODEL)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,193 @@
+"""Benchmark de requisições/s por rota: caminho de resposta antigo x atual
+
+Monta duas aplicações FastAPI com as rotas de leitura (perfil, documentos,
+redes sociais e e-sports) servindo documentos em memória, para isolar o
+custo do framework do custo do MongoDB:
+  - antigo: banco injetado por @app.middleware("http"), response_model
+    revalidando cada item, JSONResponse padrão
+  - atual: banco no estado do lifespan, listas validadas e serializadas por
+    TypeAdapter, ORJSONResponse (e, opcionalmente, gzip acima do limite)
+As requisições passam por httpx ASGITransport (sem rede), com vários
+clientes concorrentes.
+
+Uso:
+    cd backend && python -m benchmarks.response_path --items 20 --seconds 5
+"""
+import argparse
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+import time
+import warnings
+
+from bson import ObjectId
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import List
+import httpx
+import orjson
+
+from routes.documents import DocumentResponse, DocumentResponseList
+from routes.esports import EsportsProfileResponse, EsportsProfileResponseList
+from routes.profiles import ProfileResponse
+from routes.social import SocialAccountResponse, SocialAccountResponseList
+from services.compression import CompressionMiddleware
+
+USER_ID = str(ObjectId())
+
+def fake_data(items):
+    now = datetime.utcnow()
+    profile = {
+        "_id": ObjectId(), "user_id": USER_ID, "full_name": "Fã da FURIA", "cpf": "000.000.000-00",
+        "address": {"city": "São Paulo", "state": "SP", "country": "Brasil"},
+        "interests": ["CS2", "Valorant", "LoL"], "furia_fan_since": "2018",
+        "attended_events": ["IEM Rio 2022"] * 3, "purchases": ["Camisa oficial"] * 3,
+    }
+    documents = [
+        {"_id": ObjectId(), "user_id": USER_ID, "document_type": "rg", "file_path": f"uploads/{i}.png",
+         "upload_date": now, "verification_status": "verified", "face_match_status": "matched"}
+        for i in range(items)
+    ]
+    accounts = [
+        {"_id": ObjectId(), "user_id": USER_ID, "platform": f"rede{i}", "username": f"fan{i}",
+         "profile_url": f"https://x.com/fan{i}", "relevance_score": 0.87, "connected_at": now,
+         "mention_stats": {"total": 42, "keywords": {"furia": 40, "#diadefuria": 2}}}
+        for i in range(items)
+    ]
+    esports = [
+        {"_id": ObjectId(), "user_id": USER_ID, "platform": f"plataforma{i}", "username": f"fan{i}",
+         "profile_url": f"https://steamcommunity.com/id/fan{i}", "verified": True,
+         "verification_status": "verified", "created_at": now}
+        for i in range(items)
+    ]
+    return {"profile": profile, "documents": documents, "social": accounts, "esports": esports}
+
+def with_ids(docs):
+    return [{**doc, "id": str(doc["_id"])} for doc in docs]
+
+def legacy_app(data):
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def add_db_to_request(request, call_next):
+        request.state.db = data
+        return await call_next(request)
+
+    @app.get("/api/profiles/{user_id}", response_model=ProfileResponse)
+    async def get_profile(user_id: str, request: Request):
+        profile = request.state.db["profile"]
+        return ProfileResponse(**{**profile, "id": str(profile["_id"])}).dict()
+
+    @app.get("/api/documents/status/{user_id}", response_model=List[DocumentResponse])
+    async def get_documents(user_id: str, request: Request):
+        return [DocumentResponse(**doc).dict() for doc in with_ids(request.state.db["documents"])]
+
+    @app.get("/api/social/user/{user_id}", response_model=List[SocialAccountResponse])
+    async def get_social(user_id: str, request: Request):
+        return [SocialAccountResponse(**doc).dict() for doc in with_ids(request.state.db["social"])]
+
+    @app.get("/api/esports/user/{user_id}", response_model=List[EsportsProfileResponse])
+    async def get_esports(user_id: str, request: Request):
+        return [EsportsProfileResponse(**doc).dict() for doc in with_ids(request.state.db["esports"])]
+
+    return app
+
+def fast_app(data, compression):
+    @asynccontextmanager
+    async def lifespan(app):
+        yield {"db": data}
+
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+    if compression:
+        app.add_middleware(CompressionMiddleware, mode="gzip")
+
+    def json_response(body):
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/api/profiles/{user_id}", response_model=ProfileResponse)
+    async def get_profile(user_id: str, request: Request):
+        profile = request.state.db["profile"]
+        return json_response(orjson.dumps(ProfileResponse(**{**profile, "id": str(profile["_id"])}).dict()))
+
+    @app.get("/api/documents/status/{user_id}", response_model=List[DocumentResponse])
+    async def get_documents(user_id: str, request: Request):
+        docs = with_ids(request.state.db["documents"])
+        return json_response(DocumentResponseList.dump_json(DocumentResponseList.validate_python(docs)))
+
+    @app.get("/api/social/user/{user_id}", response_model=List[SocialAccountResponse])
+    async def get_social(user_id: str, request: Request):
+        docs = with_ids(request.state.db["social"])
+        return json_response(SocialAccountResponseList.dump_json(SocialAccountResponseList.validate_python(docs)))
+
+    @app.get("/api/esports/user/{user_id}", response_model=List[EsportsProfileResponse])
+    async def get_esports(user_id: str, request: Request):
+        docs = with_ids(request.state.db["esports"])
+        return json_response(EsportsProfileResponseList.dump_json(EsportsProfileResponseList.validate_python(docs)))
+
+    return app
+
+ROUTES = [
+    "/api/profiles/{user_id}",
+    "/api/documents/status/{user_id}",
+    "/api/social/user/{user_id}",
+    "/api/esports/user/{user_id}",
+]
+
+async def requests_per_second(app, path, seconds, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": "gzip"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        done = 0
+        size = 0
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal done, size
+            while time.perf_counter() < deadline:
+                response = await client.get(path)
+                assert response.status_code == 200, response.text
+                size = int(response.headers["content-length"])
+                done += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return done / (time.perf_counter() - start), size
+
+async def main(args):
+    # .dict() (usado pelas rotas) emite aviso de depreciação no Pydantic 2
+    warnings.simplefilter("ignore", DeprecationWarning)
+    data = fake_data(args.items)
+    legacy = legacy_app(data)
+    fast = fast_app(data, compression=False)
+    variants = [("antigo", legacy), ("atual", fast)]
+    if args.gzip:
+        variants.append(("atual+gzip", fast_app(data, compression=True)))
+
+    print(f"{args.items} itens por lista, {args.concurrency} clientes, {args.seconds:.0f}s por rota")
+    for route in ROUTES:
+        path = route.format(user_id=USER_ID)
+        results = []
+        for name, app in variants:
+            async with app.router.lifespan_context(app) as state:
+                # httpx ASGITransport não executa o lifespan: injeta o estado no escopo
+                rate, size = await requests_per_second(with_state(app, state), path, args.seconds, args.concurrency)
+            results.append((name, rate, size))
+        baseline = results[0][1]
+        line = "  ".join(f"{name}={rate:7.0f} req/s ({size}B)" for name, rate, size in results)
+        print(f"{route:34s} {line}  ganho={results[1][1] / baseline:.2f}x")
+
+def with_state(app, state):
+    """Aplicação ASGI que entrega o estado do lifespan em cada requisição"""
+    async def asgi(scope, receive, send):
+        if state:
+            scope = {**scope, "state": dict(state)}
+        await app(scope, receive, send)
+    return asgi
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20, help="itens em cada lista")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gzip", action="store_true", help="inclui a variante com compressão gzip")
+    asyncio.run(main(parser.parse_args()))
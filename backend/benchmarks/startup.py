@@ -0,0 +1,119 @@
+"""Benchmark do tempo de subida de um processo da API
+
+A cada repetição:
+  - importa main em um interpretador novo e mede o tempo, conferindo que
+    nenhuma dependência pesada (torch, transformers, face_recognition,
+    pandas...) foi importada junto
+  - sobe um uvicorn com um worker e mede quanto tempo leva até "/" responder
+    (socket aberto, sonda de vida) e até "/ready" responder 200 (MongoDB
+    acessível e modelos de PRELOAD_MODELS carregados)
+--importtime N lista os N módulos mais caros do import (python -X importtime).
+Requer um mongod para /ready.
+
+Uso:
+    cd backend && python -m benchmarks.startup --repeat 5 --preload relevance
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+HEAVY_MODULES = ["torch", "transformers", "face_recognition", "dlib", "pandas", "cv2", "boto3"]
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+def import_main(env):
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+def slowest_imports(env, count):
+    """Módulos com maior tempo acumulado de import (-X importtime)"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+def wait_for(client, url, deadline, expect_ok):
+    while time.perf_counter() < deadline:
+        try:
+            response = client.get(url)
+            if not expect_ok or response.status_code == 200:
+                return response
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    return None
+
+def boot(env, port, timeout):
+    """Sobe um uvicorn e retorna (segundos até "/", segundos até "/ready" ou None, estado dos modelos)"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=2) as client:
+            deadline = start + timeout
+            if wait_for(client, "/", deadline, expect_ok=False) is None:
+                return None, None, None
+            live = time.perf_counter() - start
+            response = wait_for(client, "/ready", deadline, expect_ok=True)
+            ready = time.perf_counter() - start if response is not None else None
+            models = client.get("/ready").json()["models"]
+            return live, ready, models
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--preload", default=os.getenv("PRELOAD_MODELS", "relevance"),
+                        help="PRELOAD_MODELS do processo medido (vazio = nenhum)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=300, help="limite para /ready, em segundos")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    args = parser.parse_args()
+
+    env = {**os.environ, "PRELOAD_MODELS": args.preload}
+    imports, lives, readies = [], [], []
+    for i in range(args.repeat):
+        result = import_main(env)
+        imports.append(result["seconds"])
+        if result["heavy"]:
+            print(f"  atenção: import main carregou {', '.join(result['heavy'])}")
+        live, ready, models = boot(env, args.port, args.timeout)
+        if live is None:
+            raise SystemExit("A API não respondeu em / dentro do limite")
+        lives.append(live)
+        if ready is not None:
+            readies.append(ready)
+        states = ", ".join(f"{name}={model['state']}" for name, model in models.items())
+        ready_text = f"{ready:.2f}s" if ready is not None else "não ficou pronta"
+        print(f"rodada {i + 1}: import {result['seconds']:.2f}s, / em {live:.2f}s, /ready em {ready_text} ({states})")
+
+    print(f"mediana: import {statistics.median(imports):.2f}s, / em {statistics.median(lives):.2f}s"
+          + (f", /ready em {statistics.median(readies):.2f}s" if readies else ""))
+    if args.importtime:
+        print("imports mais caros (acumulado):")
+        for cumulative, name in slowest_imports(env, args.importtime):
+            print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark de vazão dos backends de armazenamento (local x S3/MinIO)
+
+Grava e lê N arquivos concorrentes por cada backend usando os mesmos
+escritores do pipeline de upload. O backend S3 só é medido quando
+S3_ENDPOINT_URL está definido (ex.: MinIO local do docker-compose).
+
+Uso:
+    cd backend && S3_ENDPOINT_URL=http://localhost:9000 \\
+        AWS_ACCESS_KEY_ID=minioadmin AWS_SECRET_ACCESS_KEY=minioadmin \\
+        python -m benchmarks.storage_throughput --files 16 --size-mb 10
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from services.storage import LocalStorage, S3Storage
+
+CHUNK = 1024 * 1024
+
+async def write_file(storage, key, size):
+    writer = await storage.open_writer()
+    block = os.urandom(CHUNK)
+    written = 0
+    try:
+        while written < size:
+            await writer.write(block[:min(CHUNK, size - written)])
+            written += CHUNK
+        await writer.commit(key)
+    except BaseException:
+        await writer.abort()
+        raise
+
+async def read_file(storage, key):
+    total = 0
+    async for chunk in storage.iter_chunks(key):
+        total += len(chunk)
+    return total
+
+async def bench(name, storage, files, size):
+    await storage.ensure_ready()
+    prefix = f"bench/{uuid.uuid4().hex}/"
+    keys = [f"{prefix}{i}.bin" for i in range(files)]
+    total_mb = files * size / (1024 * 1024)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(write_file(storage, key, size) for key in keys))
+    write_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(read_file(storage, key) for key in keys))
+    read_s = time.perf_counter() - start
+
+    await asyncio.gather(*(storage.delete(key) for key in keys))
+    print(f"{name:8s} escrita {total_mb / write_s:8.1f} MB/s   leitura {total_mb / read_s:8.1f} MB/s")
+
+async def main(args):
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        await bench("local", LocalStorage(tmp), args.files, size)
+    if os.getenv("S3_ENDPOINT_URL"):
+        await bench("s3", S3Storage(), args.files, size)
+    else:
+        print("s3       ignorado (defina S3_ENDPOINT_URL)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size-mb", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
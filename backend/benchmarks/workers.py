@@ -0,0 +1,162 @@
+"""Benchmark de memória por worker e vazão por número de workers (gunicorn)
+
+Para cada quantidade de workers (e com/sem preload_app, --compare-preload):
+  - sobe o gunicorn com gunicorn.conf.py e espera os modelos de
+    PRELOAD_MODELS ficarem carregados em todos os workers
+  - lê /proc/<pid>/smaps_rollup do mestre e de cada worker: PSS (memória
+    proporcional, que divide as páginas compartilhadas entre os processos),
+    memória privada e compartilhada. Com preload, os pesos dos modelos
+    aparecem como compartilhados e o PSS por worker cai
+  - mede a vazão e a latência p50/p99 de uma rota com um cliente de carga
+    em laço fechado
+Só Linux (/proc). A rota padrão (/) não usa o MongoDB.
+
+Uso:
+    cd backend && python -m benchmarks.workers --workers 1,2,4 --compare-preload --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from benchmarks._stats import percentile
+
+def memory_kb(pid):
+    """Campos de smaps_rollup do processo, em kB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def wait_until_warm(base_url, workers, timeout):
+    """Espera o "/" responder e os modelos pré-carregados estarem prontos em todos os workers"""
+    deadline = time.perf_counter() + timeout
+    consecutive = 0
+    with httpx.Client(base_url=base_url, timeout=2) as client:
+        while time.perf_counter() < deadline:
+            try:
+                models = client.get("/ready").json()["models"]
+            except (httpx.TransportError, ValueError):
+                time.sleep(0.1)
+                continue
+            # O MongoDB não entra na conta: só o estado dos modelos
+            warm = all(model["state"] == "warm" for model in models.values() if model["preload"])
+            consecutive = consecutive + 1 if warm else 0
+            # Cada resposta vem de um worker qualquer: exige várias seguidas
+            if consecutive >= 4 * workers:
+                return True
+            time.sleep(0.05)
+    return False
+
+async def load(base_url, path, concurrency, duration):
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    latencies.sort()
+    return {
+        "requests_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "errors": errors,
+    }
+
+def run(workers, preload, args):
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "GUNICORN_PRELOAD": "1" if preload else "0",
+           "PRELOAD_MODELS": args.preload_models}
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        httpx.get(base_url, timeout=1)
+        raise SystemExit(f"Porta {args.port} já em uso: encerre o servidor anterior ou use --port")
+    except httpx.TransportError:
+        pass
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app",
+         "--bind", f"127.0.0.1:{args.port}", "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_until_warm(base_url, workers, args.timeout):
+            raise SystemExit(f"{workers} workers: modelos não carregaram em {args.timeout}s")
+        worker_memory = [memory_kb(pid) for pid in children(master.pid)]
+        master_memory = memory_kb(master.pid)
+        throughput = asyncio.run(load(base_url, args.path, args.concurrency, args.duration))
+    finally:
+        master.terminate()
+        master.wait()
+
+    average = lambda key: round(sum(m[key] for m in worker_memory) / len(worker_memory) / 1024, 1)
+    return {
+        "workers": workers,
+        "preload": preload,
+        "worker_pss_mb": average("pss"),
+        "worker_private_mb": average("private"),
+        "worker_shared_mb": average("shared"),
+        "total_pss_mb": round((master_memory["pss"] + sum(m["pss"] for m in worker_memory)) / 1024, 1),
+        **throughput,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="quantidades de workers, separadas por vírgula")
+    parser.add_argument("--compare-preload", action="store_true", help="mede também sem preload_app")
+    parser.add_argument("--preload-models", default=os.getenv("PRELOAD_MODELS", "relevance"))
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=300, help="limite para os modelos carregarem")
+    parser.add_argument("--output", help="arquivo do relatório JSON")
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for preload in ([True, False] if args.compare_preload else [True]):
+            result = run(workers, preload, args)
+            results.append(result)
+            print(
+                f"{workers:2d} workers, preload {'sim' if preload else 'não'}: "
+                f"PSS/worker {result['worker_pss_mb']:7.1f} MB (privada {result['worker_private_mb']:.1f}, "
+                f"compartilhada {result['worker_shared_mb']:.1f}), PSS total {result['total_pss_mb']:7.1f} MB, "
+                f"{result['requests_per_second']:8.1f} req/s, p50 {result['p50_ms']}ms, p99 {result['p99_ms']}ms"
+                + (f", {result['errors']} erros" if result["errors"] else "")
+            )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "preload_models": args.preload_models, "results": results},
+                      f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
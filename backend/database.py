@@ -0,0 +1,64 @@
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+
+from services.metrics import mongo_event_listeners
+from services.tracing import mongo_tracing_listeners
+
+# Conexão assíncrona com o MongoDB (Motor)
+# Todas as operações retornam awaitables e não bloqueiam o event loop do uvicorn
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+MONGODB_DB = os.getenv("MONGODB_DB", "furia_kyf")
+# Pool de conexões por processo: com vários workers, o total no MongoDB é
+# workers x MONGODB_MAX_POOL_SIZE
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+
+def create_client():
+    """Cria um cliente do MongoDB com o pool configurado
+
+    O cliente não pode atravessar um fork: a API cria o seu no lifespan de
+    cada worker (main.py) e o worker de jobs e os scripts usam o cliente
+    padrão do processo (database.db), criado no primeiro acesso.
+    """
+    # Listeners de monitoramento alimentam as métricas de comandos e do pool (/metrics)
+    # e os spans de cada comando (rastreamento)
+    return AsyncIOMotorClient(
+        MONGODB_URI,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        event_listeners=mongo_event_listeners() + mongo_tracing_listeners(),
+    )
+
+_client = None
+
+def get_client():
+    """Cliente padrão do processo (worker de jobs e scripts)"""
+    global _client
+    if _client is None:
+        _client = create_client()
+    return _client
+
+def get_database():
+    """Retorna o banco de dados assíncrono do cliente padrão do processo"""
+    return get_client()[MONGODB_DB]
+
+def __getattr__(name):
+    # "from database import db" cria o cliente padrão só quando usado, então
+    # importar main (ou este módulo) não abre conexões antes de um fork
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def to_object_id(value):
+    """Converte ids recebidos na URL para ObjectId (valores inválidos ficam como string)"""
+    return ObjectId(value) if ObjectId.is_valid(value) else value
+
+def close_database():
+    """Fecha o pool de conexões do cliente padrão, se ele foi criado"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
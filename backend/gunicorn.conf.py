@@ -0,0 +1,88 @@
+"""Configuração do gunicorn para servir a API com vários processos
+
+    cd backend && gunicorn -c gunicorn.conf.py main:app
+
+Com preload_app, main é importado uma única vez no processo mestre e os
+workers (uvicorn) nascem por fork. Antes do fork, o mestre carrega os
+modelos de PRELOAD_MODELS e congela os objetos existentes no GC
+(gc.freeze), para que as coletas nos workers não escrevam nos cabeçalhos
+desses objetos: os pesos ficam em páginas compartilhadas copy-on-write em
+vez de uma cópia por worker. Nada que não sobreviva a um fork é criado no
+import: o cliente do MongoDB e as tasks de background nascem no lifespan
+de cada worker.
+
+Processos e pools vêm do ambiente: WEB_CONCURRENCY (workers, ou -w),
+MONGODB_MAX_POOL_SIZE (conexões por worker), PASSWORD_HASH_WORKERS e
+RELEVANCE_TORCH_THREADS (threads por worker; por padrão os núcleos
+divididos entre os workers).
+
+O cache de leitura local (LRU por processo) só é invalidado no worker que
+atendeu a escrita; os outros continuariam servindo a versão antiga até o
+TTL. Com mais de um worker e sem READ_CACHE_REDIS_URL, o cache de leitura
+é desligado (os ETags e o 304 continuam, calculados a cada leitura).
+
+As métricas do Prometheus usam o modo multiprocess: cada worker grava em
+PROMETHEUS_MULTIPROC_DIR (limpo ao iniciar) e /metrics responde com a soma
+de todos, qualquer que seja o worker que atenda a raspagem.
+"""
+import gc
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Precisa estar no ambiente antes do import do prometheus_client (import de main)
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "furia-kyf-metrics")
+)
+os.makedirs(metrics_dir, exist_ok=True)
+# Valores de uma execução anterior somariam aos novos
+for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+    os.remove(path)
+
+def local_read_cache_unsafe(server):
+    # server.cfg.workers já considera -w/--workers da linha de comando
+    return server.cfg.workers > 1 and not os.getenv("READ_CACHE_REDIS_URL")
+
+def when_ready(server):
+    # Chamado no mestre depois do import de main e antes de criar os workers
+    if local_read_cache_unsafe(server):
+        server.log.warning("Cache de leitura desligado: com vários workers, use READ_CACHE_REDIS_URL")
+    if not preload_app:
+        return
+    from services.relevance import relevance_scorer
+    from services.warmup import warmup
+
+    # O mestre não faz inferência: com uma thread, o pool de threads do
+    # OpenMP (que não sobrevive ao fork) não chega a ser criado
+    relevance_scorer.set_torch_threads(1)
+    warmup.preload_before_fork()
+    gc.freeze()
+    server.log.info(f"Modelos pré-carregados no mestre: {warmup.status()['models']}")
+
+def post_fork(server, worker):
+    # Cada worker desliga o próprio cache (com ou sem preload_app)
+    if local_read_cache_unsafe(server):
+        from services.read_cache import read_cache
+
+        read_cache.enabled = False
+
+    # Threads do torch por worker: sem RELEVANCE_TORCH_THREADS, os núcleos divididos entre os workers
+    from services.relevance import relevance_scorer
+
+    torch_threads = int(os.getenv("RELEVANCE_TORCH_THREADS", "0")) or max(1, multiprocessing.cpu_count() // server.cfg.workers)
+    relevance_scorer.set_torch_threads(torch_threads)
+
+def child_exit(server, worker):
+    # Descarta os gauges "livesum" do worker encerrado
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,136 @@
+"""Registro declarativo de índices do MongoDB
+
+Aplicado uma única vez por deploy (não a cada boot de worker):
+    python indexes.py apply   # cria os índices que faltam (idempotente)
+    python indexes.py check   # roda explain() nas consultas dos routers e falha se houver COLLSCAN
+"""
+import argparse
+import os
+import sys
+
+import pymongo
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+MONGODB_DB = os.getenv("MONGODB_DB", "furia_kyf")
+
+# Índices por coleção
+# Os nomes padrão do MongoDB (ex.: "email_1") são mantidos para continuar
+# compatíveis com os índices já criados em bancos existentes
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "profiles": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "documents": [
+        IndexModel([("user_id", ASCENDING)]),
+        # Usado pelo coletor de lixo de blobs
+        IndexModel([("file_path", ASCENDING)]),
+        IndexModel([("selfie_path", ASCENDING)], sparse=True),
+    ],
+    "social_accounts": [
+        # Também atende as buscas apenas por user_id (prefixo do índice)
+        IndexModel([("user_id", ASCENDING), ("platform", ASCENDING)], unique=True),
+    ],
+    "esports_profiles": [
+        IndexModel([("user_id", ASCENDING), ("platform", ASCENDING)], unique=True),
+        IndexModel([("screenshot_path", ASCENDING)], sparse=True),
+    ],
+    "jobs": [
+        IndexModel([("status", ASCENDING), ("available_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("lease_until", ASCENDING)]),
+        IndexModel([("finished_at", ASCENDING)], sparse=True),
+    ],
+    "blobs": [
+        IndexModel([("refcount", ASCENDING), ("updated_at", ASCENDING)]),
+        IndexModel([("state", ASCENDING)], sparse=True),
+    ],
+    "fan_scores": [
+        # Segmentação: fãs de um segmento ordenados pela pontuação
+        IndexModel([("segment", ASCENDING), ("score", DESCENDING)]),
+    ],
+    "revoked_tokens": [
+        # Revogações somem junto com a expiração do token
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        # Sincronização incremental do filtro em memória
+        IndexModel([("revoked_at", ASCENDING)]),
+    ],
+}
+
+# Consultas feitas pelos routers e pelos jobs de manutenção (coleção, filtro)
+# usadas na verificação de planos
+ROUTER_QUERIES = [
+    ("users", {"email": "fan@furia.gg"}),
+    ("users", {"username": "fan"}),
+    ("profiles", {"user_id": "user123"}),
+    ("documents", {"user_id": "user123"}),
+    ("documents", {"_id": "document_id"}),
+    ("social_accounts", {"user_id": "user123", "platform": "twitter"}),
+    ("social_accounts", {"user_id": "user123"}),
+    ("social_accounts", {"_id": "account_id"}),
+    ("esports_profiles", {"user_id": "user123", "platform": "steam"}),
+    ("esports_profiles", {"user_id": "user123"}),
+    ("esports_profiles", {"_id": "profile_id"}),
+    ("jobs", {"status": "queued", "available_at": {"$lte": 0}}),
+    ("jobs", {"status": "running", "lease_until": {"$lt": 0}}),
+    ("jobs", {"finished_at": {"$gte": 0}}),
+    ("blobs", {"refcount": {"$lte": 0}, "updated_at": {"$lt": 0}, "state": {"$ne": "deleting"}}),
+    ("blobs", {"state": "deleting"}),
+    ("documents", {"file_path": {"$in": ["uploads/blobs/aa/bb/x.png"]}}),
+    ("documents", {"selfie_path": {"$in": ["uploads/blobs/aa/bb/x.png"]}}),
+    ("esports_profiles", {"screenshot_path": {"$in": ["uploads/blobs/aa/bb/x.png"]}}),
+    ("fan_scores", {"segment": "superfa", "score": {"$gte": 0}}),
+    ("revoked_tokens", {"expires_at": {"$gt": 0}, "revoked_at": {"$gte": 0}}),
+]
+
+def apply_indexes(db):
+    """Cria os índices declarados; índices já existentes não são recriados"""
+    for collection, models in INDEXES.items():
+        names = db[collection].create_indexes(models)
+        print(f"{collection}: {', '.join(names)}")
+
+def plan_stages(plan):
+    """Percorre a árvore do plano de execução retornando todos os estágios"""
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+def check_query_plans(db):
+    """Executa explain() em cada consulta dos routers; retorna as que fazem COLLSCAN"""
+    failures = []
+    for collection, query in ROUTER_QUERIES:
+        explain = db[collection].find(query).explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"[{status}] {collection} {query} -> {' <- '.join(s for s in stages if s)}")
+        if status == "COLLSCAN":
+            failures.append((collection, query))
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerenciamento de índices do MongoDB")
+    parser.add_argument("command", choices=["apply", "check"])
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(MONGODB_URI)
+    db = client[MONGODB_DB]
+    try:
+        if args.command == "apply":
+            apply_indexes(db)
+        else:
+            failures = check_query_plans(db)
+            if failures:
+                print(f"{len(failures)} consulta(s) sem índice")
+                sys.exit(1)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,75 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import pymongo
+from fastapi.responses import ORJSONResponse
 import os
 from datetime import datetime, timedelta
 
 # Importações internas serão adicionadas à medida que os módulos forem criados
-from routes import users, profiles, documents, social, esports
+from routes import users, profiles, documents, social, esports, jobs, dashboard, cache, profiler
+from database import MONGODB_DB, create_client
+from services import fan_scores
+from services.auth import authenticator
+from services.passwords import password_hasher
+from services.uploads import MaxBodySizeMiddleware
+from services.compression import CompressionMiddleware
+from services.profiler import RequestProfilerMiddleware
+from services.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+from services.metrics import METRICS_ENABLED, MetricsMiddleware, monitor_event_loop_lag, render as render_metrics
+from services.storage import storage
+from services.warmup import warmup
+import asyncio
+
+# Tempo máximo do ping ao MongoDB na sonda de prontidão
+READY_MONGO_TIMEOUT_SECONDS = float(os.getenv("READY_MONGO_TIMEOUT_SECONDS", "2"))
+
+# Inicialização e encerramento
+# Os índices são criados no deploy (python indexes.py apply), não a cada boot
+@asynccontextmanager
+async def lifespan(app):
+    # Cliente do MongoDB deste processo, criado aqui e não no import: com
+    # gunicorn --preload (gunicorn.conf.py) cada worker abre o seu depois do fork
+    client = create_client()
+    db = client[MONGODB_DB]
+    await storage.ensure_ready()
+    
+    # Tokens revogados (logout) sincronizados do MongoDB para a memória
+    app.state.revocation_task = asyncio.create_task(authenticator.revocations.run_periodically(db))
+    
+    # Atraso do event loop exposto em /metrics
+    if METRICS_ENABLED:
+        app.state.loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+    
+    # Modelos pesados carregados em background: o processo já atende enquanto isso (/ready)
+    app.state.preload_task = asyncio.create_task(warmup.preload())
+    print("API inicializada com sucesso!")
+    
+    # O estado do lifespan é copiado para cada requisição: as rotas usam
+    # request.state.db sem passar por um middleware HTTP
+    yield {"db": db}
+    
+    app.state.revocation_task.cancel()
+    app.state.preload_task.cancel()
+    if getattr(app.state, "loop_lag_task", None):
+        app.state.loop_lag_task.cancel()
+    # Pontuações de fãs disparadas pelas últimas escritas
+    await fan_scores.drain()
+    client.close()
+    password_hasher.shutdown()
+    shutdown_tracing()
+    print("Conexão com o banco de dados fechada.")
+
+# Exportador dos spans (TRACING_EXPORTER, desligado por padrão)
+configure_tracing()
 
 # Configuração da aplicação FastAPI
+# Respostas serializadas com orjson por padrão
 app = FastAPI(
     title="FURIA Know Your Fan API",
     description="API para coleta e análise de dados de fãs da FURIA",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configuração de CORS para permitir requisições do frontend
@@ -23,17 +81,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Conexão com o MongoDB
-MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
-client = pymongo.MongoClient(MONGODB_URI)
-db = client["furia_kyf"]
+# Recusa uploads acima do limite antes de o corpo ser lido por completo
+app.add_middleware(MaxBodySizeMiddleware)
+
+# Compressão gzip/brotli das respostas grandes (RESPONSE_COMPRESSION, desligada por padrão)
+app.add_middleware(CompressionMiddleware)
+
+# Marca as requisições sorteadas pelo profiler (inerte sem sessão em andamento)
+app.add_middleware(RequestProfilerMiddleware)
 
-# Disponibilizando o banco de dados para os endpoints
-@app.middleware("http")
-async def add_db_to_request(request, call_next):
-    request.state.db = db
-    response = await call_next(request)
-    return response
+# Latência por rota e requisições em andamento (por fora dos demais middlewares)
+app.add_middleware(MetricsMiddleware)
+
+# Continua o trace do frontend (cabeçalho traceparent) em um span por requisição
+app.add_middleware(TracingMiddleware)
 
 # Rota de status para verificar se a API está funcionando
 @app.get("/", tags=["Status"])
@@ -44,23 +105,35 @@ async def read_root():
         "timestamp": datetime.now().isoformat()
     }
 
+# Prontidão: MongoDB acessível e modelos de PRELOAD_MODELS carregados (503 até lá)
+# A rota "/" continua sendo só a sonda de vida
+@app.get("/ready", tags=["Status"])
+async def read_ready(request: Request):
+    readiness = warmup.status()
+    
+    try:
+        await asyncio.wait_for(request.state.db.command("ping"), timeout=READY_MONGO_TIMEOUT_SECONDS)
+        readiness["mongodb"] = "ok"
+    except Exception as e:
+        readiness["mongodb"] = f"indisponível: {type(e).__name__}"
+        readiness["ready"] = False
+    
+    status_code = status.HTTP_200_OK if readiness["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return ORJSONResponse(readiness, status_code=status_code)
+
+# Métricas no formato do Prometheus
+@app.get("/metrics", tags=["Status"], include_in_schema=False)
+async def read_metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
 # Incluindo os routers dos diversos módulos
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(profiles.router, prefix="/api/profiles", tags=["Profiles"])
 app.include_router(documents.router, prefix="/api/documents", tags=["Documents"])
 app.include_router(social.router, prefix="/api/social", tags=["Social"])
 app.include_router(esports.router, prefix="/api/esports", tags=["Esports"])
-
-# Função para inicialização
-@app.on_event("startup")
-async def startup():
-    # Criar índices necessários
-    db.users.create_index("email", unique=True)
-    db.users.create_index("username", unique=True)
-    print("API inicializada com sucesso!")
-
-# Função para encerramento
-@app.on_event("shutdown")
-async def shutdown():
-    client.close()
-    print("Conexão com o banco de dados fechada.")
\ No newline at end of file
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(cache.router, prefix="/api/cache", tags=["Cache"])
+app.include_router(profiler.router, prefix="/api/admin/profiler", tags=["Admin"])
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+
+from services.auth import get_admin_user
+from services.read_cache import read_cache
+
+# Rotas para acompanhar o cache de leitura (somente administradores)
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+@router.get("/stats")
+async def get_cache_stats():
+    # Acertos, faltas, respostas 304 e invalidações por recurso
+    return read_cache.stats()
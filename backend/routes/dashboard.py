@@ -0,0 +1,107 @@
+from fastapi import APIRouter, HTTPException, status, Request
+from pymongo.errors import ExecutionTimeout
+import os
+import time
+
+from services.read_cache import read_cache
+
+router = APIRouter()
+
+# Tempo esperado para montar o painel; acima disso a requisição é registrada
+DASHBOARD_LATENCY_BUDGET_MS = float(os.getenv("DASHBOARD_LATENCY_BUDGET_MS", "50"))
+# Limite no servidor: a agregação é abortada pelo MongoDB depois disso
+DASHBOARD_MAX_TIME_MS = int(os.getenv("DASHBOARD_MAX_TIME_MS", "1000"))
+
+def lookup(collection, fields, as_field, foreign_field="user_id"):
+    """$lookup por user_id trazendo só os campos usados pelo painel"""
+    return {"$lookup": {
+        "from": collection,
+        "localField": "user_id",
+        "foreignField": foreign_field,
+        "pipeline": [
+            {"$project": {**{field: 1 for field in fields}, "id": {"$toString": "$_id"}, "_id": 0}},
+        ],
+        "as": as_field,
+    }}
+
+def count_where(array, field, value):
+    return {"$size": {"$filter": {"input": f"${array}", "cond": {"$eq": [f"$$this.{field}", value]}}}}
+
+def dashboard_pipeline(user_id):
+    """Uma única agregação com tudo o que o painel do fã mostra"""
+    return [
+        {"$documents": [{"user_id": user_id}]},
+        lookup("profiles", ["full_name", "address", "interests", "furia_fan_since",
+                            "attended_events", "purchases"], "profile"),
+        lookup("documents", ["document_type", "upload_date", "verification_status",
+                             "face_match_status"], "documents"),
+        lookup("social_accounts", ["platform", "username", "profile_url", "relevance_score",
+                                   "mention_stats", "connected_at"], "social_accounts"),
+        lookup("esports_profiles", ["platform", "username", "profile_url", "verified",
+                                    "verification_status"], "esports_profiles"),
+        lookup("fan_scores", ["score", "segment", "components", "updated_at"], "fan_score", "_id"),
+        {"$set": {
+            "profile": {"$arrayElemAt": ["$profile", 0]},
+            "fan_score": {"$arrayElemAt": ["$fan_score", 0]},
+            "completion": {
+                "profile": {"$gt": [{"$size": "$profile"}, 0]},
+                "documents_total": {"$size": "$documents"},
+                "documents_verified": count_where("documents", "verification_status", "verified"),
+                "social_accounts": {"$size": "$social_accounts"},
+                "esports_profiles": {"$size": "$esports_profiles"},
+                "esports_verified": count_where("esports_profiles", "verified", True),
+            },
+        }},
+    ]
+
+def completion_progress(completion):
+    """Etapas concluídas do cadastro (perfil, identidade, redes sociais, e-sports)"""
+    steps = {
+        "profile": completion["profile"],
+        "documents": completion["documents_verified"] > 0,
+        "social": completion["social_accounts"] > 0,
+        "esports": completion["esports_profiles"] > 0,
+    }
+    completion["steps"] = steps
+    completion["progress"] = sum(steps.values()) / len(steps)
+    return completion
+
+# Rota do painel do fã
+@router.get("/{user_id}")
+async def get_dashboard(user_id: str, request: Request):
+    db = request.state.db
+    
+    # Na versão completa, verificar se o usuário está autenticado
+    # E só pode acessar seu próprio painel
+    
+    timing = {}
+    
+    async def load():
+        start = time.perf_counter()
+        try:
+            results = await db.aggregate(
+                dashboard_pipeline(user_id), maxTimeMS=DASHBOARD_MAX_TIME_MS
+            ).to_list(length=1)
+        except ExecutionTimeout:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Painel indisponível no momento, tente novamente"
+            )
+        timing["mongo"] = (time.perf_counter() - start) * 1000
+        if timing["mongo"] > DASHBOARD_LATENCY_BUDGET_MS:
+            print(f"Painel de {user_id} levou {timing['mongo']:.1f}ms (orçamento: {DASHBOARD_LATENCY_BUDGET_MS:.0f}ms)")
+        
+        dashboard = results[0]
+        # $arrayElemAt de uma lista vazia omite o campo
+        dashboard.setdefault("profile", None)
+        dashboard.setdefault("fan_score", None)
+        dashboard["completion"] = completion_progress(dashboard["completion"])
+        return dashboard
+    
+    # Em cache até a próxima escrita em qualquer recurso do usuário
+    response = await read_cache.response(request, "dashboard", user_id, load)
+    
+    # Tempo da agregação visível no navegador (aba de rede) quando ela roda
+    if "mongo" in timing:
+        response.headers["Server-Timing"] = f"mongo;dur={timing['mongo']:.1f}"
+    return response
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Request, File, UploadFile
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Request, File, UploadFile, Query
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 from typing import List, Optional
-import os
-import shutil
-from pathlib import Path
+from pymongo import ReturnDocument
+from bson import ObjectId
+
+from database import to_object_id
+from services import blobstore, fan_scores, jobs
+from services.auth import get_current_user
+from services.read_cache import read_cache
+from services.storage import file_response
 
 router = APIRouter()
 
@@ -16,19 +21,24 @@ class DocumentResponse(BaseModel):
     file_path: str
     verification_status: str
     upload_date: datetime
+    verification_job_id: Optional[str] = None
+    face_match_status: Optional[str] = None
+
+# Valida e serializa a lista inteira de uma vez, direto para JSON
+DocumentResponseList = TypeAdapter(List[DocumentResponse])
 
 # Rotas para documentos
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
     document_type: str,
     file: UploadFile = File(...),
-    request: Request = None
+    request: Request = None,
+    current_user: dict = Depends(get_current_user)
 ):
     db = request.state.db
     
-    # Na versão completa, verificar se o usuário está autenticado
-    # E obter o user_id do token JWT
-    user_id = "user123"  # Este deve vir da autenticação
+    # Usuário autenticado pelo token de acesso
+    user_id = current_user["sub"]
     
     # Verificar tipo de documento
     allowed_types = ["rg", "cnh", "cpf", "passport"]
@@ -38,46 +48,47 @@ async def upload_document(
             detail=f"Tipo de documento inválido. Permitidos: {', '.join(allowed_types)}"
         )
     
-    # Verificar tipo de arquivo
+    # Salvar arquivo no armazenamento endereçado por conteúdo
+    # (conteúdos repetidos não são gravados de novo)
     allowed_extensions = [".jpg", ".jpeg", ".png", ".pdf"]
-    file_extension = Path(file.filename).suffix.lower()
-    if file_extension not in allowed_extensions:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Formato de arquivo inválido. Permitidos: {', '.join(allowed_extensions)}"
-        )
-    
-    # Criar pasta de uploads se não existir
-    upload_dir = Path("uploads")
-    user_dir = upload_dir / user_id
-    user_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Salvar arquivo
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    safe_filename = f"{document_type}_{timestamp}{file_extension}"
-    file_path = user_dir / safe_filename
+    stored = await blobstore.store_upload(db, file, allowed_extensions)
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Salvar informações no banco de dados
+    # Salvar informações no banco de dados; o id do job de verificação é
+    # gerado antes para ir na mesma escrita do documento
+    job_id = ObjectId()
     document_data = {
         "user_id": user_id,
         "document_type": document_type,
-        "file_path": str(file_path),
+        "file_path": stored.key,
+        "sha256": stored.sha256,
+        "size": stored.size,
         "upload_date": datetime.utcnow(),
-        "verification_status": "pending"  # Inicialmente pendente
+        "verification_status": "pending",  # Inicialmente pendente
+        "verification_job_id": str(job_id)
     }
     
-    result = db.documents.insert_one(document_data)
-    
-    # Na versão completa, iniciar processo de verificação assíncrono
-    # Aqui, apenas simulamos a resposta
+    try:
+        result = await db.documents.insert_one(document_data)
+    except BaseException:
+        await blobstore.release(db, stored.sha256)
+        raise
+    
+    # Verificação assíncrona: o worker processa o job fora da requisição.
+    # O job só é inserido depois do documento (o worker o pularia se não o
+    # encontrasse); se a fila falhar, o documento é desfeito para não ficar
+    # pendente sem job
+    try:
+        await jobs.enqueue(db, "verify_document", {"document_id": str(result.inserted_id)}, job_id=job_id)
+    except BaseException:
+        await db.documents.delete_one({"_id": result.inserted_id})
+        await blobstore.release(db, stored.sha256)
+        raise
+    fan_scores.refresh_in_background(db, user_id, "documents")
+    await read_cache.invalidate(user_id, "documents")
+    document_data["id"] = str(result.inserted_id)
     
     # Retornar documento criado
-    created_doc = db.documents.find_one({"_id": result.inserted_id})
-    created_doc["id"] = str(created_doc["_id"])
-    return created_doc
+    return document_data
 
 @router.get("/status/{user_id}", response_model=List[DocumentResponse])
 async def get_documents_status(user_id: str, request: Request):
@@ -86,40 +97,121 @@ async def get_documents_status(user_id: str, request: Request):
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode acessar seus próprios documentos
     
-    # Buscar documentos do usuário
-    documents = list(db.documents.find({"user_id": user_id}))
+    async def load():
+        # Buscar documentos do usuário
+        documents = await db.documents.find({"user_id": user_id}).to_list(length=None)
+        
+        # Formatar para retorno
+        for doc in documents:
+            doc["id"] = str(doc["_id"])
+        return DocumentResponseList.dump_json(DocumentResponseList.validate_python(documents))
+    
+    # Resposta em cache até a próxima escrita nos documentos (ETag/304 para o cliente)
+    return await read_cache.response(request, "documents", user_id, load)
+
+@router.get("/file/{document_id}")
+async def download_document(document_id: str, request: Request):
+    db = request.state.db
     
-    # Formatar para retorno
-    for doc in documents:
-        doc["id"] = str(doc["_id"])
+    # Na versão completa, verificar se o usuário está autenticado
+    # E só pode baixar seus próprios documentos
     
-    return documents
+    document = await db.documents.find_one({"_id": to_object_id(document_id)}, {"file_path": 1})
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento não encontrado"
+        )
+    
+    # URL assinada (S3) ou streaming do arquivo pela API (local)
+    return await file_response(document["file_path"], blobstore.media_type_for_key(document["file_path"]))
 
-@router.post("/verify/{document_id}")
+@router.post("/verify/{document_id}", status_code=status.HTTP_202_ACCEPTED)
 async def verify_document(document_id: str, request: Request):
     db = request.state.db
     
     # Na versão completa, verificar se o usuário está autenticado
     # E se tem permissão para verificar documentos (admin)
     
-    # Buscar documento
-    document = db.documents.find_one({"_id": document_id})
+    # Buscar documento e marcar como pendente de verificação, já com o id
+    # do job que será enfileirado
+    job_id = ObjectId()
+    document = await db.documents.find_one_and_update(
+        {"_id": to_object_id(document_id)},
+        {"$set": {"verification_status": "pending", "verification_job_id": str(job_id)}},
+        projection={"user_id": 1}
+    )
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Documento não encontrado"
         )
+    fan_scores.refresh_in_background(db, document["user_id"], "documents")
     
-    # Na versão completa, chamar serviço de IA para verificar documento
-    # Aqui, apenas simulamos a verificação
+    # A verificação roda no worker; acompanhe pelo job_id
+    job_id = await jobs.enqueue(db, "verify_document", {"document_id": str(document["_id"])}, job_id=job_id)
+    await read_cache.invalidate(document["user_id"], "documents")
     
-    # Atualizar status
-    db.documents.update_one(
-        {"_id": document_id},
+    return {"status": "queued", "message": "Verificação do documento agendada", "job_id": job_id}
+
+@router.post("/verify-face/{document_id}", status_code=status.HTTP_202_ACCEPTED)
+async def verify_face(
+    document_id: str,
+    selfie: UploadFile = File(...),
+    threshold: Optional[float] = Query(None, gt=0, lt=1),
+    request: Request = None
+):
+    db = request.state.db
+    
+    # Na versão completa, verificar se o usuário está autenticado
+    # E só pode verificar seus próprios documentos
+    
+    document = await db.documents.find_one({"_id": to_object_id(document_id)}, {"file_path": 1})
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento não encontrado"
+        )
+    
+    if document["file_path"].endswith(".pdf"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Documentos em PDF não podem ser usados na verificação facial"
+        )
+    
+    # Salvar selfie no armazenamento endereçado por conteúdo
+    stored = await blobstore.store_upload(db, selfie, [".jpg", ".jpeg", ".png"])
+    
+    previous = await db.documents.find_one_and_update(
+        {"_id": document["_id"]},
         {"$set": {
-            "verification_status": "verified",
-            "verified_at": datetime.utcnow()
-        }}
+            "selfie_path": stored.key,
+            "selfie_sha256": stored.sha256,
+            "face_match_status": "pending"
+        }},
+        projection={"user_id": 1, "selfie_sha256": 1},
+        return_document=ReturnDocument.BEFORE
     )
     
-    return {"status": "success", "message": "Documento verificado com sucesso"}
\ No newline at end of file
+    # Libera a referência da selfie anterior (ou da nova, se o documento sumiu)
+    await blobstore.release(db, previous.get("selfie_sha256") if previous else stored.sha256)
+    if previous is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento não encontrado"
+        )
+    fan_scores.refresh_in_background(db, previous["user_id"], "documents")
+    await read_cache.invalidate(previous["user_id"], "documents")
+    
+    # A comparação facial roda no worker, agrupada com outras verificações
+    job_id = await jobs.enqueue(db, "face_match", {
+        "document_id": str(document["_id"]),
+        "selfie_sha256": stored.sha256,
+        "threshold": threshold
+    })
+    
+    return {
+        "status": "queued",
+        "message": "Selfie recebida, verificação facial em andamento",
+        "job_id": job_id
+    }
\ No newline at end of file
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, HTTPException, status, Request, File, UploadFile
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Request, File, UploadFile
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 from typing import List, Optional
-import shutil
-from pathlib import Path
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import to_object_id
+from services import blobstore, fan_scores, jobs
+from services.auth import get_current_user
+from services.read_cache import read_cache
+from services.storage import file_response
 
 router = APIRouter()
 
@@ -20,16 +26,19 @@ class EsportsProfileResponse(BaseModel):
     username: str
     profile_url: str
     verified: bool
+    verification_status: Optional[str] = None
     created_at: datetime
 
+# Valida e serializa a lista inteira de uma vez, direto para JSON
+EsportsProfileResponseList = TypeAdapter(List[EsportsProfileResponse])
+
 # Rotas para perfis de e-sports
 @router.post("/", response_model=EsportsProfileResponse)
-async def create_esports_profile(profile: EsportsProfileCreate, request: Request):
+async def create_esports_profile(profile: EsportsProfileCreate, request: Request, current_user: dict = Depends(get_current_user)):
     db = request.state.db
     
-    # Na versão completa, verificar se o usuário está autenticado
-    # E obter o user_id do token
-    user_id = "user123"  # Este deve vir da autenticação
+    # Usuário autenticado pelo token de acesso
+    user_id = current_user["sub"]
     
     # Verificar plataforma
     allowed_platforms = ["steam", "faceit", "battlefy", "riot", "epic"]
@@ -39,30 +48,27 @@ async def create_esports_profile(profile: EsportsProfileCreate, request: Request
             detail=f"Plataforma não suportada. Permitidas: {', '.join(allowed_platforms)}"
         )
     
-    # Verificar se já existe perfil dessa plataforma para o usuário
-    existing = db.esports_profiles.find_one({
-        "user_id": user_id,
-        "platform": profile.platform
-    })
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Já existe um perfil {profile.platform} registrado para este usuário"
-        )
-    
     # Criar novo perfil
+    # O índice único (user_id, platform) impede perfis duplicados da mesma plataforma
     profile_data = profile.dict()
     profile_data["user_id"] = user_id
     profile_data["created_at"] = datetime.utcnow()
     profile_data["verified"] = False  # Inicialmente não verificado
     
-    result = db.esports_profiles.insert_one(profile_data)
+    try:
+        result = await db.esports_profiles.insert_one(profile_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Já existe um perfil {profile.platform} registrado para este usuário"
+        )
+    
+    fan_scores.refresh_in_background(db, user_id, "esports")
+    await read_cache.invalidate(user_id, "esports")
     
     # Retornar perfil criado
-    created = db.esports_profiles.find_one({"_id": result.inserted_id})
-    created["id"] = str(created["_id"])
-    return created
+    profile_data["id"] = str(result.inserted_id)
+    return profile_data
 
 @router.get("/user/{user_id}", response_model=List[EsportsProfileResponse])
 async def get_user_esports_profiles(user_id: str, request: Request):
@@ -71,16 +77,19 @@ async def get_user_esports_profiles(user_id: str, request: Request):
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode acessar seus próprios perfis
     
-    # Buscar perfis do usuário
-    profiles = list(db.esports_profiles.find({"user_id": user_id}))
-    
-    # Formatar para retorno
-    for profile in profiles:
-        profile["id"] = str(profile["_id"])
-    
-    return profiles
+    async def load():
+        # Buscar perfis do usuário
+        profiles = await db.esports_profiles.find({"user_id": user_id}).to_list(length=None)
+        
+        # Formatar para retorno
+        for profile in profiles:
+            profile["id"] = str(profile["_id"])
+        return EsportsProfileResponseList.dump_json(EsportsProfileResponseList.validate_python(profiles))
+    
+    # Resposta em cache até a próxima escrita nos perfis (ETag/304 para o cliente)
+    return await read_cache.response(request, "esports", user_id, load)
 
-@router.post("/verify/{profile_id}")
+@router.post("/verify/{profile_id}", status_code=status.HTTP_202_ACCEPTED)
 async def verify_esports_profile(
     profile_id: str, 
     screenshot: UploadFile = File(...),
@@ -92,53 +101,66 @@ async def verify_esports_profile(
     # E só pode verificar seus próprios perfis
     
     # Verificar se o perfil existe
-    profile = db.esports_profiles.find_one({"_id": profile_id})
+    profile = await db.esports_profiles.find_one({"_id": to_object_id(profile_id)}, {"_id": 1})
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Perfil não encontrado"
         )
     
-    # Verificar tipo de arquivo
+    # Salvar screenshot no armazenamento endereçado por conteúdo
     allowed_extensions = [".jpg", ".jpeg", ".png"]
-    file_extension = Path(screenshot.filename).suffix.lower()
-    if file_extension not in allowed_extensions:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Formato de arquivo inválido. Permitidos: {', '.join(allowed_extensions)}"
-        )
+    stored = await blobstore.store_upload(db, screenshot, allowed_extensions)
     
-    # Criar pasta para screenshots se não existir
-    user_id = profile["user_id"]
-    upload_dir = Path("uploads") / "screenshots" / user_id
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    # Atualizar perfil; a verificação da screenshot roda no worker
+    previous = await db.esports_profiles.find_one_and_update(
+        {"_id": profile["_id"]},
+        {"$set": {
+            "verified": False,
+            "verification_status": "pending",
+            "screenshot_path": stored.key,
+            "screenshot_sha256": stored.sha256,
+            "screenshot_uploaded_at": datetime.utcnow()
+        }},
+        projection={"user_id": 1, "screenshot_sha256": 1},
+        return_document=ReturnDocument.BEFORE
+    )
     
-    # Salvar screenshot
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    safe_filename = f"{profile['platform']}_{timestamp}{file_extension}"
-    file_path = upload_dir / safe_filename
+    # Libera a referência da screenshot anterior (ou da nova, se o perfil sumiu)
+    await blobstore.release(db, previous.get("screenshot_sha256") if previous else stored.sha256)
+    if previous is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil não encontrado"
+        )
+    fan_scores.refresh_in_background(db, previous["user_id"], "esports")
+    await read_cache.invalidate(previous["user_id"], "esports")
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(screenshot.file, buffer)
+    job_id = await jobs.enqueue(db, "verify_esports_screenshot", {
+        "profile_id": str(profile["_id"]),
+        "screenshot_sha256": stored.sha256
+    })
     
-    # Na versão completa, chamar serviço de IA para verificar a screenshot
-    # e confirmar que é um perfil válido/relevante
+    return {
+        "status": "queued",
+        "message": "Screenshot recebida, verificação em andamento",
+        "verified": False,
+        "job_id": job_id
+    }
+
+@router.get("/screenshot/{profile_id}")
+async def download_esports_screenshot(profile_id: str, request: Request):
+    db = request.state.db
     
-    # Aqui, apenas simulamos a verificação
-    verification_result = True  # Simulando verificação bem-sucedida
+    # Na versão completa, verificar se o usuário está autenticado
+    # E só pode acessar seus próprios perfis
     
-    # Atualizar perfil
-    db.esports_profiles.update_one(
-        {"_id": profile_id},
-        {"$set": {
-            "verified": verification_result,
-            "screenshot_path": str(file_path),
-            "verified_at": datetime.utcnow()
-        }}
-    )
+    profile = await db.esports_profiles.find_one({"_id": to_object_id(profile_id)}, {"screenshot_path": 1})
+    if not profile or not profile.get("screenshot_path"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Screenshot não encontrada"
+        )
     
-    return {
-        "status": "success", 
-        "message": "Perfil verificado com sucesso" if verification_result else "Falha na verificação",
-        "verified": verification_result
-    }
\ No newline at end of file
+    # URL assinada (S3) ou streaming do arquivo pela API (local)
+    return await file_response(profile["screenshot_path"], blobstore.media_type_for_key(profile["screenshot_path"]))
\ No newline at end of file
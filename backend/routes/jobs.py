@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, status, Request
+
+from services import jobs
+
+router = APIRouter()
+
+# Rotas para acompanhar a fila de jobs em background
+@router.get("/status")
+async def get_queue_status(request: Request, window_seconds: int = 300):
+    db = request.state.db
+    
+    # Profundidade da fila, latência por job e vazão na janela informada
+    return await jobs.queue_stats(db, window_seconds)
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str, request: Request):
+    db = request.state.db
+    
+    job = await jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+    
+    job["id"] = str(job.pop("_id"))
+    return job
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from typing import Optional
+
+from services.auth import get_admin_user
+from services.profiler import MODES, ProfilerBusy, profiler
+
+# Todas as rotas do profiler exigem um usuário administrador
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+# Modelos Pydantic para validação
+class ProfileStart(BaseModel):
+    mode: str = "worker"
+    seconds: float = 30
+    interval_ms: float = 10
+    route: Optional[str] = None
+    one_in: int = 1
+    max_requests: Optional[int] = None
+
+def no_session_error():
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Sessão de profiling não encontrada"
+    )
+
+# Rotas para profiling sob demanda do processo que atende a requisição de
+# início; status, stop e result acham a sessão em qualquer worker (por
+# padrão, a mais recente)
+@router.post("/start", status_code=status.HTTP_201_CREATED)
+async def start_profiling(options: ProfileStart):
+    if options.mode not in MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Modo inválido, use um de: {', '.join(MODES)}"
+        )
+    if options.seconds <= 0 or options.one_in < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="seconds deve ser positivo e one_in pelo menos 1"
+        )
+    
+    try:
+        session = profiler.start(**options.dict())
+    except ProfilerBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Sessão {e} ainda em andamento"
+        )
+    
+    return session.status()
+
+@router.get("/status")
+async def get_profiling_status(session_id: Optional[str] = None):
+    session = profiler.find(session_id)
+    if session is None:
+        raise no_session_error()
+    
+    return session.status()
+
+@router.post("/stop")
+async def stop_profiling(session_id: Optional[str] = None):
+    session = profiler.find(session_id)
+    if session is None:
+        raise no_session_error()
+    
+    # Em outro worker, a sessão para em até PROFILER_SAVE_SECONDS
+    profiler.stop(session)
+    return session.status()
+
+@router.get("/result")
+async def get_profiling_result(format: str = "collapsed", session_id: Optional[str] = None):
+    session = profiler.find(session_id)
+    if session is None:
+        raise no_session_error()
+    
+    # Resultado parcial enquanto a sessão ainda roda
+    filename = f"profile-{session.mode}-{session.id}"
+    if format == "collapsed":
+        return PlainTextResponse(
+            session.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.txt"'}
+        )
+    if format == "speedscope":
+        return ORJSONResponse(
+            session.speedscope(),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'}
+        )
+    
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Formato inválido, use collapsed ou speedscope"
+    )
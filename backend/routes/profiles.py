@@ -2,6 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel
 from datetime import datetime
 from typing import List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from services import fan_scores
+from services.auth import get_current_user
+from services.read_cache import read_cache
 
 router = APIRouter()
 
@@ -37,33 +43,31 @@ class ProfileResponse(BaseModel):
 
 # Rotas para perfis
 @router.post("/", response_model=ProfileResponse)
-async def create_profile(profile: ProfileCreate, request: Request):
+async def create_profile(profile: ProfileCreate, request: Request, current_user: dict = Depends(get_current_user)):
     db = request.state.db
     
-    # Na versão completa, verificar se o usuário está autenticado
-    # E obter o user_id do token
-    # Por enquanto, usar um ID fictício
-    user_id = "user123"  # Este deve vir da autenticação
-    
-    # Verificar se perfil já existe para este usuário
-    existing_profile = db.profiles.find_one({"user_id": user_id})
-    if existing_profile:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Perfil já existe para este usuário"
-        )
+    # Usuário autenticado pelo token de acesso
+    user_id = current_user["sub"]
     
     # Criar novo perfil
+    # O índice único em user_id impede perfis duplicados para o mesmo usuário
     profile_data = profile.dict()
     profile_data["user_id"] = user_id
     profile_data["created_at"] = datetime.utcnow()
     
-    result = db.profiles.insert_one(profile_data)
+    try:
+        result = await db.profiles.insert_one(profile_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Perfil já existe para este usuário"
+        )
+    fan_scores.refresh_in_background(db, user_id, "profile")
+    await read_cache.invalidate(user_id, "profile")
     
     # Retornar dados do perfil criado
-    created_profile = db.profiles.find_one({"_id": result.inserted_id})
-    created_profile["id"] = str(created_profile["_id"])
-    return created_profile
+    profile_data["id"] = str(result.inserted_id)
+    return profile_data
 
 @router.get("/{user_id}", response_model=ProfileResponse)
 async def get_profile(user_id: str, request: Request):
@@ -72,15 +76,18 @@ async def get_profile(user_id: str, request: Request):
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode acessar seu próprio perfil (ou ser admin)
     
-    profile = db.profiles.find_one({"user_id": user_id})
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Perfil não encontrado"
-        )
+    async def load():
+        profile = await db.profiles.find_one({"user_id": user_id})
+        if not profile:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Perfil não encontrado"
+            )
+        profile["id"] = str(profile["_id"])
+        return ProfileResponse(**profile).dict()
     
-    profile["id"] = str(profile["_id"])
-    return profile
+    # Resposta em cache até a próxima escrita no perfil (ETag/304 para o cliente)
+    return await read_cache.response(request, "profile", user_id, load)
 
 @router.put("/{user_id}", response_model=ProfileResponse)
 async def update_profile(user_id: str, profile: ProfileCreate, request: Request):
@@ -89,23 +96,22 @@ async def update_profile(user_id: str, profile: ProfileCreate, request: Request)
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode atualizar seu próprio perfil (ou ser admin)
     
-    existing_profile = db.profiles.find_one({"user_id": user_id})
-    if not existing_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Perfil não encontrado"
-        )
-    
-    # Atualizar perfil
+    # Atualizar perfil e obter o documento atualizado na mesma operação
     profile_data = profile.dict()
     profile_data["updated_at"] = datetime.utcnow()
     
-    db.profiles.update_one(
+    updated_profile = await db.profiles.find_one_and_update(
         {"user_id": user_id},
-        {"$set": profile_data}
+        {"$set": profile_data},
+        return_document=ReturnDocument.AFTER
     )
+    if not updated_profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil não encontrado"
+        )
+    fan_scores.refresh_in_background(db, user_id, "profile")
+    await read_cache.invalidate(user_id, "profile")
     
-    # Retornar perfil atualizado
-    updated_profile = db.profiles.find_one({"user_id": user_id})
     updated_profile["id"] = str(updated_profile["_id"])
     return updated_profile
\ No newline at end of file
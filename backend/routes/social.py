@@ -1,7 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Request
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, File, UploadFile
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 from typing import List, Optional
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from bson.errors import InvalidId
+import asyncio
+import zipfile
+
+from database import to_object_id
+from services import fan_scores, jobs
+from services.auth import get_admin_user, get_current_user
+from services.relevance import relevance_scorer, account_text
+from services.mentions import ArchiveTooLarge, scan_archive
+from services.metrics import record_upload
+from services.read_cache import read_cache
+from services.rescore import RESCORE_BATCH_SIZE, RESCORE_PROCESSES, get_run
+from services.uploads import MAX_ARCHIVE_UPLOAD_BYTES, too_large_error
 
 router = APIRouter()
 
@@ -18,16 +33,19 @@ class SocialAccountResponse(BaseModel):
     username: str
     profile_url: str
     relevance_score: Optional[float] = None
+    mention_stats: Optional[dict] = None
     connected_at: datetime
 
+# Valida e serializa a lista inteira de uma vez, direto para JSON
+SocialAccountResponseList = TypeAdapter(List[SocialAccountResponse])
+
 # Rotas para contas sociais
 @router.post("/", response_model=SocialAccountResponse)
-async def connect_social_account(social: SocialAccountCreate, request: Request):
+async def connect_social_account(social: SocialAccountCreate, request: Request, current_user: dict = Depends(get_current_user)):
     db = request.state.db
     
-    # Na versão completa, verificar se o usuário está autenticado
-    # E obter o user_id do token
-    user_id = "user123"  # Este deve vir da autenticação
+    # Usuário autenticado pelo token de acesso
+    user_id = current_user["sub"]
     
     # Verificar plataforma
     allowed_platforms = ["twitter", "instagram", "facebook", "discord", "twitch"]
@@ -37,19 +55,8 @@ async def connect_social_account(social: SocialAccountCreate, request: Request):
             detail=f"Plataforma não suportada. Permitidas: {', '.join(allowed_platforms)}"
         )
     
-    # Verificar se já existe conta dessa plataforma para o usuário
-    existing = db.social_accounts.find_one({
-        "user_id": user_id,
-        "platform": social.platform
-    })
-    
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Já existe uma conta {social.platform} conectada para este usuário"
-        )
-    
     # Criar nova conta social
+    # O índice único (user_id, platform) impede contas duplicadas da mesma plataforma
     social_data = social.dict()
     social_data["user_id"] = user_id
     social_data["connected_at"] = datetime.utcnow()
@@ -58,12 +65,19 @@ async def connect_social_account(social: SocialAccountCreate, request: Request):
     # Na versão completa, fazer análise de relevância baseada no nome de usuário
     # ou no perfil fornecido (utilizando serviço de IA)
     
-    result = db.social_accounts.insert_one(social_data)
+    try:
+        result = await db.social_accounts.insert_one(social_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Já existe uma conta {social.platform} conectada para este usuário"
+        )
+    fan_scores.refresh_in_background(db, user_id, "social")
+    await read_cache.invalidate(user_id, "social")
     
     # Retornar conta social criada
-    created = db.social_accounts.find_one({"_id": result.inserted_id})
-    created["id"] = str(created["_id"])
-    return created
+    social_data["id"] = str(result.inserted_id)
+    return social_data
 
 @router.get("/user/{user_id}", response_model=List[SocialAccountResponse])
 async def get_user_social_accounts(user_id: str, request: Request):
@@ -72,14 +86,17 @@ async def get_user_social_accounts(user_id: str, request: Request):
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode acessar suas próprias contas
     
-    # Buscar contas do usuário
-    accounts = list(db.social_accounts.find({"user_id": user_id}))
-    
-    # Formatar para retorno
-    for account in accounts:
-        account["id"] = str(account["_id"])
-    
-    return accounts
+    async def load():
+        # Buscar contas do usuário
+        accounts = await db.social_accounts.find({"user_id": user_id}).to_list(length=None)
+        
+        # Formatar para retorno
+        for account in accounts:
+            account["id"] = str(account["_id"])
+        return SocialAccountResponseList.dump_json(SocialAccountResponseList.validate_python(accounts))
+    
+    # Resposta em cache até a próxima escrita nas contas (ETag/304 para o cliente)
+    return await read_cache.response(request, "social", user_id, load)
 
 @router.delete("/{account_id}")
 async def delete_social_account(account_id: str, request: Request):
@@ -88,16 +105,18 @@ async def delete_social_account(account_id: str, request: Request):
     # Na versão completa, verificar se o usuário está autenticado
     # E só pode deletar suas próprias contas
     
-    # Verificar se conta existe
-    account = db.social_accounts.find_one({"_id": account_id})
+    # Deletar conta (404 se não existir)
+    account = await db.social_accounts.find_one_and_delete(
+        {"_id": to_object_id(account_id)},
+        projection={"user_id": 1}
+    )
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conta social não encontrada"
         )
-    
-    # Deletar conta
-    db.social_accounts.delete_one({"_id": account_id})
+    fan_scores.refresh_in_background(db, account["user_id"], "social")
+    await read_cache.invalidate(account["user_id"], "social")
     
     return {"status": "success", "message": "Conta social desconectada com sucesso"}
 
@@ -109,28 +128,128 @@ async def analyze_social_account(account_id: str, request: Request):
     # E só pode analisar suas próprias contas
     
     # Verificar se conta existe
-    account = db.social_accounts.find_one({"_id": account_id})
+    account = await db.social_accounts.find_one({"_id": to_object_id(account_id)})
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conta social não encontrada"
         )
     
-    # Na versão completa, chamar serviço de análise de relevância
-    # Aqui, apenas simulamos a análise
-    relevance_score = 0.75  # Valor simulado entre 0 e 1
+    # Pontuação pelo modelo de relevância (chamadas concorrentes são
+    # agrupadas em um único forward)
+    relevance_score = await relevance_scorer.score(account_text(account))
     
     # Atualizar pontuação
-    db.social_accounts.update_one(
-        {"_id": account_id},
+    await db.social_accounts.update_one(
+        {"_id": account["_id"]},
         {"$set": {
             "relevance_score": relevance_score,
+            "relevance_model_version": relevance_scorer.version,
             "analyzed_at": datetime.utcnow()
         }}
     )
+    fan_scores.refresh_in_background(db, account["user_id"], "social")
+    await read_cache.invalidate(account["user_id"], "social")
     
     return {
         "status": "success", 
         "message": "Análise concluída", 
         "relevance_score": relevance_score
+    }
+
+@router.get("/analyzer/stats")
+async def get_analyzer_stats(admin_user: dict = Depends(get_admin_user)):
+    # Tamanho dos lotes, espera na fila e latência de inferência do modelo
+    return relevance_scorer.stats()
+
+@router.post("/rescore", status_code=status.HTTP_202_ACCEPTED)
+async def rescore_social_accounts(
+    request: Request,
+    only_stale: bool = True,
+    processes: int = Query(RESCORE_PROCESSES, ge=1, le=32),
+    batch_size: int = Query(RESCORE_BATCH_SIZE, ge=1, le=5000),
+    admin_user: dict = Depends(get_admin_user)
+):
+    db = request.state.db
+    
+    # Re-pontuação de todas as contas (por padrão, só as que não estão na
+    # versão atual do modelo), executada pelo worker
+    run_id = str(ObjectId())
+    job_id = await jobs.enqueue(db, "rescore_social_accounts", {
+        "run_id": run_id,
+        "model_version": relevance_scorer.version,
+        "only_stale": only_stale,
+        "processes": processes,
+        "batch_size": batch_size
+    })
+    
+    return {
+        "status": "queued",
+        "message": "Re-pontuação enviada para processamento",
+        "run_id": run_id,
+        "job_id": job_id,
+        "model_version": relevance_scorer.version
+    }
+
+@router.get("/rescore/{run_id}")
+async def get_rescore_status(run_id: str, request: Request, admin_user: dict = Depends(get_admin_user)):
+    db = request.state.db
+    
+    try:
+        run = await get_run(db, run_id)
+    except InvalidId:
+        run = None
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execução de re-pontuação não encontrada"
+        )
+    
+    return run
+
+@router.post("/mentions/{account_id}")
+async def analyze_social_mentions(account_id: str, request: Request, archive: UploadFile = File(...)):
+    db = request.state.db
+    
+    # Na versão completa, verificar se o usuário está autenticado
+    # E só pode analisar suas próprias contas
+    
+    account = await db.social_accounts.find_one({"_id": to_object_id(account_id)})
+    if not account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conta social não encontrada"
+        )
+    
+    if not (archive.filename or "").lower().endswith(".zip"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Envie o arquivo de exportação de dados da plataforma (.zip)"
+        )
+    if archive.size is not None and archive.size > MAX_ARCHIVE_UPLOAD_BYTES:
+        raise too_large_error(MAX_ARCHIVE_UPLOAD_BYTES)
+    
+    # Leitura do zip em blocos, fora do event loop (sem extrair para o disco)
+    try:
+        mention_stats = await asyncio.to_thread(scan_archive, archive.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Arquivo zip inválido"
+        )
+    except ArchiveTooLarge as exc:
+        raise too_large_error(exc.args[0])
+    record_upload("zip", archive.size or 0)
+    mention_stats["analyzed_at"] = datetime.utcnow()
+    
+    await db.social_accounts.update_one(
+        {"_id": account["_id"]},
+        {"$set": {"mention_stats": mention_stats}}
+    )
+    await read_cache.invalidate(account["user_id"], "social")
+    
+    return {
+        "status": "success",
+        "message": "Análise de menções concluída",
+        "mention_stats": mention_stats
     }
\ No newline at end of file
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel, EmailStr
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-import os
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+
+from services import fan_scores
+from services.auth import authenticator, create_access_token, get_admin_user, get_current_user
+from services.passwords import password_hasher, HasherSaturated
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Modelos Pydantic para validação
 class UserCreate(BaseModel):
@@ -25,58 +26,77 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 # Funções de autenticação
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def hasher_busy_error():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor sobrecarregado, tente novamente em instantes",
+        headers={"Retry-After": "1"},
+    )
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def get_password_hash(password):
+    try:
+        return await password_hasher.hash(password)
+    except HasherSaturated:
+        raise hasher_busy_error()
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=7)
-    to_encode.update({"exp": expire})
-    
-    # Na prática, armazenar este segredo em uma variável de ambiente
-    secret_key = os.getenv("JWT_SECRET", "your_secret_key")
-    
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm="HS256")
-    return encoded_jwt
+async def verify_password(plain_password, hashed_password):
+    """Verifica a senha no pool de hashing; retorna (valida, novo_hash)"""
+    try:
+        return await password_hasher.verify_and_update(plain_password, hashed_password)
+    except HasherSaturated:
+        raise hasher_busy_error()
+
+def duplicate_key_field(error):
+    """Campo do índice único violado (keyPattern ou, em servidores antigos, o nome do índice)"""
+    key_pattern = (error.details or {}).get("keyPattern")
+    if key_pattern:
+        return next(iter(key_pattern))
+    return "email" if "index: email_1 " in str(error) else "username"
+
+def duplicate_user_error(field):
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email já cadastrado" if field == "email" else "Nome de usuário já existe"
+    )
 
 # Rotas para usuários
 @router.post("/register", response_model=UserResponse)
 async def register_user(user: UserCreate, request: Request):
     db = request.state.db
     
-    # Verificar se usuário já existe
-    if db.users.find_one({"email": user.email}):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email já cadastrado"
-        )
-    
-    if db.users.find_one({"username": user.username}):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Nome de usuário já existe"
-        )
+    # Consulta barata pelos índices antes do hash: rajadas de cadastros
+    # repetidos não ocupam o pool de hashing
+    existing = await db.users.find_one(
+        {"$or": [{"email": user.email}, {"username": user.username}]},
+        {"email": 1}
+    )
+    if existing:
+        raise duplicate_user_error("email" if existing.get("email") == user.email else "username")
     
     # Criar novo usuário
+    # A unicidade de email e username é garantida pelos índices únicos
+    # (a consulta acima não cobre cadastros simultâneos)
     user_data = {
         "username": user.username,
         "email": user.email,
-        "password_hash": get_password_hash(user.password),
+        "password_hash": await get_password_hash(user.password),
         "created_at": datetime.utcnow()
     }
     
-    result = db.users.insert_one(user_data)
+    try:
+        result = await db.users.insert_one(user_data)
+    except DuplicateKeyError as e:
+        raise duplicate_user_error(duplicate_key_field(e))
+    
+    # Cria a pontuação do fã (zerada até ele completar os dados)
+    fan_scores.refresh_in_background(db, str(result.inserted_id))
     
     # Retornar dados do usuário sem a senha
-    created_user = db.users.find_one({"_id": result.inserted_id})
     return {
-        "id": str(created_user["_id"]),
-        "username": created_user["username"],
-        "email": created_user["email"],
-        "created_at": created_user["created_at"]
+        "id": str(result.inserted_id),
+        "username": user_data["username"],
+        "email": user_data["email"],
+        "created_at": user_data["created_at"]
     }
 
 @router.post("/login")
@@ -84,18 +104,26 @@ async def login_user(user: UserLogin, request: Request):
     db = request.state.db
     
     # Verificar usuário
-    db_user = db.users.find_one({"username": user.username})
-    if not db_user or not verify_password(user.password, db_user["password_hash"]):
+    db_user = await db.users.find_one({"username": user.username})
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await verify_password(user.password, db_user["password_hash"])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciais inválidas",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Rehash transparente quando o algoritmo ou o custo configurado mudou
+    if new_hash:
+        await db.users.update_one(
+            {"_id": db_user["_id"]},
+            {"$set": {"password_hash": new_hash}}
+        )
+    
     # Gerar token de acesso
-    access_token = create_access_token(
-        data={"sub": str(db_user["_id"]), "username": db_user["username"]}
-    )
+    access_token = create_access_token(db_user)
     
     return {
         "access_token": access_token,
@@ -105,10 +133,25 @@ async def login_user(user: UserLogin, request: Request):
     }
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(request: Request):
-    # Esta rota precisará de um middleware de autenticação
-    # Por enquanto, retorna um erro
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Rota ainda não implementada completamente"
-    )
\ No newline at end of file
+async def read_users_me(current_user: dict = Depends(get_current_user)):
+    # Servido a partir das claims do token, sem consultar o banco
+    return {
+        "id": current_user["sub"],
+        "username": current_user["username"],
+        "email": current_user["email"],
+        "created_at": current_user["created_at"]
+    }
+
+@router.post("/logout")
+async def logout_user(request: Request, current_user: dict = Depends(get_current_user)):
+    db = request.state.db
+    
+    # Revoga o token atual (os demais processos recebem na próxima sincronização)
+    await authenticator.revocations.revoke(db, current_user)
+    
+    return {"message": "Sessão encerrada"}
+
+@router.get("/auth/stats")
+async def get_auth_stats(admin_user: dict = Depends(get_admin_user)):
+    # Acertos do cache de tokens verificados e tamanho do filtro de revogação
+    return authenticator.stats()
@@ -0,0 +1,239 @@
+"""Autenticação stateless por JWT (HS256)
+
+O token emitido no login carrega tudo o que as rotas precisam saber do
+usuário (id, username, email, data de cadastro), então nenhuma requisição
+autenticada consulta db.users. Verificar a assinatura a cada requisição
+ainda custa dezenas de microssegundos; as claims já verificadas ficam em um
+LRU limitado, indexado pelo próprio token, até a expiração dele.
+
+Logout revoga o token pelo seu jti na coleção revoked_tokens (com TTL na
+expiração do token). Cada processo mantém em memória o conjunto de jtis
+revogados e o sincroniza periodicamente com o MongoDB, então a checagem de
+revogação também não consulta o banco. Uma revogação feita em outro
+processo passa a valer em até AUTH_REVOCATION_SYNC_SECONDS.
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from bson import ObjectId
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import ExpiredSignatureError, JWTError, jwt
+from pymongo.errors import DuplicateKeyError
+
+JWT_SECRET = os.getenv("JWT_SECRET", "your_secret_key")
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRE_DAYS = int(os.getenv("JWT_EXPIRE_DAYS", "7"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+AUTH_REVOCATION_SYNC_SECONDS = float(os.getenv("AUTH_REVOCATION_SYNC_SECONDS", "5"))
+
+# Claims obrigatórias; tokens emitidos antes delas exigem um novo login
+REQUIRED_CLAIMS = ("sub", "username", "email", "created_at", "jti", "exp")
+
+# Janela relida a cada sincronização, cobrindo diferenças de relógio entre processos
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=30)
+
+class InvalidToken(Exception):
+    """Token malformado, com assinatura inválida, expirado ou revogado"""
+
+def create_access_token(user: dict):
+    """Token de acesso com os dados do usuário servidos por /me"""
+    created_at = user["created_at"]
+    claims = {
+        "sub": str(user["_id"]),
+        "username": user["username"],
+        "email": user["email"],
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(days=JWT_EXPIRE_DAYS),
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+class VerifiedTokenCache:
+    """LRU de token -> claims já verificadas, válidas até o exp do token"""
+
+    def __init__(self, max_entries=AUTH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        claims = self._entries.get(token)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims["exp"] <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return claims
+
+    def put(self, token, claims):
+        self._entries[token] = claims
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class RevocationFilter:
+    """jtis revogados (até expirarem), sincronizados com revoked_tokens"""
+
+    def __init__(self):
+        self._revoked = {}
+        self.synced_at = None
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        self._revoked[jti] = expires_at
+
+    async def revoke(self, db, claims):
+        """Revoga o token neste processo e registra para os demais"""
+        expires_at = datetime.utcfromtimestamp(claims["exp"])
+        self.add(claims["jti"], expires_at)
+        try:
+            await db.revoked_tokens.insert_one({
+                "_id": claims["jti"],
+                "user_id": claims["sub"],
+                "revoked_at": datetime.utcnow(),
+                "expires_at": expires_at,
+            })
+        except DuplicateKeyError:
+            pass
+
+    async def sync(self, db):
+        """Carrega as revogações novas (todas na primeira vez) e descarta as expiradas"""
+        now = datetime.utcnow()
+        query = {"expires_at": {"$gt": now}}
+        if self.synced_at is not None:
+            query["revoked_at"] = {"$gte": self.synced_at - REVOCATION_SYNC_OVERLAP}
+        async for revoked in db.revoked_tokens.find(query, {"expires_at": 1}):
+            self._revoked[revoked["_id"]] = revoked["expires_at"]
+        self.synced_at = now
+
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        for jti in expired:
+            del self._revoked[jti]
+
+    async def run_periodically(self, db, interval=AUTH_REVOCATION_SYNC_SECONDS):
+        """Loop em background usado pela API"""
+        while True:
+            try:
+                await self.sync(db)
+            except Exception as e:
+                print(f"Erro ao sincronizar tokens revogados: {e}")
+            await asyncio.sleep(interval)
+
+    def __len__(self):
+        return len(self._revoked)
+
+class Authenticator:
+    def __init__(self, secret=JWT_SECRET, cache=None, revocations=None):
+        self.secret = secret
+        self.cache = cache if cache is not None else VerifiedTokenCache()
+        self.revocations = revocations if revocations is not None else RevocationFilter()
+
+    def decode(self, token):
+        """Verifica assinatura, expiração e claims obrigatórias"""
+        try:
+            claims = jwt.decode(token, self.secret, algorithms=[JWT_ALGORITHM])
+        except ExpiredSignatureError:
+            raise InvalidToken("Token expirado")
+        except JWTError:
+            raise InvalidToken("Token inválido")
+        if any(claim not in claims for claim in REQUIRED_CLAIMS):
+            raise InvalidToken("Token inválido")
+        return claims
+
+    def verify(self, token):
+        """Claims do token (compartilhadas com o cache: não devem ser alteradas)"""
+        claims = self.cache.get(token)
+        if claims is None:
+            claims = self.decode(token)
+            self.cache.put(token, claims)
+        if self.revocations.is_revoked(claims["jti"]):
+            raise InvalidToken("Token revogado")
+        return claims
+
+    def stats(self):
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "cached_tokens": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_hit_ratio": round(self.cache.hits / lookups, 3) if lookups else None,
+            "revoked_tokens": len(self.revocations),
+            "revocations_synced_at": self.revocations.synced_at,
+        }
+
+authenticator = Authenticator()
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    """Dependência das rotas autenticadas; retorna as claims do token"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não autenticado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        return authenticator.verify(credentials.credentials)
+    except InvalidToken as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+async def get_admin_user(request: Request, current_user: dict = Depends(get_current_user)):
+    """Dependência das rotas administrativas (usuários com is_admin no documento)
+
+    Consulta db.users a cada chamada (rotas raras): o papel não vai no token,
+    então conceder ou revogar vale na hora. Só é concedido pela linha de
+    comando, nunca pelas rotas de cadastro.
+    """
+    user = await request.state.db.users.find_one(
+        {"_id": ObjectId(current_user["sub"])}, {"is_admin": 1}
+    )
+    if not user or not user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores",
+        )
+    return current_user
+
+async def set_admin(db, username, is_admin=True):
+    """Concede (ou revoga) o papel de administrador; False se o usuário não existe"""
+    result = await db.users.update_one({"username": username}, {"$set": {"is_admin": is_admin}})
+    return result.matched_count == 1
+
+if __name__ == "__main__":
+    # cd backend && python -m services.auth grant <username>  (ou revoke)
+    from database import db, close_database
+
+    parser = argparse.ArgumentParser(description="Concede ou revoga o acesso às rotas administrativas")
+    parser.add_argument("action", choices=["grant", "revoke"])
+    parser.add_argument("username")
+    args = parser.parse_args()
+
+    async def main():
+        if await set_admin(db, args.username, args.action == "grant"):
+            print(f"Usuário {args.username}: is_admin={args.action == 'grant'}")
+        else:
+            print(f"Usuário {args.username} não encontrado")
+        close_database()
+
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+class MicroBatcher:
+    """Agrupa chamadas concorrentes em lotes processados de uma só vez
+
+    submit() enfileira um item e aguarda o resultado. Um loop em background
+    pega o primeiro item da fila, espera até max_wait_ms por mais itens (até
+    max_batch_size) e chama process_batch(itens) em uma thread dedicada,
+    fora do event loop. process_batch deve retornar um resultado por item.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=5, name="batcher"):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        # Uma única thread: o modelo processa um lote por vez e usa os
+        # núcleos internamente, sem disputar CPU com outros lotes
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._queue = None
+        self._task = None
+        self._stats = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "queue_wait_ms_total": 0.0,
+            "inference_ms_total": 0.0,
+            "last_batch_size": 0,
+            "last_inference_ms": 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for item, _, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.process_batch, items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self._record(batch, start, finished)
+
+    def _record(self, batch, start, finished):
+        stats = self._stats
+        stats["batches"] += 1
+        stats["items"] += len(batch)
+        stats["max_batch_size"] = max(stats["max_batch_size"], len(batch))
+        stats["queue_wait_ms_total"] += sum(start - enqueued for _, _, enqueued in batch) * 1000
+        stats["inference_ms_total"] += (finished - start) * 1000
+        stats["last_batch_size"] = len(batch)
+        stats["last_inference_ms"] = (finished - start) * 1000
+
+    def stats(self):
+        """Tamanho médio dos lotes, espera média na fila e latência média de inferência"""
+        stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        items = stats["items"] or 1
+        stats["avg_batch_size"] = stats["items"] / batches
+        stats["avg_queue_wait_ms"] = stats.pop("queue_wait_ms_total") / items
+        stats["avg_inference_ms"] = stats.pop("inference_ms_total") / batches
+        stats["queued"] = self._queue.qsize() if self._queue else 0
+        return stats
+
+    def shutdown(self):
+        if self._task:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,177 @@
+"""Coletor de lixo do armazenamento de blobs
+
+Reconcilia a coleção "blobs" com as referências reais em
+documents.file_path e esports_profiles.screenshot_path, em lotes pequenos e
+com atualizações condicionais (sem locks longos).
+
+Roda no worker (worker.py), nunca nos processos da API: cada processo do
+worker tenta a cada BLOB_GC_INTERVAL_SECONDS pegar o lease "blob_gc" em
+maintenance_leases, e só quem consegue executa a rodada. Com vários
+processos ou réplicas do worker, é uma rodada por intervalo.
+
+Execução avulsa:
+    cd backend && python -m services.blob_gc
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+import asyncio
+import os
+
+from pymongo.errors import DuplicateKeyError
+
+from services.blobstore import BLOB_PREFIX, STATE_DELETING
+from services.storage import INCOMING_PREFIX, storage
+
+BLOB_GC_BATCH_SIZE = int(os.getenv("BLOB_GC_BATCH_SIZE", "500"))
+# Blobs alterados há menos tempo que isso são ignorados (uploads em andamento)
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+# Intervalo da execução em background no worker (0 desativa)
+BLOB_GC_INTERVAL_SECONDS = int(os.getenv("BLOB_GC_INTERVAL_SECONDS", "3600"))
+
+# Coleções e campos que referenciam blobs
+BLOB_REFERENCES = [
+    ("documents", "file_path"),
+    ("documents", "selfie_path"),
+    ("esports_profiles", "screenshot_path"),
+]
+
+async def count_references(db, keys):
+    """Conta quantos registros apontam para cada chave do lote"""
+    counts = Counter()
+    for collection, field in BLOB_REFERENCES:
+        pipeline = [
+            {"$match": {field: {"$in": keys}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        ]
+        async for row in db[collection].aggregate(pipeline):
+            counts[row["_id"]] += row["count"]
+    return counts
+
+async def reconcile_refcounts(db, cutoff):
+    """Corrige refcounts divergentes das referências reais"""
+    fixed = 0
+    last_id = ""
+    while True:
+        batch = await db.blobs.find(
+            {"_id": {"$gt": last_id}, "updated_at": {"$lt": cutoff}, "state": {"$ne": STATE_DELETING}},
+            {"key": 1, "refcount": 1, "updated_at": 1}
+        ).sort("_id", 1).limit(BLOB_GC_BATCH_SIZE).to_list(length=None)
+        if not batch:
+            return fixed
+        last_id = batch[-1]["_id"]
+
+        counts = await count_references(db, [blob["key"] for blob in batch])
+        for blob in batch:
+            actual = counts.get(blob["key"], 0)
+            if blob["refcount"] != actual:
+                # Só corrige se o blob não foi tocado desde a leitura
+                result = await db.blobs.update_one(
+                    {"_id": blob["_id"], "updated_at": blob["updated_at"]},
+                    {"$set": {"refcount": actual}}
+                )
+                fixed += result.modified_count
+        await asyncio.sleep(0)
+
+async def finish_deletion(db, blob):
+    await storage.delete(blob["key"])
+    await db.blobs.delete_one({"_id": blob["_id"], "state": STATE_DELETING})
+
+async def delete_unreferenced(db, cutoff):
+    """Remove blobs sem referências (arquivo e registro)"""
+    deleted = 0
+
+    # Conclui remoções interrompidas em execuções anteriores
+    async for blob in db.blobs.find({"state": STATE_DELETING}, {"key": 1}):
+        await finish_deletion(db, blob)
+        deleted += 1
+
+    while True:
+        batch = await db.blobs.find(
+            {"refcount": {"$lte": 0}, "updated_at": {"$lt": cutoff}, "state": {"$ne": STATE_DELETING}},
+            {"key": 1}
+        ).limit(BLOB_GC_BATCH_SIZE).to_list(length=None)
+        if not batch:
+            return deleted
+        for blob in batch:
+            # Marca antes de apagar: um upload concorrente do mesmo conteúdo
+            # espera a remoção terminar em vez de reaproveitar o arquivo
+            result = await db.blobs.update_one(
+                {"_id": blob["_id"], "refcount": {"$lte": 0}, "updated_at": {"$lt": cutoff}},
+                {"$set": {"state": STATE_DELETING}}
+            )
+            if result.modified_count:
+                await finish_deletion(db, blob)
+                deleted += 1
+        await asyncio.sleep(0)
+
+async def remove_orphan_files(db, cutoff):
+    """Remove arquivos sem registro em "blobs" e uploads temporários abandonados"""
+    removed = 0
+
+    # A listagem chega em páginas de BLOB_GC_BATCH_SIZE chaves, processadas
+    # uma de cada vez
+    async for batch in storage.list_keys(INCOMING_PREFIX, cutoff, BLOB_GC_BATCH_SIZE):
+        for key in batch:
+            await storage.delete(key)
+            removed += 1
+
+    async for batch in storage.list_keys(BLOB_PREFIX, cutoff, BLOB_GC_BATCH_SIZE):
+        by_hash = {key.rsplit("/", 1)[-1].split(".")[0]: key for key in batch}
+        known = set()
+        async for blob in db.blobs.find({"_id": {"$in": list(by_hash)}}, {"_id": 1}):
+            known.add(blob["_id"])
+        for sha256, key in by_hash.items():
+            if sha256 not in known:
+                await storage.delete(key)
+                removed += 1
+    return removed
+
+async def collect_garbage(db):
+    """Executa uma rodada completa do coletor de lixo"""
+    cutoff = datetime.utcnow() - timedelta(seconds=BLOB_GC_GRACE_SECONDS)
+    stats = {
+        "refcounts_fixed": await reconcile_refcounts(db, cutoff),
+        "blobs_deleted": await delete_unreferenced(db, cutoff),
+        "orphan_files_removed": await remove_orphan_files(db, cutoff),
+    }
+    return stats
+
+async def claim_run(db, holder, interval):
+    """Pega o lease da próxima rodada; False se outro processo já rodou neste intervalo"""
+    now = datetime.utcnow()
+    try:
+        # Sem documento vencido, o upsert tenta inserir o mesmo _id e falha
+        await db.maintenance_leases.update_one(
+            {"_id": "blob_gc", "next_run_at": {"$lte": now}},
+            {"$set": {"holder": holder, "started_at": now, "next_run_at": now + timedelta(seconds=interval)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def run_periodically(db, holder, interval=BLOB_GC_INTERVAL_SECONDS):
+    """Loop em background usado pelo worker (uma rodada por intervalo entre todos os processos)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await claim_run(db, holder, interval):
+                continue
+            stats = await collect_garbage(db)
+            # O próximo intervalo conta a partir do fim desta rodada
+            await db.maintenance_leases.update_one(
+                {"_id": "blob_gc", "holder": holder},
+                {"$set": {"next_run_at": datetime.utcnow() + timedelta(seconds=interval), "last_stats": stats}}
+            )
+            print(f"Coletor de blobs: {stats}")
+        except Exception as e:
+            print(f"Erro no coletor de blobs: {e}")
+
+if __name__ == "__main__":
+    from database import db, close_database
+
+    async def main():
+        print(await collect_garbage(db))
+        close_database()
+
+    asyncio.run(main())
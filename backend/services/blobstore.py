@@ -0,0 +1,103 @@
+from datetime import datetime
+import asyncio
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from services.storage import storage
+from services.tracing import tracer
+from services.uploads import ingest_upload
+
+# Armazenamento endereçado por conteúdo
+# Cada arquivo é guardado uma única vez na chave blobs/<aa>/<bb>/<sha256>.<ext>
+# do backend de armazenamento; a coleção "blobs" mantém o refcount de quantos
+# registros apontam para ele
+BLOB_PREFIX = "blobs/"
+
+FILE_TYPE_EXTENSIONS = {
+    "jpeg": ".jpg",
+    "png": ".png",
+    "pdf": ".pdf",
+}
+
+FILE_TYPE_MEDIA_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "pdf": "application/pdf",
+}
+
+# Estado usado pelo coletor de lixo enquanto remove um blob
+STATE_DELETING = "deleting"
+
+def blob_key(sha256, file_type):
+    """Chave do blob com fan-out em dois níveis pelo prefixo do hash"""
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}{FILE_TYPE_EXTENSIONS[file_type]}"
+
+def media_type_for_key(key):
+    for file_type, extension in FILE_TYPE_EXTENSIONS.items():
+        if key.endswith(extension):
+            return FILE_TYPE_MEDIA_TYPES[file_type]
+    return "application/octet-stream"
+
+async def acquire(db, sha256, key, size, file_type):
+    """Incrementa o refcount do blob, criando o registro se necessário
+
+    Se o coletor de lixo estiver removendo o mesmo blob neste instante, o
+    upsert colide com o registro marcado como "deleting"; nesse caso
+    aguardamos a remoção terminar e tentamos de novo.
+    """
+    now = datetime.utcnow()
+    for attempt in range(10):
+        try:
+            return await db.blobs.find_one_and_update(
+                {"_id": sha256, "state": {"$ne": STATE_DELETING}},
+                {
+                    "$inc": {"refcount": 1},
+                    "$set": {"updated_at": now},
+                    "$setOnInsert": {
+                        "key": key,
+                        "size": size,
+                        "file_type": file_type,
+                        "created_at": now,
+                    },
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            await asyncio.sleep(0.05 * (attempt + 1))
+    raise RuntimeError(f"Blob {sha256} bloqueado pelo coletor de lixo")
+
+async def release(db, sha256):
+    """Decrementa o refcount; blobs sem referência são removidos pelo coletor de lixo"""
+    if not sha256:
+        return
+    await db.blobs.update_one(
+        {"_id": sha256, "refcount": {"$gt": 0}},
+        {"$inc": {"refcount": -1}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+
+async def store_upload(db, upload, allowed_extensions):
+    """Ingere um upload e o guarda no armazenamento endereçado por conteúdo
+
+    Retorna o StoredUpload com a chave definitiva do blob. Conteúdos já
+    existentes não são gravados de novo: só o refcount é incrementado.
+    """
+    writer = await storage.open_writer()
+    try:
+        stored = await ingest_upload(upload, writer, allowed_extensions)
+        stored.key = blob_key(stored.sha256, stored.file_type)
+
+        # O refcount é incrementado antes de o arquivo ser colocado no lugar,
+        # assim o coletor de lixo nunca remove um blob com upload em andamento
+        await acquire(db, stored.sha256, stored.key, stored.size, stored.file_type)
+        if await storage.exists(stored.key):
+            await writer.abort()
+        else:
+            with tracer.start_as_current_span("storage.commit", attributes={"storage.key": stored.key}):
+                await writer.commit(stored.key)
+    except BaseException:
+        await writer.abort()
+        raise
+
+    return stored
@@ -0,0 +1,116 @@
+"""Compressão das respostas da API (gzip ou brotli)
+
+Middleware ASGI puro: só comprime respostas completas (um único
+http.response.body) de tipos textuais acima de um tamanho mínimo. Respostas
+em streaming (downloads de arquivos) e 304 passam sem alteração. brotli é
+opcional; sem o pacote, RESPONSE_COMPRESSION=br usa gzip.
+
+RESPONSE_COMPRESSION: off (padrão), gzip ou br. Atrás de um proxy que já
+comprime (nginx), ou com o frontend na mesma rede, deixe desligado.
+
+O ETag forte do cache de leitura vale para os bytes sem compressão. Na
+resposta comprimida (e no 304 de um cliente que aceita compressão) ele vira
+fraco (W/"..."), para que a versão comprimida e a original não compartilhem
+um validador forte (RFC 9110). O If-None-Match é comparado de forma fraca,
+então o 304 continua funcionando.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "off")
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/")
+
+def weak_etag(headers):
+    return [(name, b"W/" + value if name.lower() == b"etag" and not value.startswith(b"W/") else value)
+            for name, value in headers]
+
+def accepted_encodings(scope):
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            return {token.split(b";")[0].strip() for token in value.lower().split(b",")}
+    return set()
+
+class CompressionMiddleware:
+    def __init__(self, app, mode=RESPONSE_COMPRESSION, min_bytes=RESPONSE_COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+        if mode == "br" and brotli is None:
+            print("brotli não instalado: usando gzip na compressão das respostas")
+            mode = "gzip"
+        self.mode = mode
+
+    def choose_encoding(self, scope):
+        accepted = accepted_encodings(scope)
+        if self.mode == "br" and b"br" in accepted:
+            return "br"
+        if self.mode in ("br", "gzip") and b"gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def compress(encoding, body):
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Segura o início até saber o tamanho do corpo
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = start["headers"]
+            if start["status"] == 304:
+                await send({**start, "headers": weak_etag(headers)})
+                await send(message)
+                return
+            names = {name.lower(): value for name, value in headers}
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.min_bytes
+                and b"content-encoding" not in names
+                and names.get(b"content-type", b"").startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                body = self.compress(encoding, body)
+                vary = names.get(b"vary")
+                headers = [(name, value) for name, value in weak_etag(headers)
+                           if name.lower() not in (b"content-length", b"vary")]
+                headers += [
+                    (b"content-encoding", encoding.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+                ]
+                start = {**start, "headers": headers}
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,364 @@
+"""Índice de rostos para detectar a mesma pessoa em contas diferentes
+
+Cada fã verificado tem um encoding facial (128 float32) guardado em uma
+matriz mapeada em memória (np.memmap) no diretório FACE_INDEX_DIR. A busca
+usa um índice IVF: os vetores são agrupados em FACE_INDEX_NLIST clusters
+(k-means) e cada consulta só compara exatamente (re-ranking) os vetores dos
+FACE_INDEX_NPROBE clusters mais próximos. Enquanto há poucos vetores para
+treinar os clusters, a busca é exata e vetorizada sobre toda a matriz.
+
+Vários processos (workers) podem usar o mesmo diretório: alterações são
+feitas sob um flock e os demais processos incorporam as linhas novas ao
+perceber a mudança no cabeçalho. check_and_add busca e registra o rosto sob
+o mesmo lock, para que duas contas da mesma pessoa verificadas ao mesmo
+tempo não deixem de se ver.
+
+O k-means não roda nas inserções: o worker enfileira o job
+"train_face_index" quando needs_training() indica que a base dobrou desde o
+último treino (ou use o comando train abaixo).
+
+Manutenção:
+    cd backend && python -m services.face_index stats
+    cd backend && python -m services.face_index remove <user_id>
+    cd backend && python -m services.face_index train
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import fcntl
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+FACE_INDEX_DIR = Path(os.getenv("FACE_INDEX_DIR", "data/face_index"))
+FACE_INDEX_NLIST = int(os.getenv("FACE_INDEX_NLIST", "1024"))
+FACE_INDEX_NPROBE = int(os.getenv("FACE_INDEX_NPROBE", "16"))
+# Distância máxima para considerar duas contas como a mesma pessoa
+FACE_DUPLICATE_THRESHOLD = float(os.getenv("FACE_DUPLICATE_THRESHOLD", "0.5"))
+
+DIM = 128
+ID_DTYPE = "S32"
+INITIAL_CAPACITY = 4096
+# Vetores mínimos por cluster para treinar o k-means
+MIN_POINTS_PER_CLUSTER = 39
+TRAIN_SAMPLE_SIZE = 100_000
+KMEANS_ITERATIONS = 10
+SCAN_CHUNK = 65536
+
+class FaceIndex:
+    def __init__(self, directory=FACE_INDEX_DIR, nlist=FACE_INDEX_NLIST, nprobe=FACE_INDEX_NPROBE):
+        self.dir = Path(directory)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.capacity = 0
+        self.count = 0
+        self.trained_version = 0
+        self.centroids = None
+        self._rows_by_user = {}
+        self._buckets = []
+
+    # Arquivos ---------------------------------------------------------------
+
+    def _path(self, name):
+        return self.dir / name
+
+    def _read_header(self):
+        try:
+            with open(self._path("header.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"count": 0, "capacity": 0, "trained_version": 0, "trained_count": 0}
+
+    def _write_header(self, **changes):
+        header = self._read_header()
+        header.update(changes)
+        tmp = self._path("header.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp, self._path("header.json"))
+
+    @contextmanager
+    def _exclusive(self):
+        """Lock entre processos (flock) e entre threads para alterações"""
+        with self._lock:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self._path("lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_arrays(self, capacity):
+        """(Re)abre as matrizes mapeadas com a capacidade informada"""
+        specs = [
+            ("vectors", "vectors.f32", np.float32, (capacity, DIM)),
+            ("user_ids", "ids.bin", ID_DTYPE, (capacity,)),
+            ("alive", "alive.u8", np.uint8, (capacity,)),
+            ("assignments", "assign.i32", np.int32, (capacity,)),
+        ]
+        for attr, name, dtype, shape in specs:
+            path = self._path(name)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            if not path.exists() or path.stat().st_size < size:
+                with open(path, "ab") as f:
+                    f.truncate(size)
+            setattr(self, attr, np.memmap(path, dtype=dtype, mode="r+", shape=shape))
+        self.capacity = capacity
+
+    def _grow(self, needed):
+        capacity = max(INITIAL_CAPACITY, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity != self.capacity:
+            if self.capacity:
+                self.vectors.flush()
+            self._open_arrays(capacity)
+            self._write_header(capacity=capacity)
+
+    # Estado em memória -----------------------------------------------------
+
+    def _refresh(self):
+        """Sincroniza o estado em memória com o que outros processos gravaram"""
+        header = self._read_header()
+        if header["capacity"] and header["capacity"] != self.capacity:
+            self._open_arrays(header["capacity"])
+
+        if header["trained_version"] != self.trained_version or not self._loaded:
+            self.trained_version = header["trained_version"]
+            centroids_path = self._path("centroids.npy")
+            self.centroids = np.load(centroids_path) if self.trained_version and centroids_path.exists() else None
+            self.count = 0
+            self._rows_by_user = {}
+            self._buckets = [[] for _ in range(len(self.centroids))] if self.centroids is not None else []
+            self._loaded = True
+
+        if header["count"] > self.count:
+            self._ingest_rows(self.count, header["count"])
+
+    def _ingest_rows(self, start, end):
+        """Incorpora as linhas [start, end) ao mapa de usuários e aos clusters"""
+        ids = self.user_ids[start:end]
+        alive = self.alive[start:end]
+        for offset, (user_id, is_alive) in enumerate(zip(ids, alive)):
+            if is_alive:
+                self._rows_by_user[user_id.decode()] = start + offset
+        if self.centroids is not None:
+            assignments = np.asarray(self.assignments[start:end])
+            order = np.argsort(assignments, kind="stable")
+            clusters, first = np.unique(assignments[order], return_index=True)
+            for cluster, rows in zip(clusters, np.split(order + start, first[1:])):
+                self._buckets[cluster].append(rows)
+        self.count = end
+
+    def _nearest_centroids(self, vectors, n):
+        # ||x - c||² = ||x||² - 2 x·c + ||c||² (o termo ||x||² não muda a ordem)
+        scores = (self.centroids ** 2).sum(axis=1) - 2 * vectors @ self.centroids.T
+        if n == 1:
+            return scores.argmin(axis=1)
+        if n >= scores.shape[1]:
+            return np.argsort(scores, axis=1)
+        return np.argpartition(scores, n, axis=1)[:, :n]
+
+    # Operações -------------------------------------------------------------
+
+    def add(self, user_id, vector):
+        """Adiciona ou substitui o encoding de um usuário"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(DIM)
+        with self._exclusive():
+            self._add_locked(user_id, vector)
+
+    def _add_locked(self, user_id, vector):
+        row = self._rows_by_user.get(user_id)
+        if row is not None and self.alive[row]:
+            # Mesmo usuário: sobrescreve na própria linha se o cluster não mudou
+            cluster = self._nearest_centroids(vector[None, :], 1)[0] if self.centroids is not None else 0
+            if self.centroids is None or cluster == self.assignments[row]:
+                self.vectors[row] = vector
+                self.vectors.flush()
+                return
+            self.alive[row] = 0
+        row = self.count
+        self._grow(row + 1)
+        self.vectors[row] = vector
+        self.user_ids[row] = user_id.encode()
+        self.alive[row] = 1
+        if self.centroids is not None:
+            self.assignments[row] = self._nearest_centroids(vector[None, :], 1)[0]
+        for array in (self.vectors, self.user_ids, self.alive, self.assignments):
+            array.flush()
+        self._write_header(count=row + 1)
+        self._ingest_rows(row, row + 1)
+
+    def add_many(self, user_ids, vectors):
+        """Carga em lote de usuários novos (backfill); não trata substituições"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, DIM)
+        with self._exclusive():
+            start = self.count
+            end = start + len(vectors)
+            self._grow(end)
+            self.vectors[start:end] = vectors
+            self.user_ids[start:end] = [user_id.encode() for user_id in user_ids]
+            self.alive[start:end] = 1
+            if self.centroids is not None:
+                for chunk in range(start, end, SCAN_CHUNK):
+                    stop = min(chunk + SCAN_CHUNK, end)
+                    self.assignments[chunk:stop] = self._nearest_centroids(vectors[chunk - start:stop - start], 1)
+            for array in (self.vectors, self.user_ids, self.alive, self.assignments):
+                array.flush()
+            self._write_header(count=end)
+            self._ingest_rows(start, end)
+
+    def remove(self, user_id):
+        """Remove o encoding de um usuário (a linha vira lápide)"""
+        with self._exclusive():
+            row = self._rows_by_user.pop(user_id, None)
+            if row is None:
+                return False
+            self.alive[row] = 0
+            self.alive.flush()
+            return True
+
+    def search(self, vector, k=5, max_distance=None, exclude_user=None):
+        """Retorna até k pares (user_id, distância) mais próximos do vetor"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(DIM)
+        with self._lock:
+            if self._read_header()["count"] != self.count or not self._loaded:
+                with self._exclusive():
+                    pass
+            return self._search_locked(vector, k, max_distance, exclude_user)
+
+    def _search_locked(self, vector, k, max_distance, exclude_user):
+        if self.count == 0:
+            return []
+        if self.centroids is None:
+            candidates = np.arange(self.count)
+        else:
+            probes = self._nearest_centroids(vector[None, :], self.nprobe)[0]
+            parts = [rows for cluster in probes for rows in self._buckets[cluster]]
+            if not parts:
+                return []
+            candidates = np.concatenate(parts)
+
+        # Re-ranking exato (em blocos para limitar a memória)
+        best_rows = []
+        best_distances = []
+        for start in range(0, len(candidates), SCAN_CHUNK):
+            rows = candidates[start:start + SCAN_CHUNK]
+            rows = rows[np.asarray(self.alive[rows]) == 1]
+            if not len(rows):
+                continue
+            distances = np.linalg.norm(np.asarray(self.vectors[rows]) - vector, axis=1)
+            best_rows.append(rows)
+            best_distances.append(distances)
+        if not best_rows:
+            return []
+        rows = np.concatenate(best_rows)
+        distances = np.concatenate(best_distances)
+        order = np.argsort(distances)[:k + 1]
+
+        results = []
+        for i in order:
+            user_id = self.user_ids[rows[i]].decode()
+            distance = float(distances[i])
+            if user_id == exclude_user:
+                continue
+            if max_distance is not None and distance > max_distance:
+                break
+            results.append((user_id, distance))
+        return results[:k]
+
+    def find_duplicates(self, vector, user_id, threshold=FACE_DUPLICATE_THRESHOLD, k=5):
+        """Outros usuários cujo rosto está a menos de threshold deste vetor"""
+        return self.search(vector, k=k, max_distance=threshold, exclude_user=user_id)
+
+    def check_and_add(self, user_id, vector, threshold=FACE_DUPLICATE_THRESHOLD, k=5):
+        """find_duplicates seguido de add sob o mesmo lock entre processos"""
+        vector = np.asarray(vector, dtype=np.float32).reshape(DIM)
+        with self._exclusive():
+            duplicates = self._search_locked(vector, k, threshold, user_id)
+            self._add_locked(user_id, vector)
+            return duplicates
+
+    # Treinamento -----------------------------------------------------------
+
+    def needs_training(self):
+        """Se há vetores para treinar os clusters e a base dobrou desde o último treino"""
+        with self._lock:
+            alive = len(self._rows_by_user)
+            if alive < self.nlist * MIN_POINTS_PER_CLUSTER:
+                return False
+            return self.centroids is None or alive >= 2 * self._read_header().get("trained_count", 0)
+
+    def maybe_train(self):
+        """Treina se needs_training() (conferido de novo sob o lock); retorna se treinou"""
+        with self._exclusive():
+            if not self.needs_training():
+                return False
+            self._train()
+            return True
+
+    def _train(self):
+        """k-means sobre uma amostra e reatribuição de todas as linhas aos clusters"""
+        alive_rows = np.flatnonzero(np.asarray(self.alive[:self.count]) == 1)
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(alive_rows, min(len(alive_rows), TRAIN_SAMPLE_SIZE), replace=False))
+        data = np.asarray(self.vectors[sample])
+        nlist = min(self.nlist, len(data))
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            self.centroids = centroids
+            labels = self._nearest_centroids(data, 1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=nlist)[:, None]
+            centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids).astype(np.float32)
+        self.centroids = centroids
+
+        for start in range(0, self.count, SCAN_CHUNK):
+            end = min(start + SCAN_CHUNK, self.count)
+            self.assignments[start:end] = self._nearest_centroids(np.asarray(self.vectors[start:end]), 1)
+        self.assignments.flush()
+
+        tmp = self._path("centroids.tmp.npy")
+        np.save(tmp, centroids)
+        os.replace(tmp, self._path("centroids.npy"))
+        self._write_header(trained_version=self.trained_version + 1, trained_count=len(alive_rows))
+        self._loaded = False
+        self._refresh()
+
+    def train(self):
+        with self._exclusive():
+            if self._rows_by_user:
+                self._train()
+
+    def stats(self):
+        with self._exclusive():
+            return {
+                "rows": self.count,
+                "users": len(self._rows_by_user),
+                "capacity": self.capacity,
+                "trained": self.centroids is not None,
+                "clusters": 0 if self.centroids is None else len(self.centroids),
+                "nprobe": self.nprobe,
+            }
+
+face_index = FaceIndex()
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        print(face_index.stats())
+    elif command == "remove":
+        print(face_index.remove(sys.argv[2]))
+    elif command == "train":
+        face_index.train()
+        print(face_index.stats())
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+
+from services.batching import MicroBatcher
+
+# Distância euclidiana máxima entre os encodings para considerar a mesma pessoa
+# (0.6 é o valor de referência do face_recognition; menor = mais rigoroso)
+FACE_MATCH_THRESHOLD = float(os.getenv("FACE_MATCH_THRESHOLD", "0.6"))
+# Maior lado da imagem antes da detecção: o custo do HOG cresce com a área
+FACE_MAX_IMAGE_SIDE = int(os.getenv("FACE_MAX_IMAGE_SIDE", "800"))
+FACE_DETECTION_MODEL = os.getenv("FACE_DETECTION_MODEL", "hog")  # "hog" (CPU) ou "cnn"
+FACE_UPSAMPLE = int(os.getenv("FACE_UPSAMPLE", "1"))
+FACE_BATCH_SIZE = int(os.getenv("FACE_BATCH_SIZE", "16"))
+FACE_BATCH_WAIT_MS = float(os.getenv("FACE_BATCH_WAIT_MS", "10"))
+
+class FaceMatchEngine:
+    """Compara o rosto do documento com a selfie
+
+    O detector e o encoder do dlib são carregados uma única vez por processo,
+    no primeiro uso. Verificações concorrentes são agrupadas pelo
+    MicroBatcher e as distâncias do lote são calculadas de uma vez com NumPy.
+    """
+
+    def __init__(self, threshold=FACE_MATCH_THRESHOLD, max_image_side=FACE_MAX_IMAGE_SIDE,
+                 model=FACE_DETECTION_MODEL, upsample=FACE_UPSAMPLE,
+                 batch_size=FACE_BATCH_SIZE, batch_wait_ms=FACE_BATCH_WAIT_MS):
+        self.threshold = threshold
+        self.max_image_side = max_image_side
+        self.model = model
+        self.upsample = upsample
+        self._face_recognition = None
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(self.process_batch, batch_size, batch_wait_ms, name="face-match")
+
+    def load(self):
+        """Importa o face_recognition (carrega os modelos do dlib) uma única vez"""
+        with self._lock:
+            if self._face_recognition is None:
+                import face_recognition
+                self._face_recognition = face_recognition
+        return self._face_recognition
+
+    @property
+    def loaded(self):
+        return self._face_recognition is not None
+
+    def load_image(self, data):
+        """Decodifica e reduz a imagem para no máximo max_image_side pixels no maior lado"""
+        import numpy as np
+        from PIL import Image, ImageOps
+
+        image = Image.open(io.BytesIO(data))
+        # Em JPEGs, draft() decodifica já em escala reduzida (bem mais barato)
+        image.draft("RGB", (self.max_image_side, self.max_image_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((self.max_image_side, self.max_image_side))
+        return np.asarray(image)
+
+    def encode(self, data):
+        """Encoding (128 floats) do maior rosto da imagem, ou None se nenhum rosto for achado"""
+        face_recognition = self.load()
+        image = self.load_image(data)
+        locations = face_recognition.face_locations(
+            image, number_of_times_to_upsample=self.upsample, model=self.model
+        )
+        if not locations:
+            return None
+        # (top, right, bottom, left): usa o maior rosto encontrado
+        largest = max(locations, key=lambda l: (l[2] - l[0]) * (l[1] - l[3]))
+        return face_recognition.face_encodings(image, [largest])[0]
+
+    def process_batch(self, items):
+        """Processa um lote de (bytes_documento, bytes_selfie, limiar)"""
+        import numpy as np
+
+        # Falha ao carregar o modelo afeta o lote inteiro; erro em uma imagem, só o item dela
+        self.load()
+        encodings = []
+        errors = {}
+        for i, (document_bytes, selfie_bytes, _) in enumerate(items):
+            try:
+                encodings.append((self.encode(document_bytes), self.encode(selfie_bytes)))
+            except Exception as e:
+                # Imagem truncada ou corrompida (o blob store só confere a assinatura)
+                encodings.append((None, None))
+                errors[i] = f"Imagem inválida: {type(e).__name__}: {e}"
+
+        results = []
+        valid = []
+        for i, (document_encoding, selfie_encoding) in enumerate(encodings):
+            if i in errors:
+                results.append({
+                    "match": False, "distance": None, "threshold": items[i][2],
+                    "reason": errors[i], "invalid_image": True,
+                })
+            elif document_encoding is None or selfie_encoding is None:
+                reason = "Nenhum rosto encontrado no documento" if document_encoding is None \
+                    else "Nenhum rosto encontrado na selfie"
+                results.append({"match": False, "distance": None, "threshold": items[i][2], "reason": reason})
+            else:
+                results.append(None)
+                valid.append(i)
+
+        if valid:
+            documents = np.stack([encodings[i][0] for i in valid])
+            selfies = np.stack([encodings[i][1] for i in valid])
+            distances = np.linalg.norm(documents - selfies, axis=1)
+            for j, (i, distance) in enumerate(zip(valid, distances)):
+                threshold = items[i][2]
+                results[i] = {
+                    "match": bool(distance <= threshold),
+                    "distance": float(distance),
+                    "threshold": threshold,
+                    # Usado na detecção de contas duplicadas (não é persistido)
+                    "selfie_encoding": selfies[j],
+                }
+        return results
+
+    async def verify(self, document_bytes, selfie_bytes, threshold=None):
+        return await self.batcher.submit((document_bytes, selfie_bytes, threshold or self.threshold))
+
+face_match_engine = FaceMatchEngine()
@@ -0,0 +1,202 @@
+"""Pontuação e segmentação de fãs, mantida de forma incremental
+
+A coleção fan_scores guarda, por usuário, o valor (0 a 1) de cada
+componente da pontuação e o total ponderado (0 a 100) com o segmento.
+Cada escrita nas coleções de origem chama refresh() para o componente
+afetado, que relê só os documentos daquele usuário naquela coleção. O
+total é recalculado no próprio MongoDB, na mesma atualização, a partir dos
+componentes gravados, então componentes diferentes atualizados ao mesmo
+tempo não se sobrescrevem.
+
+Dois refreshes do mesmo componente (ex.: a rota de verificação e o job do
+worker) podem terminar fora de ordem: cada valor é gravado com o instante
+em que a leitura das origens começou (components_at) e só substitui um
+valor lido antes dele. O valor calculado a partir da leitura mais recente
+prevalece. Os instantes vêm do relógio de cada processo: API e worker
+precisam de relógios sincronizados (NTP), e uma diferença entre eles vira
+a janela em que a ordem não é garantida.
+
+As rotas não esperam o refresh: refresh_in_background() o executa depois
+da resposta e invalida o painel em cache ao terminar. A pontuação do
+painel fica defasada por um instante depois de cada escrita. Se o processo
+cair nesse intervalo, ela só se corrige na próxima escrita do usuário ou na
+reconstrução completa. O lifespan da API espera os refreshes pendentes
+antes de encerrar (drain).
+
+Reconstrução completa (backfill, mudança de pesos):
+    cd backend && python -m services.fan_scores
+"""
+from collections import defaultdict
+from datetime import datetime
+import asyncio
+import os
+
+from pymongo import UpdateOne
+
+from services.read_cache import read_cache
+
+FAN_SCORE_BATCH_SIZE = int(os.getenv("FAN_SCORE_BATCH_SIZE", "500"))
+
+# Componentes ainda sem leitura registrada
+EPOCH = datetime(1970, 1, 1)
+
+# Refreshes disparados pelas rotas e ainda em andamento
+_pending = set()
+
+# Peso de cada componente no total (somam 1)
+WEIGHTS = {
+    "profile": 0.3,
+    "documents": 0.25,
+    "social": 0.25,
+    "esports": 0.2,
+}
+
+# Segmentos por pontuação mínima, do maior para o menor
+SEGMENTS = [
+    (75, "superfa"),
+    (40, "engajado"),
+    (0, "casual"),
+]
+
+# Campos do perfil considerados na completude
+PROFILE_FIELDS = ["full_name", "cpf", "interests", "furia_fan_since", "attended_events", "purchases"]
+ADDRESS_FIELDS = ["street", "number", "neighborhood", "city", "state", "zipcode"]
+
+def profile_component(profiles):
+    if not profiles:
+        return 0.0
+    profile = profiles[0]
+    address = profile.get("address") or {}
+    filled = sum(1 for field in PROFILE_FIELDS if profile.get(field))
+    filled += sum(1 for field in ADDRESS_FIELDS if address.get(field))
+    return round(filled / (len(PROFILE_FIELDS) + len(ADDRESS_FIELDS)), 3)
+
+def documents_component(documents):
+    # Documento verificado vale 0.6; com a selfie conferida, 1
+    best = 0.0
+    for document in documents:
+        if document.get("verification_status") == "verified":
+            best = max(best, 1.0 if document.get("face_match_status") == "matched" else 0.6)
+    return best
+
+def social_component(accounts):
+    # Conta mais relevante para a FURIA
+    return max((account.get("relevance_score") or 0.0 for account in accounts), default=0.0)
+
+def esports_component(profiles):
+    # Perfil verificado vale 1; apenas vinculado, 0.5
+    if not profiles:
+        return 0.0
+    return 1.0 if any(profile.get("verified") for profile in profiles) else 0.5
+
+# Componente -> (coleção de origem, campos lidos, função de cálculo)
+COMPONENTS = {
+    "profile": ("profiles", PROFILE_FIELDS + ["address"], profile_component),
+    "documents": ("documents", ["verification_status", "face_match_status"], documents_component),
+    "social": ("social_accounts", ["relevance_score"], social_component),
+    "esports": ("esports_profiles", ["verified"], esports_component),
+}
+
+def _total_expression():
+    terms = [
+        {"$multiply": [weight, {"$ifNull": [f"$components.{name}", 0]}]}
+        for name, weight in WEIGHTS.items()
+    ]
+    return {"$round": [{"$multiply": [100, {"$add": terms}]}, 1]}
+
+def _segment_expression():
+    return {"$switch": {
+        "branches": [{"case": {"$gte": ["$score", minimum]}, "then": name} for minimum, name in SEGMENTS[:-1]],
+        "default": SEGMENTS[-1][1],
+    }}
+
+def _score_update(values, read_at):
+    """Pipeline de atualização: grava componentes e recalcula total e segmento
+
+    Cada componente só é substituído se o valor gravado veio de uma leitura
+    anterior a read_at (um refresh atrasado não desfaz um mais novo).
+    """
+    fields = {}
+    for name, value in values.items():
+        read_before = {"$lte": [{"$ifNull": [f"$components_at.{name}", EPOCH]}, read_at]}
+        fields[f"components.{name}"] = {"$cond": [read_before, value, f"$components.{name}"]}
+        fields[f"components_at.{name}"] = {"$max": [{"$ifNull": [f"$components_at.{name}", EPOCH]}, read_at]}
+    return [
+        {"$set": {**fields, "updated_at": datetime.utcnow()}},
+        {"$set": {"score": _total_expression()}},
+        {"$set": {"segment": _segment_expression()}},
+    ]
+
+async def compute_components(db, user_ids, names):
+    """Calcula os componentes pedidos para vários usuários (uma consulta por coleção)"""
+    values = {user_id: {} for user_id in user_ids}
+    for name in names:
+        collection, fields, compute = COMPONENTS[name]
+        projection = {field: 1 for field in fields + ["user_id"]}
+        by_user = defaultdict(list)
+        async for doc in db[collection].find({"user_id": {"$in": list(user_ids)}}, projection):
+            by_user[doc["user_id"]].append(doc)
+        for user_id in user_ids:
+            values[user_id][name] = compute(by_user.get(user_id, []))
+    return values
+
+async def refresh_many(db, user_ids, *names):
+    """Recalcula os componentes informados (ou todos) dos usuários"""
+    user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+    if not user_ids:
+        return 0
+    # Marcado antes da leitura: uma leitura que começa depois vê estado mais novo
+    read_at = datetime.utcnow()
+    values = await compute_components(db, user_ids, names or list(COMPONENTS))
+    operations = [
+        UpdateOne({"_id": user_id}, _score_update(values[user_id], read_at), upsert=True)
+        for user_id in user_ids
+    ]
+    await db.fan_scores.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def refresh(db, user_id, *names):
+    """Gancho chamado pelos jobs depois de escrever nas coleções de origem"""
+    await refresh_many(db, [user_id], *names)
+
+async def _refresh_and_invalidate(db, user_id, names):
+    try:
+        await refresh(db, user_id, *names)
+        await read_cache.invalidate(user_id)
+    except Exception as e:
+        print(f"Erro ao atualizar a pontuação do fã {user_id}: {e}")
+
+def refresh_in_background(db, user_id, *names):
+    """Gancho das rotas: atualiza a pontuação sem atrasar a resposta da escrita"""
+    task = asyncio.create_task(_refresh_and_invalidate(db, user_id, names))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+async def drain():
+    """Espera os refreshes em andamento (encerramento da API)"""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+
+async def get_score(db, user_id):
+    return await db.fan_scores.find_one({"_id": user_id})
+
+async def rebuild(db, batch_size=FAN_SCORE_BATCH_SIZE):
+    """Recalcula a pontuação de todos os usuários, em lotes"""
+    total = 0
+    batch = []
+    async for user in db.users.find({}, {"_id": 1}).sort("_id", 1):
+        batch.append(str(user["_id"]))
+        if len(batch) >= batch_size:
+            total += await refresh_many(db, batch)
+            batch = []
+    total += await refresh_many(db, batch)
+    return total
+
+if __name__ == "__main__":
+    from database import db, close_database
+
+    async def main():
+        print(f"{await rebuild(db)} pontuações recalculadas")
+        close_database()
+
+    asyncio.run(main())
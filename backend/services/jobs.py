@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+import os
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from services.tracing import inject_context
+
+# Fila de jobs persistida no MongoDB (coleção "jobs")
+# Um job "queued" fica disponível a partir de available_at; ao ser reservado
+# passa a "running" com um lease (visibility timeout). Se o worker morrer, o
+# lease expira e o job volta a ser reservável por outro worker.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Handlers registrados por tipo de job: async def handler(db, payload) -> dict
+HANDLERS = {}
+
+def job_handler(kind):
+    """Decorator que registra o handler de um tipo de job"""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+async def enqueue(db, kind, payload, max_attempts=JOB_MAX_ATTEMPTS, delay_seconds=0, job_id=None):
+    """Enfileira um job e retorna seu id (string)
+    
+    job_id permite gerar o ObjectId antes, para gravá-lo junto do recurso
+    que o job processa sem uma escrita extra
+    """
+    now = datetime.utcnow()
+    job = {
+        "_id": job_id or ObjectId(),
+        "kind": kind,
+        "payload": payload,
+        "status": STATUS_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "created_at": now,
+        "available_at": now + timedelta(seconds=delay_seconds),
+    }
+    # O worker continua o trace da requisição que enfileirou o job
+    trace_context = inject_context()
+    if trace_context:
+        job["trace_context"] = trace_context
+    result = await db.jobs.insert_one(job)
+    return str(result.inserted_id)
+
+async def claim(db, worker_id, kinds=None, lease_seconds=JOB_LEASE_SECONDS):
+    """Reserva atomicamente o próximo job disponível (ou com lease expirado)"""
+    now = datetime.utcnow()
+    query = {"$or": [
+        {"status": STATUS_QUEUED, "available_at": {"$lte": now}},
+        {"status": STATUS_RUNNING, "lease_until": {"$lt": now}},
+    ]}
+    if kinds:
+        query["kind"] = {"$in": list(kinds)}
+    return await db.jobs.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": STATUS_RUNNING,
+                "worker": worker_id,
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "started_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+def owned(job):
+    """Filtro que só casa enquanto o job ainda pertence a quem o reservou"""
+    return {"_id": job["_id"], "status": STATUS_RUNNING, "worker": job["worker"], "attempts": job["attempts"]}
+
+async def extend_lease(db, job, lease_seconds=JOB_LEASE_SECONDS):
+    """Renova o lease de um job longo; retorna False se o job foi perdido"""
+    result = await db.jobs.update_one(
+        owned(job),
+        {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+    )
+    return result.modified_count == 1
+
+async def complete(db, job, result=None):
+    await db.jobs.update_one(
+        owned(job),
+        {
+            "$set": {"status": STATUS_DONE, "finished_at": datetime.utcnow(), "result": result},
+            "$unset": {"lease_until": ""},
+        }
+    )
+
+async def fail(db, job, error):
+    """Registra a falha; reagenda com backoff exponencial até max_attempts"""
+    now = datetime.utcnow()
+    if job["attempts"] >= job["max_attempts"]:
+        update = {"status": STATUS_FAILED, "finished_at": now, "last_error": error}
+    else:
+        delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+        update = {
+            "status": STATUS_QUEUED,
+            "available_at": now + timedelta(seconds=delay),
+            "last_error": error,
+        }
+    await db.jobs.update_one(owned(job), {"$set": update, "$unset": {"lease_until": ""}})
+
+async def get_job(db, job_id):
+    if not ObjectId.is_valid(job_id):
+        return None
+    return await db.jobs.find_one({"_id": ObjectId(job_id)}, {"payload": 0})
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def queue_stats(db, window_seconds=300):
+    """Profundidade da fila por status, latência e vazão dos jobs recentes"""
+    depth = {STATUS_QUEUED: 0, STATUS_RUNNING: 0}
+    now = datetime.utcnow()
+    async for row in db.jobs.aggregate([
+        {"$match": {"status": {"$in": [STATUS_QUEUED, STATUS_RUNNING]}}},
+        {"$group": {"_id": {"status": "$status", "kind": "$kind"}, "count": {"$sum": 1}}},
+    ]):
+        depth[row["_id"]["status"]] += row["count"]
+        depth.setdefault("by_kind", {}).setdefault(row["_id"]["kind"], {})[row["_id"]["status"]] = row["count"]
+    ready = await db.jobs.count_documents({"status": STATUS_QUEUED, "available_at": {"$lte": now}})
+
+    since = now - timedelta(seconds=window_seconds)
+    recent = await db.jobs.find(
+        {"finished_at": {"$gte": since}},
+        {"status": 1, "created_at": 1, "started_at": 1, "finished_at": 1}
+    ).limit(10000).to_list(length=None)
+
+    total_ms = [(job["finished_at"] - job["created_at"]).total_seconds() * 1000 for job in recent]
+    run_ms = [(job["finished_at"] - job["started_at"]).total_seconds() * 1000 for job in recent]
+    failed = sum(1 for job in recent if job["status"] == STATUS_FAILED)
+
+    return {
+        "depth": depth,
+        "ready": ready,
+        "window_seconds": window_seconds,
+        "finished": len(recent),
+        "failed": failed,
+        "throughput_per_second": len(recent) / window_seconds,
+        "latency_ms": {
+            "p50": percentile(total_ms, 0.50),
+            "p95": percentile(total_ms, 0.95),
+            "p99": percentile(total_ms, 0.99),
+        },
+        "run_time_ms": {
+            "p50": percentile(run_ms, 0.50),
+            "p95": percentile(run_ms, 0.95),
+        },
+    }
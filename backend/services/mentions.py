@@ -0,0 +1,221 @@
+"""Contagem de menções à FURIA em exportações de dados das redes sociais
+
+O fã envia o zip de exportação da plataforma (arquivo do Twitter/X,
+download de dados do Instagram...). Os arquivos de texto do zip são lidos
+em blocos direto do arquivo compactado, sem extrair nada para o disco, e
+passam por um autômato Aho-Corasick com todas as palavras-chave. A
+comparação ignora maiúsculas e acentos ("FÚRIA", "Furia" e "fúria" contam
+igual): o texto passa só por lower() e o autômato recebe as variantes
+acentuadas de cada palavra-chave, o que sai bem mais barato que remover os
+acentos do texto inteiro. A memória usada é constante, qualquer que seja o
+tamanho do arquivo.
+
+O autômato vem do pyahocorasick quando instalado; sem ele, uma
+implementação em Python puro (mais lenta) é usada.
+"""
+from collections import Counter
+import codecs
+import itertools
+import os
+import time
+import unicodedata
+import zipfile
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - depende do ambiente
+    ahocorasick = None
+
+MB = 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# Palavras-chave contadas (já sem acento; separadas por vírgula no env)
+MENTION_KEYWORDS = [
+    keyword.strip()
+    for keyword in os.getenv(
+        "MENTION_KEYWORDS",
+        "furia,furiagg,gofuria,diadefuria,furiacs,furiavalorant,"
+        "fallen,kscerato,yuurih,molodoy,yekindar,sidde"
+    ).split(",")
+    if keyword.strip()
+]
+
+# Máximo de letras acentuadas por variante de palavra-chave
+MENTION_MAX_ACCENTS = int(os.getenv("MENTION_MAX_ACCENTS", "2"))
+
+# Arquivos do zip que são analisados (dados das exportações são JSON/JS/HTML)
+TEXT_EXTENSIONS = (".js", ".json", ".html", ".htm", ".txt", ".csv")
+
+# Proteção contra zip bombs: total descompactado lido por arquivo enviado
+MAX_ARCHIVE_UNCOMPRESSED_BYTES = int(os.getenv("MAX_ARCHIVE_UNCOMPRESSED_MB", "4096")) * MB
+
+class ArchiveTooLarge(Exception):
+    pass
+
+def _build_fold_table():
+    # Letras acentuadas -> letra base ASCII, um caractere por caractere
+    table = {}
+    for code in range(0x80, 0x250):
+        decomposed = unicodedata.normalize("NFKD", chr(code))
+        if decomposed[0].isascii() and decomposed[0].isalpha():
+            table[code] = decomposed[0].lower()
+    return table
+
+FOLD_TABLE = _build_fold_table()
+
+# Letra base -> letras minúsculas acentuadas do Latin-1 (português incluso)
+ACCENTED_LETTERS = {}
+for _code, _base in FOLD_TABLE.items():
+    if _code < 0x100 and chr(_code).islower():
+        ACCENTED_LETTERS.setdefault(_base, []).append(chr(_code))
+
+def fold(text):
+    """Minúsculas e sem acentos ("FÚRIA" -> "furia")"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return text.translate(FOLD_TABLE)
+
+def keyword_variants(keyword, max_accents=MENTION_MAX_ACCENTS):
+    """Formas minúsculas da palavra-chave com até max_accents letras acentuadas"""
+    keyword = fold(keyword)
+    variants = {keyword}
+    positions = [i for i, char in enumerate(keyword) if char in ACCENTED_LETTERS]
+    for count in range(1, max_accents + 1):
+        for chosen in itertools.combinations(positions, count):
+            for letters in itertools.product(*(ACCENTED_LETTERS[keyword[i]] for i in chosen)):
+                chars = list(keyword)
+                for i, letter in zip(chosen, letters):
+                    chars[i] = letter
+                variants.add("".join(chars))
+    return variants
+
+class PythonAutomaton:
+    """Aho-Corasick em Python puro, com a mesma interface usada do pyahocorasick"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+    def add_word(self, word, value):
+        state = 0
+        for char in word:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append(value)
+
+    def make_automaton(self):
+        # Links de falha em largura: cada estado herda as saídas do seu link
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter(self, text):
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield index, value
+
+def build_automaton(keywords=MENTION_KEYWORDS, native=True):
+    automaton = ahocorasick.Automaton() if native and ahocorasick else PythonAutomaton()
+    for keyword in keywords:
+        folded = fold(keyword)
+        for variant in keyword_variants(folded):
+            automaton.add_word(variant, (folded, len(variant)))
+    automaton.make_automaton()
+    return automaton
+
+class MentionScanner:
+    """Conta palavras-chave em um texto (já em minúsculas) recebido em pedaços
+
+    Uma menção só conta como palavra inteira (sem letra ou número colado
+    antes ou depois): "#GoFURIA" e "@furia" contam, "furiagg" conta só como
+    furiagg. O fim de cada pedaço fica guardado para achar menções que
+    atravessam dois blocos.
+    """
+
+    def __init__(self, automaton, counts, max_keyword_length):
+        self.automaton = automaton
+        self.counts = counts
+        # Palavra mais longa + 1 caractere para checar a fronteira à esquerda
+        self.keep = max_keyword_length + 1
+        self._tail = ""
+        self._counted = 0
+
+    def feed(self, text, final=False):
+        buffer = self._tail + text
+        size = len(buffer)
+        counts = self.counts
+        start = self._counted
+        # Sem o próximo caractere não dá para checar a fronteira à direita
+        stop = size if final else size - 1
+        for end, (keyword, length) in self.automaton.iter(buffer):
+            if end < start or end >= stop:
+                continue
+            begin = end - length + 1
+            if begin > 0 and buffer[begin - 1].isalnum():
+                continue
+            if end + 1 < size and buffer[end + 1].isalnum():
+                continue
+            counts[keyword] += 1
+        keep_from = max(0, stop - self.keep)
+        self._tail = buffer[keep_from:]
+        self._counted = stop - keep_from
+
+def scan_archive(fileobj, keywords=MENTION_KEYWORDS, automaton=None,
+                 max_uncompressed=MAX_ARCHIVE_UNCOMPRESSED_BYTES):
+    """Conta as menções nos arquivos de texto de um zip (objeto de arquivo com seek)
+
+    Levanta zipfile.BadZipFile para arquivos que não são zip e
+    ArchiveTooLarge se o conteúdo descompactado passar do limite.
+    """
+    automaton = automaton or build_automaton(keywords)
+    max_length = max(len(fold(keyword)) for keyword in keywords)
+    counts = Counter()
+    files_scanned = 0
+    bytes_scanned = 0
+    start = time.perf_counter()
+
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(TEXT_EXTENSIONS):
+                continue
+            scanner = MentionScanner(automaton, counts, max_length)
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            with archive.open(info) as member:
+                while True:
+                    chunk = member.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    bytes_scanned += len(chunk)
+                    if bytes_scanned > max_uncompressed:
+                        raise ArchiveTooLarge(max_uncompressed)
+                    scanner.feed(decoder.decode(chunk).lower())
+            scanner.feed(decoder.decode(b"", final=True).lower(), final=True)
+            files_scanned += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        "total": sum(counts.values()),
+        "keywords": {keyword: counts[keyword] for keyword in sorted(counts)},
+        "files_scanned": files_scanned,
+        "bytes_scanned": bytes_scanned,
+        "scan_seconds": round(elapsed, 3),
+        "mb_per_second": round(bytes_scanned / MB / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,200 @@
+"""Métricas operacionais da API no formato do Prometheus (GET /metrics)
+
+- latência das requisições por router, rota (o modelo do caminho, não o
+  caminho em si), método e status, e requisições em andamento
+- duração dos comandos do MongoDB por coleção e operação (listener de
+  monitoramento de comandos do pymongo)
+- espera para obter uma conexão do pool do MongoDB
+- atraso do event loop (quanto um sleep curto demora além do pedido)
+- bytes recebidos em uploads (a taxa vem de rate() no Prometheus)
+
+No caminho de cada requisição o custo é um perf_counter, um dicionário de
+séries já criadas e um observe(); benchmarks/metrics_overhead.py mede.
+Com vários workers do gunicorn, gunicorn.conf.py define
+PROMETHEUS_MULTIPROC_DIR antes do import: cada processo grava os seus
+valores em arquivos nesse diretório e /metrics soma os de todos os workers
+(modo multiprocess do prometheus_client).
+"""
+import asyncio
+import os
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+
+# Buckets das latências HTTP (segundos): do cache em memória ao upload grande
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_BUCKETS = (0.0002, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP",
+    ["router", "route", "method", "status"], buckets=HTTP_BUCKETS,
+)
+# Com vários processos: soma dos workers vivos
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento", multiprocess_mode="livesum",
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "Duração dos comandos do MongoDB",
+    ["collection", "command", "outcome"], buckets=MONGO_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool do MongoDB",
+    buckets=MONGO_BUCKETS,
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total", "Falhas ao obter conexão do pool", ["reason"],
+)
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "Atraso do event loop", buckets=LAG_BUCKETS)
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes recebidos em uploads", ["file_type"])
+
+# Rotas sem correspondência (404) ficam agrupadas para não criar uma série por caminho
+UNMATCHED_ROUTE = "desconhecida"
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada requisição HTTP"""
+
+    def __init__(self, app, enabled=METRICS_ENABLED):
+        self.app = app
+        self.enabled = enabled
+        self._series = {}
+
+    def _observe(self, scope, status, elapsed):
+        route = scope.get("route")
+        path = getattr(route, "path", UNMATCHED_ROUTE)
+        key = (path, scope["method"], status)
+        series = self._series.get(key)
+        if series is None:
+            tags = getattr(route, "tags", None)
+            router = tags[0] if tags else "-"
+            series = self._series[key] = HTTP_REQUEST_DURATION.labels(router, path, scope["method"], str(status))
+        series.observe(elapsed)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            self._observe(scope, status, time.perf_counter() - start)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Duração de cada comando por coleção/operação
+
+    Os eventos chegam nas threads do pymongo (Motor); o started guarda a
+    coleção do comando até o succeeded/failed correspondente.
+    """
+
+    def __init__(self):
+        self._collections = {}
+        self._series = {}
+
+    def _observe(self, event, outcome):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        key = (collection, event.command_name, outcome)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = MONGO_COMMAND_DURATION.labels(collection, event.command_name, outcome)
+        series.observe(event.duration_micros / 1e6)
+
+    def started(self, event):
+        # getMore traz o id do cursor no lugar do nome da coleção
+        key = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(key)
+        self._collections[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "-"
+        )
+
+    def succeeded(self, event):
+        self._observe(event, "ok")
+
+    def failed(self, event):
+        self._observe(event, "erro")
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Espera do check-out de conexões (início e fim ocorrem na mesma thread)"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        MONGO_POOL_CHECKOUT_FAILURES.labels(event.reason).inc()
+
+    # Demais eventos do pool não são medidos
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+def mongo_event_listeners():
+    """Listeners para o cliente do MongoDB (vazio com as métricas desligadas)"""
+    if not METRICS_ENABLED:
+        return []
+    return [MongoCommandListener(), MongoPoolListener()]
+
+async def monitor_event_loop_lag(interval=LOOP_LAG_INTERVAL_SECONDS):
+    """Loop em background: mede quanto o sleep passou do intervalo pedido"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - start - interval))
+
+def record_upload(file_type, size):
+    UPLOAD_BYTES.labels(file_type).inc(size)
+
+def render():
+    """Texto no formato de exposição do Prometheus"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Agrega os arquivos de todos os workers, não só os deste processo
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
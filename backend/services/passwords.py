@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+import asyncio
+import os
+
+# Configuração do hashing de senhas
+# PASSWORD_HASH_SCHEME: "bcrypt" ou "argon2" (o outro continua aceito para logins antigos)
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # em KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+
+# Pool de threads: bcrypt e argon2 liberam o GIL durante o cálculo do hash,
+# então threads aproveitam todos os núcleos sem o custo de serializar para processos
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(
+    os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8))
+)
+
+class HasherSaturated(Exception):
+    """Fila de hashing cheia: a requisição deve ser recusada (503)"""
+
+def build_context(scheme=PASSWORD_HASH_SCHEME, bcrypt_rounds=BCRYPT_ROUNDS,
+                  argon2_time_cost=ARGON2_TIME_COST, argon2_memory_cost=ARGON2_MEMORY_COST,
+                  argon2_parallelism=ARGON2_PARALLELISM):
+    """Cria o CryptContext com o algoritmo e custo configurados
+
+    Hashes gerados com outro algoritmo ou outro custo são marcados como
+    desatualizados, o que dispara o rehash transparente no login.
+    """
+    schemes = ["bcrypt", "argon2"]
+    if scheme not in schemes:
+        raise ValueError(f"Algoritmo de hash não suportado: {scheme}")
+    schemes.remove(scheme)
+    return CryptContext(
+        schemes=[scheme] + schemes,
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+class PasswordHasher:
+    """Executa hash/verificação de senhas fora do event loop, com controle de admissão"""
+
+    def __init__(self, context, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING):
+        self.context = context
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-hash")
+        self._pending = 0
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def _submit(self, fn, *args):
+        # O contador só é alterado no event loop, então não precisa de lock
+        if self._pending >= self.max_pending:
+            raise HasherSaturated()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password):
+        return await self._submit(self.context.hash, password)
+
+    async def verify_and_update(self, password, hashed):
+        """Retorna (senha_valida, novo_hash); novo_hash é None se o hash atual está em dia"""
+        return await self._submit(self.context.verify_and_update, password, hashed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+password_hasher = PasswordHasher(build_context())
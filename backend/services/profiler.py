@@ -0,0 +1,394 @@
+"""Profiler por amostragem sob demanda para processos da API em produção
+
+Uma thread amostra as pilhas de execução a cada intervalo, sem instrumentar
+o código. Dois modos:
+  - "worker": todas as threads do processo durante N segundos (event loop,
+    pool de threads, hashing de senhas...)
+  - "requests": 1 a cada N requisições cujo caminho casa com um prefixo. A
+    cada intervalo, cada requisição sorteada em andamento entra na amostra:
+    com a pilha real da thread do event loop quando é a task rodando, ou com
+    a cadeia de awaits (e a folha "(aguardando)") quando está suspensa. O
+    resultado é um perfil de tempo de parede das requisições sorteadas
+    (trabalho feito em threads via to_thread aparece só no modo "worker").
+
+Desligado, o custo por requisição é uma checagem de atributo no middleware.
+O resultado sai em pilhas colapsadas (flamegraph.pl, speedscope) ou no JSON
+do speedscope.
+
+Cada processo da API tem o seu profiler: a sessão roda no processo que
+recebeu a requisição de início (o pid vem no status) e, no modo "requests",
+só sorteia as requisições atendidas por ele. Para que status, stop e result
+funcionem com vários workers do gunicorn (que recebem as requisições em
+qualquer ordem), a sessão grava o seu estado e as pilhas em PROFILER_DIR a
+cada PROFILER_SAVE_SECONDS; os outros workers leem esse arquivo e pedem a
+parada criando um arquivo de parada que a thread de amostragem confere.
+PROFILER_DIR precisa ser o mesmo para todos os workers (mesmo host ou volume).
+"""
+from collections import Counter
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "120"))
+PROFILER_MIN_INTERVAL_MS = 1.0
+PROFILER_DIR = os.getenv("PROFILER_DIR", os.path.join(tempfile.gettempdir(), "furia-kyf-profiler"))
+PROFILER_SAVE_SECONDS = float(os.getenv("PROFILER_SAVE_SECONDS", "1"))
+# Sessões antigas mantidas em PROFILER_DIR
+PROFILER_KEEP_SESSIONS = int(os.getenv("PROFILER_KEEP_SESSIONS", "20"))
+
+SESSION_ID = re.compile(r"^[0-9a-f]{12}$")
+
+MODES = ("worker", "requests")
+
+# Caminhos exibidos a partir da raiz do backend
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+class ProfilerBusy(Exception):
+    """Já existe uma sessão de profiling em andamento neste processo"""
+
+def frame_label(code):
+    filename = code.co_filename
+    if filename.startswith(BACKEND_DIR):
+        filename = filename[len(BACKEND_DIR):]
+    else:
+        # Bibliotecas: a partir de site-packages (ou só o nome do arquivo)
+        marker = filename.rfind("site-packages" + os.sep)
+        filename = filename[marker + 14:] if marker >= 0 else os.path.basename(filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
+
+def thread_stack(frame):
+    """Pilha da raiz até a folha a partir do frame atual de uma thread"""
+    stack = []
+    while frame is not None:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def awaiting_stack(coro):
+    """Cadeia de awaits de uma corrotina suspensa, de fora para dentro"""
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        stack.append(frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    stack.append("(aguardando)")
+    return stack
+
+def session_path(session_id, suffix=".json", directory=PROFILER_DIR):
+    return os.path.join(directory, session_id + suffix)
+
+class SessionResults:
+    """Exportação das pilhas (sessão em andamento neste processo ou gravada por outro)"""
+
+    def collapsed(self):
+        """Formato de pilhas colapsadas: "raiz;...;folha contagem" por linha"""
+        stacks = Counter(self.snapshot())
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+    def speedscope(self):
+        """Perfil no formato JSON do speedscope (tipo "sampled", pesos em ms)"""
+        frames = {}
+        samples = []
+        weights = []
+        for stack, count in self.snapshot().items():
+            samples.append([frames.setdefault(name, len(frames)) for name in stack])
+            weights.append(round(count * self.interval * 1000, 3))
+        total = sum(weights)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"furia-kyf {self.mode} {self.id}",
+            "exporter": "furia-kyf profiler",
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.mode} (pid {self.pid})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+class ProfileSession(SessionResults):
+    def __init__(self, mode, seconds, interval_ms, route=None, one_in=1, max_requests=None,
+                 directory=PROFILER_DIR):
+        self.id = uuid.uuid4().hex[:12]
+        self.pid = os.getpid()
+        self.directory = directory
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.route = route
+        self.one_in = max(1, one_in)
+        self.max_requests = max_requests
+        self.stacks = Counter()
+        self.samples = 0
+        self.seen_requests = 0
+        self.sampled_requests = 0
+        self.started_at = None
+        self.finished_at = None
+        self.tasks = {}
+        # Protege stacks entre a thread de amostragem e quem exporta
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop = None
+        self._loop_thread_id = None
+
+    @property
+    def running(self):
+        return self.started_at is not None and self.finished_at is None and not self._stop.is_set()
+
+    def status(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0
+        return {
+            "id": self.id,
+            "pid": self.pid,
+            "mode": self.mode,
+            "route": self.route,
+            "one_in": self.one_in,
+            "running": self.running,
+            "seconds": self.seconds,
+            "elapsed_seconds": round(elapsed, 2),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "seen_requests": self.seen_requests,
+            "sampled_requests": self.sampled_requests,
+        }
+
+    # Modo "requests": chamado pelo middleware na thread do event loop
+    def should_sample(self, path):
+        if not path.startswith(self.route):
+            return False
+        if self.max_requests is not None and self.sampled_requests >= self.max_requests:
+            return False
+        self.seen_requests += 1
+        if (self.seen_requests - 1) % self.one_in:
+            return False
+        self.sampled_requests += 1
+        return True
+
+    def _sample_threads(self, own_id):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            name = self._thread_names.get(thread_id)
+            if name is None:
+                self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+                name = self._thread_names.get(thread_id, str(thread_id))
+            stack = (f"[{name}]", *thread_stack(frame))
+            with self._lock:
+                self.stacks[stack] += 1
+
+    def _sample_requests(self):
+        if not self.tasks:
+            return
+        running = asyncio.current_task(self._loop)
+        loop_frame = None
+        for task, route in list(self.tasks.items()):
+            if task is running:
+                if loop_frame is None:
+                    loop_frame = sys._current_frames().get(self._loop_thread_id)
+                stack = thread_stack(loop_frame)
+            else:
+                stack = awaiting_stack(task.get_coro())
+            with self._lock:
+                self.stacks[(f"[{route}]", *stack)] += 1
+
+    def _run(self):
+        own_id = threading.get_ident()
+        self._thread_names = {}
+        deadline = time.perf_counter() + self.seconds
+        next_sample = next_save = time.perf_counter()
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            if self.mode == "worker":
+                self._sample_threads(own_id)
+            else:
+                self._sample_requests()
+            self.samples += 1
+            if time.perf_counter() >= next_save:
+                # Parada pedida por outro worker
+                if os.path.exists(session_path(self.id, ".stop", self.directory)):
+                    self._stop.set()
+                self.save()
+                next_save = time.perf_counter() + PROFILER_SAVE_SECONDS
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.perf_counter()))
+        self.finished_at = time.time()
+        self.save()
+
+    def start(self):
+        """Inicia a thread de amostragem (chamado dentro do event loop)"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.started_at = time.time()
+        self.save()
+        threading.Thread(target=self._run, name="profiler", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """Cópia das pilhas (a thread de amostragem continua inserindo)"""
+        with self._lock:
+            return dict(self.stacks)
+
+    def save(self):
+        """Grava status e pilhas em PROFILER_DIR para os outros workers"""
+        data = {
+            "status": self.status(),
+            "stacks": [[list(stack), count] for stack, count in self.snapshot().items()],
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = session_path(self.id, directory=self.directory)
+            with open(path + ".tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Erro ao gravar a sessão de profiling {self.id}: {e}")
+
+class StoredSession(SessionResults):
+    """Sessão gravada em PROFILER_DIR (possivelmente por outro worker)"""
+
+    def __init__(self, data):
+        self._status = data["status"]
+        self.id = self._status["id"]
+        self.pid = self._status["pid"]
+        self.mode = self._status["mode"]
+        self.interval = self._status["interval_ms"] / 1000
+        self.stacks = {tuple(stack): count for stack, count in data["stacks"]}
+
+    @property
+    def running(self):
+        return self._status["running"]
+
+    def status(self):
+        return self._status
+
+    def snapshot(self):
+        return self.stacks
+
+def latest_session_id(directory=PROFILER_DIR):
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith(".json")]
+    except FileNotFoundError:
+        return None
+    if not names:
+        return None
+    latest = max(names, key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    return latest[:-len(".json")]
+
+def load_session(session_id, directory=PROFILER_DIR):
+    try:
+        with open(session_path(session_id, directory=directory)) as f:
+            return StoredSession(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def prune_sessions(directory=PROFILER_DIR, keep=PROFILER_KEEP_SESSIONS):
+    """Remove os arquivos das sessões mais antigas"""
+    try:
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+    except FileNotFoundError:
+        return
+    sessions = sorted((p for p in paths if p.endswith(".json")), key=os.path.getmtime, reverse=True)
+    for path in sessions[keep:]:
+        for leftover in (path, path[:-len(".json")] + ".stop"):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+
+class Profiler:
+    """Sessão atual do processo (no máximo uma em andamento)"""
+
+    def __init__(self, directory=PROFILER_DIR):
+        self.directory = directory
+        self.session = None
+        # Sessão do modo "requests" em andamento; None mantém o middleware inerte
+        self.request_session = None
+
+    def start(self, mode, seconds, interval_ms, route=None, one_in=1, max_requests=None):
+        if self.session is not None and self.session.running:
+            raise ProfilerBusy(self.session.id)
+        session = ProfileSession(
+            mode, min(seconds, PROFILER_MAX_SECONDS), max(interval_ms, PROFILER_MIN_INTERVAL_MS),
+            route or "/", one_in, max_requests, self.directory,
+        )
+        prune_sessions(self.directory, PROFILER_KEEP_SESSIONS - 1)
+        session.start()
+        self.session = session
+        self.request_session = session if mode == "requests" else None
+        return session
+
+    def find(self, session_id=None):
+        """Sessão pelo id (por padrão, a mais recente de qualquer worker)
+
+        A sessão deste processo é usada ao vivo; a de outro worker, pelo
+        arquivo gravado por ele.
+        """
+        if session_id is None:
+            session_id = latest_session_id(self.directory)
+            if session_id is None:
+                return self.session
+        elif not SESSION_ID.match(session_id):
+            return None
+        if self.session is not None and self.session.id == session_id:
+            return self.session
+        return load_session(session_id, self.directory)
+
+    def stop(self, session=None):
+        session = session or self.session
+        if session is None:
+            return
+        if session is self.session:
+            session.stop()
+            self.request_session = None
+        else:
+            # Sessão de outro worker: a thread dele confere este arquivo
+            with open(session_path(session.id, ".stop", self.directory), "w"):
+                pass
+
+    def finished(self):
+        # Chamado pelo middleware: desarma quando a sessão acaba
+        if self.request_session is not None and not self.request_session.running:
+            self.request_session = None
+
+profiler = Profiler()
+
+class RequestProfilerMiddleware:
+    """Marca as requisições sorteadas para o modo "requests" do profiler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        session = profiler.request_session
+        if session is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not session.running:
+            profiler.finished()
+            await self.app(scope, receive, send)
+            return
+        if not session.should_sample(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        session.tasks[task] = f"{scope['method']} {scope['path']}"
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.tasks.pop(task, None)
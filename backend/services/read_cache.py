@@ -0,0 +1,272 @@
+"""Cache de leitura das rotas por usuário, com ETag/Last-Modified
+
+O Streamlit reexecuta a página a cada interação e repete as mesmas
+leituras. As respostas das rotas de leitura ficam em cache por (recurso,
+usuário) já serializadas em JSON, com um ETag (hash do corpo) e a data de
+geração. O cliente que reenvia If-None-Match/If-Modified-Since recebe 304
+sem corpo.
+
+As rotas de escrita (e os jobs do worker) chamam invalidate() para o
+recurso alterado; o painel do usuário é invalidado junto, porque mostra
+todos os recursos. Uma contagem de gerações por chave impede que uma
+leitura iniciada antes da invalidação grave dados antigos no cache.
+
+Por padrão o cache é local ao processo (LRU limitado por entradas e bytes,
+com TTL). Com READ_CACHE_REDIS_URL, as entradas ficam em um Redis (ou
+compatível) compartilhado por todos os processos da API e pelo worker, e
+as invalidações feitas no worker passam a valer para a API na hora; sem
+ele, o TTL limita o tempo em que uma alteração feita pelo worker fica
+invisível. Com vários processos da API (gunicorn.conf.py), o cache local é
+desligado: a invalidação só valeria para o processo que atendeu a escrita.
+"""
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+import hashlib
+import os
+import time
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+import orjson
+
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "1") == "1"
+READ_CACHE_TTL_SECONDS = int(os.getenv("READ_CACHE_TTL_SECONDS", "60"))
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+READ_CACHE_MAX_BYTES = int(os.getenv("READ_CACHE_MAX_MB", "64")) * 1024 * 1024
+READ_CACHE_REDIS_URL = os.getenv("READ_CACHE_REDIS_URL", "")
+
+# Recursos em cache (um por rota de leitura)
+RESOURCES = ("profile", "documents", "social", "esports", "dashboard")
+
+class CacheEntry:
+    """Corpo JSON de uma resposta com seus validadores"""
+
+    __slots__ = ("body", "etag", "last_modified", "expires_at")
+
+    def __init__(self, body, etag, last_modified, expires_at=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @classmethod
+    def build(cls, data):
+        """data: objeto serializável ou o corpo JSON já pronto (bytes)"""
+        body = data if isinstance(data, bytes) else orjson.dumps(data, default=jsonable_encoder)
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        return cls(body, etag, int(time.time()))
+
+    def pack(self):
+        return f"{self.etag} {self.last_modified}\n".encode() + self.body
+
+    @classmethod
+    def unpack(cls, raw):
+        header, body = raw.split(b"\n", 1)
+        etag, last_modified = header.decode().split(" ")
+        return cls(body, etag, int(last_modified))
+
+class LocalBackend:
+    """LRU em memória com TTL, limitado por número de entradas e bytes"""
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._generations = OrderedDict()
+        self.bytes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    async def get(self, key):
+        """Retorna (entrada ou None, geração atual da chave)"""
+        generation = self._generations.get(key, 0)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, generation
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None, generation
+        self._entries.move_to_end(key)
+        return entry, generation
+
+    async def put(self, key, generation, entry):
+        # Invalidada durante a leitura: não grava o resultado antigo
+        if self._generations.get(key, 0) != generation:
+            return
+        entry.expires_at = time.monotonic() + self.ttl
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += len(entry.body)
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def invalidate(self, keys):
+        for key in keys:
+            self._remove(key)
+            self._generations[key] = self._generations.pop(key, 0) + 1
+        while len(self._generations) > self.max_entries:
+            self._generations.popitem(last=False)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.body)
+
+    def stats(self):
+        return {"backend": "local", "entries": len(self._entries), "bytes": self.bytes, "evictions": self.evictions}
+
+# Grava a entrada só se a geração não mudou desde a leitura (atômico no Redis)
+PUT_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+class RedisBackend:
+    """Entradas em um Redis compartilhado; expiração pelo próprio Redis"""
+
+    def __init__(self, url, ttl):
+        import redis.asyncio as redis
+
+        self.ttl = ttl
+        self._redis = redis.from_url(url)
+        self._put_script = self._redis.register_script(PUT_IF_GENERATION)
+        self.errors = 0
+
+    @staticmethod
+    def _generation_key(key):
+        return f"{key}:gen"
+
+    async def get(self, key):
+        raw, generation = await self._redis.mget(key, self._generation_key(key))
+        entry = CacheEntry.unpack(raw) if raw is not None else None
+        return entry, int(generation or 0)
+
+    async def put(self, key, generation, entry):
+        await self._put_script(
+            keys=[key, self._generation_key(key)],
+            args=[generation, entry.pack(), self.ttl]
+        )
+
+    async def invalidate(self, keys):
+        pipeline = self._redis.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incr(self._generation_key(key))
+            pipeline.expire(self._generation_key(key), self.ttl * 2)
+            pipeline.delete(key)
+        await pipeline.execute()
+
+    def stats(self):
+        return {"backend": "redis", "errors": self.errors}
+
+class ReadCache:
+    def __init__(self, backend, enabled=READ_CACHE_ENABLED):
+        self.backend = backend
+        self.enabled = enabled
+        self._counters = {resource: {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+                          for resource in RESOURCES}
+
+    @staticmethod
+    def key(resource, user_id):
+        return f"kyf:{resource}:{user_id}"
+
+    async def _get(self, key):
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            # Cache compartilhado fora do ar: segue sem cache
+            self.backend.errors += 1
+            return None, None
+
+    async def _put(self, key, generation, entry):
+        try:
+            await self.backend.put(key, generation, entry)
+        except Exception:
+            self.backend.errors += 1
+
+    async def response(self, request, resource, user_id, load):
+        """Resposta JSON do recurso, do cache quando possível
+
+        load() busca os dados e pode retornar o corpo já serializado (bytes)
+        """
+        counters = self._counters[resource]
+        entry, generation = None, None
+        if self.enabled:
+            key = self.key(resource, user_id)
+            entry, generation = await self._get(key)
+        if entry is not None:
+            counters["hits"] += 1
+        else:
+            counters["misses"] += 1
+            entry = CacheEntry.build(await load())
+            if generation is not None:
+                await self._put(key, generation, entry)
+
+        headers = {
+            "ETag": entry.etag,
+            "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+            # O cliente pode guardar a resposta, mas deve revalidar sempre
+            "Cache-Control": "private, no-cache",
+        }
+        if not_modified(request, entry):
+            counters["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, user_id, *resources):
+        """Descarta os recursos do usuário (e o painel, que mostra todos)"""
+        resources = set(resources) | {"dashboard"}
+        for resource in resources:
+            self._counters[resource]["invalidations"] += 1
+        if self.enabled:
+            try:
+                await self.backend.invalidate([self.key(resource, user_id) for resource in resources])
+            except Exception:
+                self.backend.errors += 1
+
+    def stats(self):
+        hits = sum(c["hits"] for c in self._counters.values())
+        misses = sum(c["misses"] for c in self._counters.values())
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": READ_CACHE_TTL_SECONDS,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            "resources": self._counters,
+            **self.backend.stats(),
+        }
+
+def not_modified(request, entry):
+    """Avalia If-None-Match (prioritário) e If-Modified-Since
+    
+    Com If-None-Match presente, If-Modified-Since é ignorado (RFC 9110 13.2.2).
+    Last-Modified tem resolução de segundos: uma entrada gerada no segundo
+    corrente pode mudar de novo dentro dele, então só vale como validador
+    depois que esse segundo passou.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or entry.last_modified >= int(time.time()):
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # Datas HTTP são sempre GMT; formatos obsoletos chegam sem fuso
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return int(since.timestamp()) >= entry.last_modified
+
+def create_read_cache():
+    if READ_CACHE_REDIS_URL:
+        return ReadCache(RedisBackend(READ_CACHE_REDIS_URL, READ_CACHE_TTL_SECONDS))
+    return ReadCache(LocalBackend(READ_CACHE_TTL_SECONDS, READ_CACHE_MAX_ENTRIES, READ_CACHE_MAX_BYTES))
+
+read_cache = create_read_cache()
@@ -0,0 +1,145 @@
+import os
+import threading
+
+from services.batching import MicroBatcher
+
+# Modelo de embeddings usado na pontuação de relevância (qualquer encoder do
+# Hugging Face; o padrão é multilíngue e pequeno o suficiente para CPU)
+RELEVANCE_MODEL = os.getenv("RELEVANCE_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+# Versão gravada junto de cada score (mude ao trocar modelo ou âncoras)
+RELEVANCE_MODEL_VERSION = os.getenv("RELEVANCE_MODEL_VERSION", f"{RELEVANCE_MODEL}@1")
+# Quantização dinâmica int8 das camadas lineares (mais rápida em CPU)
+RELEVANCE_QUANTIZE = os.getenv("RELEVANCE_QUANTIZE", "1") == "1"
+RELEVANCE_TORCH_THREADS = int(os.getenv("RELEVANCE_TORCH_THREADS", "0"))  # 0 = padrão do torch
+RELEVANCE_MAX_LENGTH = int(os.getenv("RELEVANCE_MAX_LENGTH", "128"))
+RELEVANCE_BATCH_SIZE = int(os.getenv("RELEVANCE_BATCH_SIZE", "32"))
+RELEVANCE_BATCH_WAIT_MS = float(os.getenv("RELEVANCE_BATCH_WAIT_MS", "5"))
+
+# Faixas de comprimento (em tokens): textos de tamanho parecido vão juntos
+# no forward, evitando gastar CPU com padding
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+# Textos de referência: a relevância é a maior similaridade com eles
+ANCHOR_TEXTS = [
+    "FURIA Esports",
+    "Sou fã da FURIA",
+    "#GoFURIA #DIADEFURIA",
+    "FURIA CS2 Counter-Strike",
+    "FURIA Valorant",
+    "furiagg",
+]
+
+def account_text(account):
+    """Texto de uma conta social usado na pontuação"""
+    parts = [account.get("username", ""), account.get("profile_url", ""), account.get("platform", "")]
+    if account.get("bio"):
+        parts.append(account["bio"])
+    return " ".join(part for part in parts if part)
+
+class RelevanceScorer:
+    """Pontua a relevância de contas sociais para a FURIA (0 a 1)
+
+    O modelo é carregado uma única vez por processo, no primeiro uso.
+    Chamadas concorrentes são agrupadas pelo MicroBatcher em um único
+    forward; dentro do lote os textos são truncados e separados por faixa
+    de comprimento.
+    """
+
+    def __init__(self, model_name=RELEVANCE_MODEL, quantize=RELEVANCE_QUANTIZE,
+                 max_length=RELEVANCE_MAX_LENGTH, batch_size=RELEVANCE_BATCH_SIZE,
+                 batch_wait_ms=RELEVANCE_BATCH_WAIT_MS, version=RELEVANCE_MODEL_VERSION,
+                 torch_threads=RELEVANCE_TORCH_THREADS):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.max_length = max_length
+        self.version = version
+        self.torch_threads = torch_threads
+        self._tokenizer = None
+        self._model = None
+        self._anchors = None
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(self.score_batch, batch_size, batch_wait_ms, name="relevance")
+
+    def load(self):
+        """Carrega tokenizer, modelo (opcionalmente quantizado) e âncoras"""
+        with self._lock:
+            if self._model is not None:
+                return
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+
+            if self.torch_threads:
+                torch.set_num_threads(self.torch_threads)
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            model = AutoModel.from_pretrained(self.model_name)
+            model.eval()
+            if self.quantize:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self._tokenizer = tokenizer
+            self._model = model
+            self._anchors = self._embed(ANCHOR_TEXTS)
+
+    def set_torch_threads(self, threads):
+        """Threads do torch neste processo (aplicado na hora se o modelo já foi carregado)"""
+        self.torch_threads = threads
+        if self.loaded and threads:
+            import torch
+            torch.set_num_threads(threads)
+
+    @property
+    def loaded(self):
+        # As âncoras são a última etapa do load()
+        return self._anchors is not None
+
+    def _forward(self, encodings):
+        """Forward de um grupo já tokenizado; retorna embeddings normalizados"""
+        import torch
+
+        batch = self._tokenizer.pad(encodings, padding=True, return_tensors="pt")
+        with torch.inference_mode():
+            output = self._model(**batch).last_hidden_state
+        # Mean pooling considerando apenas os tokens reais
+        mask = batch["attention_mask"].unsqueeze(-1).to(output.dtype)
+        pooled = (output * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return torch.nn.functional.normalize(pooled, dim=1).numpy()
+
+    def _embed(self, texts):
+        import numpy as np
+
+        encoded = self._tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+
+        # Agrupa os índices por faixa de comprimento
+        groups = {}
+        for i, length in enumerate(lengths):
+            bucket = next((b for b in LENGTH_BUCKETS if length <= b), LENGTH_BUCKETS[-1])
+            groups.setdefault(bucket, []).append(i)
+
+        embeddings = None
+        for indices in groups.values():
+            group = [{key: encoded[key][i] for key in encoded.keys()} for i in indices]
+            vectors = self._forward(group)
+            if embeddings is None:
+                embeddings = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[indices] = vectors
+        return embeddings
+
+    def score_batch(self, texts):
+        """Relevância de cada texto: maior similaridade de cosseno com as âncoras"""
+        self.load()
+        similarities = self._embed(texts) @ self._anchors.T
+        return [float(min(1.0, max(0.0, s))) for s in similarities.max(axis=1)]
+
+    async def score(self, text):
+        return await self.batcher.submit(text)
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "version": self.version,
+            "quantized": self.quantize,
+            "loaded": self.loaded,
+            "batcher": self.batcher.stats(),
+        }
+
+relevance_scorer = RelevanceScorer()
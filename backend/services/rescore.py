@@ -0,0 +1,179 @@
+"""Re-pontuação em massa da relevância das contas sociais
+
+Percorre social_accounts em ordem de _id com um cursor no servidor, pontua
+os lotes em um pool de processos (cada um com o seu modelo carregado) e
+grava os resultados com bulk_write não ordenado. O progresso fica em
+rescore_runs (último _id gravado), então uma execução interrompida continua
+de onde parou. Cada score recebe a versão do modelo que o gerou.
+
+Execução avulsa:
+    cd backend && python -m services.rescore --processes 4
+    cd backend && python -m services.rescore --resume <run_id>
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import asyncio
+import multiprocessing
+import os
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from services import fan_scores
+from services.jobs import job_handler
+from services.read_cache import read_cache
+from services.relevance import RELEVANCE_MODEL_VERSION, account_text
+
+RESCORE_PROCESSES = int(os.getenv("RESCORE_PROCESSES", "2"))
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "256"))
+
+RUN_RUNNING = "running"
+RUN_FINISHED = "finished"
+
+ACCOUNT_PROJECTION = {"user_id": 1, "username": 1, "profile_url": 1, "platform": 1, "bio": 1}
+
+def _init_process(torch_threads):
+    # Roda em cada processo do pool: divide os núcleos entre os processos e
+    # carrega o modelo uma única vez. O scorer já foi criado no import deste
+    # módulo, então o número de threads é aplicado direto nele (e não pelo
+    # RELEVANCE_TORCH_THREADS, lido antes e herdado do processo pai)
+    from services.relevance import relevance_scorer
+    relevance_scorer.set_torch_threads(torch_threads)
+    relevance_scorer.load()
+
+def _score_texts(texts):
+    from services.relevance import relevance_scorer
+    return relevance_scorer.score_batch(texts)
+
+async def start_run(db, run_id=None, model_version=RELEVANCE_MODEL_VERSION, only_stale=True):
+    """Cria a execução ou retoma a existente (mesma versão de modelo)"""
+    if run_id:
+        run = await db.rescore_runs.find_one({"_id": ObjectId(run_id)})
+        if run:
+            if run["model_version"] != model_version:
+                raise ValueError(
+                    f"Execução {run_id} usa o modelo {run['model_version']}, não {model_version}"
+                )
+            return run
+    run = {
+        "_id": ObjectId(run_id) if run_id else ObjectId(),
+        "model_version": model_version,
+        "only_stale": only_stale,
+        "status": RUN_RUNNING,
+        "last_id": None,
+        "processed": 0,
+        "modified": 0,
+        "started_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+    await db.rescore_runs.insert_one(run)
+    return run
+
+async def _batches(cursor, batch_size):
+    batch = []
+    async for account in cursor:
+        batch.append(account)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def _write_batch(db, run, batch, scores):
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne({"_id": account["_id"]}, {"$set": {
+            "relevance_score": score,
+            "relevance_model_version": run["model_version"],
+            "analyzed_at": now,
+        }})
+        for account, score in zip(batch, scores)
+    ]
+    result = await db.social_accounts.bulk_write(operations, ordered=False)
+    user_ids = {account["user_id"] for account in batch if account.get("user_id")}
+    await fan_scores.refresh_many(db, user_ids, "social")
+    for user_id in user_ids:
+        await read_cache.invalidate(user_id, "social")
+
+    # Checkpoint: os lotes são gravados em ordem de _id, então tudo até o
+    # último _id deste lote já está pontuado
+    await db.rescore_runs.update_one(
+        {"_id": run["_id"]},
+        {
+            "$set": {"last_id": batch[-1]["_id"], "updated_at": now},
+            "$inc": {"processed": len(batch), "modified": result.modified_count},
+        }
+    )
+
+async def rescore_accounts(db, run, processes=RESCORE_PROCESSES, batch_size=RESCORE_BATCH_SIZE):
+    """Pontua todas as contas pendentes da execução; retorna o resumo"""
+    query = {}
+    if run["only_stale"]:
+        query["relevance_model_version"] = {"$ne": run["model_version"]}
+    if run.get("last_id") is not None:
+        query["_id"] = {"$gt": run["last_id"]}
+    cursor = db.social_accounts.find(query, ACCOUNT_PROJECTION).sort("_id", 1).batch_size(batch_size)
+
+    loop = asyncio.get_running_loop()
+    torch_threads = max(1, (os.cpu_count() or 1) // processes)
+    # spawn: nada do processo pai (cliente MongoDB, event loop) é herdado
+    context = multiprocessing.get_context("spawn")
+    pending = deque()
+    with ProcessPoolExecutor(processes, mp_context=context,
+                             initializer=_init_process, initargs=(torch_threads,)) as pool:
+        async for batch in _batches(cursor, batch_size):
+            texts = [account_text(account) for account in batch]
+            pending.append((batch, loop.run_in_executor(pool, _score_texts, texts)))
+            # Mantém os processos ocupados sem acumular lotes na memória
+            if len(pending) >= processes * 2:
+                batch, future = pending.popleft()
+                await _write_batch(db, run, batch, await future)
+        while pending:
+            batch, future = pending.popleft()
+            await _write_batch(db, run, batch, await future)
+
+    await db.rescore_runs.update_one(
+        {"_id": run["_id"]},
+        {"$set": {"status": RUN_FINISHED, "finished_at": datetime.utcnow()}}
+    )
+    return await get_run(db, str(run["_id"]))
+
+async def get_run(db, run_id):
+    run = await db.rescore_runs.find_one({"_id": ObjectId(run_id)})
+    if run:
+        run["id"] = str(run.pop("_id"))
+        if run.get("last_id") is not None:
+            run["last_id"] = str(run["last_id"])
+    return run
+
+@job_handler("rescore_social_accounts")
+async def rescore_social_accounts(db, payload):
+    # Em uma nova tentativa do job, retoma pelo checkpoint da execução
+    run = await start_run(db, payload["run_id"], payload["model_version"], payload.get("only_stale", True))
+    summary = await rescore_accounts(
+        db, run,
+        processes=payload.get("processes", RESCORE_PROCESSES),
+        batch_size=payload.get("batch_size", RESCORE_BATCH_SIZE),
+    )
+    return {"run_id": summary["id"], "processed": summary["processed"], "modified": summary["modified"]}
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import db, close_database
+
+    parser = argparse.ArgumentParser(description="Re-pontuação em massa das contas sociais")
+    parser.add_argument("--resume", help="run_id de uma execução interrompida")
+    parser.add_argument("--all", action="store_true", help="pontua também contas já na versão atual")
+    parser.add_argument("--processes", type=int, default=RESCORE_PROCESSES)
+    parser.add_argument("--batch-size", type=int, default=RESCORE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    async def main():
+        run = await start_run(db, args.resume, only_stale=not args.all)
+        print(f"Execução {run['_id']} (modelo {run['model_version']})")
+        print(await rescore_accounts(db, run, args.processes, args.batch_size))
+        close_database()
+
+    asyncio.run(main())
@@ -0,0 +1,317 @@
+from datetime import timezone
+from pathlib import Path
+import asyncio
+import os
+import uuid
+
+import aiofiles
+import aiofiles.os
+from fastapi.responses import RedirectResponse, StreamingResponse
+
+# Backend de armazenamento de arquivos: "local" (disco/volume) ou "s3" (S3/MinIO)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+
+S3_BUCKET = os.getenv("S3_BUCKET", "furia-kyf")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # ex.: http://minio:9000
+S3_PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL", S3_ENDPOINT_URL)
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE_MB", "8")) * 1024 * 1024  # mínimo do S3: 5 MB
+S3_PRESIGN_EXPIRES = int(os.getenv("S3_PRESIGN_EXPIRES", "300"))
+
+# Prefixo das chaves temporárias (uploads ainda não finalizados)
+INCOMING_PREFIX = "incoming/"
+
+READ_CHUNK_SIZE = 1024 * 1024
+# Chaves por página na listagem (list_keys)
+LIST_PAGE_SIZE = 1000
+
+async def pages_in_thread(pages):
+    """Avança um gerador síncrono de páginas em uma thread, uma página por vez"""
+    while True:
+        page = await asyncio.to_thread(next, pages, None)
+        if page is None:
+            return
+        yield page
+
+class LocalWriter:
+    """Escrita de um arquivo novo no disco local, em um caminho temporário até o commit"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.tmp_path = storage.path(INCOMING_PREFIX + uuid.uuid4().hex)
+        self._file = None
+        self._done = False
+
+    async def write(self, chunk):
+        if self._file is None:
+            await aiofiles.os.makedirs(self.tmp_path.parent, exist_ok=True)
+            self._file = await aiofiles.open(self.tmp_path, "wb")
+        await self._file.write(chunk)
+
+    async def _close(self):
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+
+    async def commit(self, key):
+        """Move o arquivo temporário para a chave definitiva"""
+        await self._close()
+        final_path = self.storage.path(key)
+        await aiofiles.os.makedirs(final_path.parent, exist_ok=True)
+        await aiofiles.os.replace(self.tmp_path, final_path)
+        self._done = True
+
+    async def abort(self):
+        if self._done:
+            return
+        await self._close()
+        try:
+            await aiofiles.os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+        self._done = True
+
+class LocalStorage:
+    """Armazenamento em um diretório local (ou volume compartilhado)"""
+
+    def __init__(self, root=UPLOAD_DIR):
+        self.root = Path(root)
+
+    def path(self, key):
+        return self.root / key
+
+    async def ensure_ready(self):
+        await aiofiles.os.makedirs(self.root, exist_ok=True)
+
+    async def open_writer(self):
+        return LocalWriter(self)
+
+    async def exists(self, key):
+        return await aiofiles.os.path.exists(self.path(key))
+
+    async def delete(self, key):
+        try:
+            await aiofiles.os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    async def iter_chunks(self, key, chunk_size=READ_CHUNK_SIZE):
+        async with aiofiles.open(self.path(key), "rb") as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def presigned_url(self, key, expires=S3_PRESIGN_EXPIRES):
+        # Arquivos locais são servidos pela própria API
+        return None
+
+    def _key_pages(self, prefix, older_than, page_size):
+        base = self.path(prefix)
+        cutoff_ts = older_than.replace(tzinfo=timezone.utc).timestamp()
+        if not base.is_dir():
+            return
+        keys = []
+        for root, _, files in os.walk(base):
+            for name in files:
+                path = Path(root) / name
+                try:
+                    if path.stat().st_mtime < cutoff_ts:
+                        keys.append(path.relative_to(self.root).as_posix())
+                except FileNotFoundError:
+                    pass
+                if len(keys) >= page_size:
+                    yield keys
+                    keys = []
+        if keys:
+            yield keys
+
+    async def list_keys(self, prefix, older_than, page_size=LIST_PAGE_SIZE):
+        """Páginas de chaves sob o prefixo modificadas antes de older_than (UTC)
+
+        Percorre o diretório aos poucos: a listagem inteira nunca fica em memória.
+        """
+        async for page in pages_in_thread(self._key_pages(prefix, older_than, page_size)):
+            yield page
+
+class S3Writer:
+    """Upload multipart em streaming: só uma parte (S3_PART_SIZE) fica em memória
+
+    A chave definitiva (hash do conteúdo) só é conhecida no fim, então o
+    upload vai para uma chave temporária e é copiado no servidor no commit.
+    Arquivos menores que uma parte são enviados com um único PutObject.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.tmp_key = INCOMING_PREFIX + uuid.uuid4().hex
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._done = False
+
+    async def write(self, chunk):
+        self._buffer += chunk
+        if len(self._buffer) >= self.storage.part_size:
+            await self._flush_part()
+
+    async def _flush_part(self):
+        client = self.storage.client
+        if self._upload_id is None:
+            response = await asyncio.to_thread(
+                client.create_multipart_upload, Bucket=self.storage.bucket, Key=self.tmp_key
+            )
+            self._upload_id = response["UploadId"]
+        body = bytes(self._buffer)
+        self._buffer.clear()
+        part_number = len(self._parts) + 1
+        response = await asyncio.to_thread(
+            client.upload_part,
+            Bucket=self.storage.bucket,
+            Key=self.tmp_key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    async def commit(self, key):
+        client = self.storage.client
+        bucket = self.storage.bucket
+        if self._upload_id is None:
+            await asyncio.to_thread(client.put_object, Bucket=bucket, Key=key, Body=bytes(self._buffer))
+            self._buffer.clear()
+        else:
+            if self._buffer:
+                await self._flush_part()
+            await asyncio.to_thread(
+                client.complete_multipart_upload,
+                Bucket=bucket,
+                Key=self.tmp_key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+            await asyncio.to_thread(
+                client.copy_object,
+                Bucket=bucket,
+                Key=key,
+                CopySource={"Bucket": bucket, "Key": self.tmp_key},
+            )
+            await asyncio.to_thread(client.delete_object, Bucket=bucket, Key=self.tmp_key)
+        self._done = True
+
+    async def abort(self):
+        if self._done:
+            return
+        self._buffer.clear()
+        if self._upload_id is not None:
+            await asyncio.to_thread(
+                self.storage.client.abort_multipart_upload,
+                Bucket=self.storage.bucket,
+                Key=self.tmp_key,
+                UploadId=self._upload_id,
+            )
+        self._done = True
+
+class S3Storage:
+    """Armazenamento em um bucket S3 compatível (AWS S3, MinIO)"""
+
+    def __init__(self, bucket=S3_BUCKET, endpoint_url=S3_ENDPOINT_URL,
+                 public_endpoint_url=S3_PUBLIC_ENDPOINT_URL, region=S3_REGION, part_size=S3_PART_SIZE):
+        # boto3 só é necessário quando o backend S3 está em uso
+        import boto3
+        from botocore.config import Config
+
+        config = Config(max_pool_connections=50, retries={"max_attempts": 3})
+        self.bucket = bucket
+        self.part_size = part_size
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region, config=config)
+        # URLs assinadas precisam usar o endereço acessível pelo cliente final
+        self.presign_client = boto3.client(
+            "s3", endpoint_url=public_endpoint_url, region_name=region, config=config
+        )
+
+    async def ensure_ready(self):
+        """Cria o bucket se ele ainda não existir"""
+        from botocore.exceptions import ClientError
+
+        try:
+            await asyncio.to_thread(self.client.head_bucket, Bucket=self.bucket)
+        except ClientError:
+            await asyncio.to_thread(self.client.create_bucket, Bucket=self.bucket)
+
+    async def open_writer(self):
+        return S3Writer(self)
+
+    async def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    async def delete(self, key):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    async def iter_chunks(self, key, chunk_size=READ_CHUNK_SIZE):
+        response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=key)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def presigned_url(self, key, expires=S3_PRESIGN_EXPIRES):
+        return await asyncio.to_thread(
+            self.presign_client.generate_presigned_url,
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires,
+        )
+
+    def _key_pages(self, prefix, older_than, page_size):
+        cutoff = older_than.replace(tzinfo=timezone.utc)
+        paginator = self.client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=self.bucket, Prefix=prefix, PaginationConfig={"PageSize": page_size})
+        for page in pages:
+            keys = [obj["Key"] for obj in page.get("Contents", []) if obj["LastModified"] < cutoff]
+            if keys:
+                yield keys
+
+    async def list_keys(self, prefix, older_than, page_size=LIST_PAGE_SIZE):
+        """Páginas de chaves sob o prefixo modificadas antes de older_than (UTC)
+
+        Uma requisição de listagem por página: a listagem inteira nunca fica em memória.
+        """
+        async for page in pages_in_thread(self._key_pages(prefix, older_than, page_size)):
+            yield page
+
+def create_storage(backend=STORAGE_BACKEND):
+    if backend == "local":
+        return LocalStorage()
+    if backend == "s3":
+        return S3Storage()
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+
+storage = create_storage()
+
+async def read_bytes(key):
+    """Lê um arquivo inteiro para a memória (usar apenas com arquivos de tamanho limitado)"""
+    return b"".join([chunk async for chunk in storage.iter_chunks(key)])
+
+async def file_response(key, media_type):
+    """Resposta para download: URL assinada (S3) ou streaming pela API (local)"""
+    url = await storage.presigned_url(key)
+    if url:
+        return RedirectResponse(url, status_code=307)
+    return StreamingResponse(storage.iter_chunks(key), media_type=media_type)
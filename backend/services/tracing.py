@@ -0,0 +1,257 @@
+"""Rastreamento distribuído (OpenTelemetry, propagação W3C Trace Context)
+
+O frontend abre um span por execução de página e por chamada à API e envia
+o cabeçalho traceparent; aqui cada requisição continua o trace recebido:
+  - um span por requisição (nome "MÉTODO /modelo/da/rota")
+  - um span filho por comando do MongoDB (o Motor copia o contexto para as
+    threads do pymongo; comandos fora de uma requisição não geram spans)
+  - spans da gravação de arquivos (blocos do upload e commit no storage)
+  - jobs enfileirados levam o contexto, e o worker continua o mesmo trace
+
+TRACING_EXPORTER escolhe o destino: "off" (padrão, sem custo além de uma
+checagem por requisição), "file" (um span JSON por linha em TRACING_FILE) ou
+"otlp" (coletor OTLP/HTTP em OTEL_EXPORTER_OTLP_ENDPOINT, ex.: Jaeger).
+Para ver a jornada de um fã nos arquivos do frontend e da API:
+    cd backend && python -m services.tracing traces/frontend.jsonl traces/api.jsonl
+"""
+from collections import defaultdict
+from datetime import datetime
+import argparse
+import json
+import os
+import threading
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "off")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "furia-kyf-api")
+TRACING_ENABLED = TRACING_EXPORTER != "off"
+
+# Até configure_tracing, o tracer global não grava nada
+tracer = trace.get_tracer("furia-kyf")
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Grava cada span finalizado como uma linha JSON (formato lido por show_traces)"""
+
+    def __init__(self, path=TRACING_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = []
+        for span in spans:
+            parent = span.parent
+            lines.append(json.dumps({
+                "trace_id": f"{span.context.trace_id:032x}",
+                "span_id": f"{span.context.span_id:016x}",
+                "parent_id": f"{parent.span_id:016x}" if parent else None,
+                "name": span.name,
+                "service": span.resource.attributes.get("service.name"),
+                "kind": span.kind.name,
+                "start": span.start_time,
+                "end": span.end_time,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes),
+            }, default=str))
+        with self._lock, open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+def configure_tracing(service_name=TRACING_SERVICE_NAME):
+    """Instala o provider global com o exportador de TRACING_EXPORTER
+
+    Chamado uma vez por processo (a API ao importar main, cada processo do
+    worker ao iniciar). Retorna False com o rastreamento desligado.
+    """
+    if not TRACING_ENABLED:
+        return False
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    elif TRACING_EXPORTER == "file":
+        os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+        exporter = JsonLinesSpanExporter()
+    else:
+        raise ValueError(f"TRACING_EXPORTER inválido: {TRACING_EXPORTER}")
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+def shutdown_tracing():
+    """Envia os spans pendentes (encerramento do processo)"""
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+def inject_context():
+    """Contexto do span atual para gravar junto de um job (vazio fora de um trace)"""
+    carrier = {}
+    if trace.get_current_span().get_span_context().is_valid:
+        propagate.inject(carrier)
+    return carrier
+
+def extract_context(carrier):
+    return propagate.extract(carrier or {})
+
+class TracingMiddleware:
+    """Middleware ASGI que continua o trace do cabeçalho traceparent"""
+
+    def __init__(self, app, enabled=TRACING_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {}
+        for name, value in scope["headers"]:
+            if name in (b"traceparent", b"tracestate"):
+                carrier[name.decode()] = value.decode("latin-1")
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=extract_context(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        ) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # O modelo da rota só é conhecido depois do roteamento
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
+                span.set_attribute("http.status_code", status)
+                if status >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+
+class TracingCommandListener(monitoring.CommandListener):
+    """Um span por comando do MongoDB, filho do span da requisição ou do job"""
+
+    def __init__(self):
+        self._spans = {}
+
+    def started(self, event):
+        if not trace.get_current_span().get_span_context().is_valid:
+            return
+        # getMore traz o id do cursor no lugar do nome da coleção
+        key = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(key)
+        host, port = event.connection_id
+        span = tracer.start_span(
+            f"mongodb.{event.command_name}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection if isinstance(collection, str) else "-",
+                "net.peer.name": host,
+                "net.peer.port": port,
+            },
+        )
+        self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event):
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.set_status(Status(StatusCode.ERROR, str(event.failure.get("errmsg", ""))))
+            span.end()
+
+def mongo_tracing_listeners():
+    """Listener de comandos para o cliente do MongoDB (vazio com o rastreamento desligado)"""
+    if not TRACING_ENABLED:
+        return []
+    return [TracingCommandListener()]
+
+def print_span(span, children, trace_start, depth):
+    offset_ms = (span["start"] - trace_start) / 1e6
+    duration_ms = (span["end"] - span["start"]) / 1e6
+    flag = "  [ERRO]" if span["status"] == "ERROR" else ""
+    print(f"{offset_ms:9.1f}ms {duration_ms:9.1f}ms  {'  ' * depth}{span['name']} ({span['service']}){flag}")
+    for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+        print_span(child, children, trace_start, depth + 1)
+
+def load_span(line):
+    """Span de uma linha JSONL: formato deste módulo ou o do SDK (to_json, usado pelo frontend)"""
+    span = json.loads(line)
+    if "context" not in span:
+        return span
+    return {
+        "trace_id": span["context"]["trace_id"].removeprefix("0x"),
+        "span_id": span["context"]["span_id"].removeprefix("0x"),
+        "parent_id": span["parent_id"].removeprefix("0x") if span["parent_id"] else None,
+        "name": span["name"],
+        "service": span["resource"]["attributes"].get("service.name"),
+        "kind": span["kind"].removeprefix("SpanKind."),
+        "start": iso_to_ns(span["start_time"]),
+        "end": iso_to_ns(span["end_time"]),
+        "status": span["status"]["status_code"],
+        "attributes": span["attributes"],
+    }
+
+def iso_to_ns(value):
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return int(moment.timestamp()) * 1_000_000_000 + moment.microsecond * 1000
+
+def show_traces(paths, trace_id=None, last=1):
+    """Imprime a árvore de spans dos traces (por padrão, o mais recente)"""
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                span = load_span(line)
+                traces[span["trace_id"]].append(span)
+    if trace_id:
+        selected = [trace_id]
+    else:
+        selected = sorted(traces, key=lambda t: min(s["start"] for s in traces[t]))[-last:]
+
+    for current in selected:
+        spans = traces[current]
+        ids = {span["span_id"] for span in spans}
+        children = defaultdict(list)
+        roots = []
+        for span in spans:
+            if span["parent_id"] in ids:
+                children[span["parent_id"]].append(span)
+            else:
+                roots.append(span)
+        trace_start = min(span["start"] for span in spans)
+        started_at = datetime.fromtimestamp(trace_start / 1e9).isoformat(timespec="seconds")
+        print(f"trace {current} ({len(spans)} spans, {started_at})")
+        for root in sorted(roots, key=lambda s: s["start"]):
+            print_span(root, children, trace_start, 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mostra traces gravados com TRACING_EXPORTER=file")
+    parser.add_argument("files", nargs="+", help="arquivos JSONL do frontend, da API e do worker")
+    parser.add_argument("--trace-id")
+    parser.add_argument("--last", type=int, default=1, help="quantos traces recentes mostrar")
+    args = parser.parse_args()
+    show_traces(args.files, args.trace_id, args.last)
@@ -0,0 +1,187 @@
+from fastapi import HTTPException, UploadFile, status
+from pathlib import Path
+import asyncio
+import hashlib
+import os
+
+from services.metrics import record_upload
+from services.tracing import tracer
+
+# Tamanho de cada bloco lido do upload: a memória por upload fica constante
+# (blocos grandes diluem o custo de cada ida ao pool de threads)
+CHUNK_SIZE = 1024 * 1024
+
+MB = 1024 * 1024
+
+# Assinaturas (magic bytes) de cada formato aceito
+MAGIC_SIGNATURES = {
+    "jpeg": [b"\xff\xd8\xff"],
+    "png": [b"\x89PNG\r\n\x1a\n"],
+    "pdf": [b"%PDF-"],
+}
+
+# Formato esperado para cada extensão de arquivo
+EXTENSION_TYPES = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".pdf": "pdf",
+}
+
+# Limite de bytes por formato
+MAX_UPLOAD_BYTES = {
+    "jpeg": int(os.getenv("MAX_IMAGE_UPLOAD_MB", "10")) * MB,
+    "png": int(os.getenv("MAX_IMAGE_UPLOAD_MB", "10")) * MB,
+    "pdf": int(os.getenv("MAX_PDF_UPLOAD_MB", "15")) * MB,
+}
+
+# Exportações de dados das redes sociais (zip) podem ter centenas de MB
+MAX_ARCHIVE_UPLOAD_BYTES = int(os.getenv("MAX_ARCHIVE_UPLOAD_MB", "500")) * MB
+
+# Limite do corpo inteiro da requisição, aplicado antes do parsing do multipart
+MAX_REQUEST_BYTES = max(MAX_UPLOAD_BYTES.values()) + MB
+
+# Rotas com limite próprio (prefixo do caminho -> bytes)
+REQUEST_LIMITS_BY_PATH = {
+    "/api/social/mentions/": MAX_ARCHIVE_UPLOAD_BYTES + MB,
+}
+
+class StoredUpload:
+    """Resultado da ingestão de um upload"""
+
+    def __init__(self, size, sha256, file_type, key=None):
+        self.key = key
+        self.size = size
+        self.sha256 = sha256
+        self.file_type = file_type
+
+def sniff_file_type(head):
+    """Identifica o formato pelos primeiros bytes do arquivo"""
+    for file_type, signatures in MAGIC_SIGNATURES.items():
+        if any(head.startswith(signature) for signature in signatures):
+            return file_type
+    return None
+
+def too_large_error(limit):
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Arquivo muito grande. Tamanho máximo: {limit // MB} MB"
+    )
+
+def read_and_hash(file, digest, size=CHUNK_SIZE):
+    """Lê um bloco do arquivo temporário do upload e o soma ao hash"""
+    chunk = file.read(size)
+    digest.update(chunk)
+    return chunk
+
+async def ingest_upload(upload: UploadFile, writer, allowed_extensions):
+    """Repassa um upload em blocos para writer, validando formato e tamanho pelo caminho
+
+    writer é um escritor do backend de armazenamento (services.storage); cabe
+    a quem chama fazer commit ou abort dele depois da validação. Só esta
+    cópia é feita em blocos: o Starlette já gravou o corpo do multipart em
+    um arquivo temporário (SpooledTemporaryFile) antes da rota rodar, então
+    o arquivo passa duas vezes pelo disco (temporário e destino).
+    """
+    extension = Path(upload.filename or "").suffix.lower()
+    if extension not in allowed_extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de arquivo inválido. Permitidos: {', '.join(allowed_extensions)}"
+        )
+    expected_type = EXTENSION_TYPES[extension]
+    limit = MAX_UPLOAD_BYTES[expected_type]
+
+    # Rejeita cedo quando o tamanho já é conhecido
+    if upload.size is not None and upload.size > limit:
+        raise too_large_error(limit)
+
+    digest = hashlib.sha256()
+    # Leitura e hash de cada bloco na mesma ida à thread, fora do event loop
+    head = await asyncio.to_thread(read_and_hash, upload.file, digest)
+    if sniff_file_type(head) != expected_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Conteúdo do arquivo não corresponde ao formato informado"
+        )
+
+    size = 0
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > limit:
+            raise too_large_error(limit)
+        with tracer.start_as_current_span("storage.write", attributes={"storage.bytes": len(chunk)}):
+            await writer.write(chunk)
+        record_upload(expected_type, len(chunk))
+        chunk = await asyncio.to_thread(read_and_hash, upload.file, digest)
+
+    return StoredUpload(size, digest.hexdigest(), expected_type)
+
+class MaxBodySizeMiddleware:
+    """Middleware ASGI que recusa corpos maiores que max_bytes (413)
+
+    Usa o Content-Length quando presente e também conta os bytes recebidos,
+    cobrindo uploads com transfer-encoding chunked. path_limits permite um
+    limite diferente por prefixo de caminho.
+    """
+
+    def __init__(self, app, max_bytes=MAX_REQUEST_BYTES, path_limits=REQUEST_LIMITS_BY_PATH):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits
+
+    def limit_for(self, path):
+        for prefix, limit in self.path_limits.items():
+            if path.startswith(prefix):
+                return limit
+        return self.max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.limit_for(scope["path"])
+        for name, value in scope["headers"]:
+            if name != b"content-length":
+                continue
+            try:
+                content_length = int(value)
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                await self._respond(send, status.HTTP_400_BAD_REQUEST, b'{"detail":"Content-Length inv\\u00e1lido"}')
+                return
+            if content_length > max_bytes:
+                await self._reject(send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise too_large_error(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send):
+        await self._respond(
+            send, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, b'{"detail":"Requisi\\u00e7\\u00e3o muito grande"}'
+        )
+
+    async def _respond(self, send, status_code, body):
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": body,
+        })
@@ -0,0 +1,95 @@
+"""Pré-carregamento dos modelos pesados em background e prontidão (GET /ready)
+
+torch/transformers (relevância) e face_recognition/dlib (comparação de
+rostos) só são importados dentro do load() de cada modelo, nunca no import
+dos módulos: o processo da API sobe e aceita conexões em menos de um
+segundo. Terminado o lifespan, os modelos de PRELOAD_MODELS são carregados
+um por vez em uma thread, enquanto as requisições já são atendidas (uma
+requisição que precise de um modelo ainda frio espera o carregamento).
+
+"/" continua sendo a sonda de vida (liveness); "/ready" responde 503 até o
+MongoDB responder e todos os modelos de PRELOAD_MODELS estarem carregados,
+com o estado de cada modelo (cold, loading, warm ou failed).
+"""
+import asyncio
+import os
+import time
+
+from services.face_match import face_match_engine
+from services.relevance import relevance_scorer
+
+# Modelos carregados em background ao iniciar o processo (separados por vírgula)
+PRELOAD_MODELS = [name.strip() for name in os.getenv("PRELOAD_MODELS", "relevance").split(",") if name.strip()]
+
+# Nome -> objeto com load() e loaded
+MODELS = {
+    "relevance": relevance_scorer,
+    "face_match": face_match_engine,
+}
+
+class Warmup:
+    def __init__(self, models=MODELS, preload=PRELOAD_MODELS):
+        unknown = set(preload) - set(models)
+        if unknown:
+            raise ValueError(f"Modelos desconhecidos em PRELOAD_MODELS: {', '.join(sorted(unknown))}")
+        self.models = models
+        self.preload_names = list(preload)
+        self._loading = {}
+        self._errors = {}
+        self._seconds = {}
+
+    def _load(self, name):
+        start = time.perf_counter()
+        self._loading[name] = True
+        try:
+            self.models[name].load()
+        except Exception as e:
+            self._errors[name] = f"{type(e).__name__}: {e}"
+            print(f"Erro ao pré-carregar o modelo {name}: {e}")
+        else:
+            self._seconds[name] = round(time.perf_counter() - start, 3)
+            print(f"Modelo {name} carregado em {self._seconds[name]:.1f}s")
+        finally:
+            self._loading[name] = False
+
+    def preload_before_fork(self):
+        """Carrega os modelos no processo mestre do gunicorn (gunicorn.conf.py)
+
+        Os workers criados por fork herdam os modelos já carregados, e as
+        páginas dos pesos ficam compartilhadas (copy-on-write) enquanto
+        ninguém escrever nelas.
+        """
+        for name in self.preload_names:
+            if not self.models[name].loaded:
+                self._load(name)
+
+    async def preload(self):
+        """Carrega os modelos de PRELOAD_MODELS, um de cada vez, fora do event loop"""
+        for name in self.preload_names:
+            if not self.models[name].loaded:
+                await asyncio.to_thread(self._load, name)
+
+    def state(self, name):
+        if self.models[name].loaded:
+            return "warm"
+        if self._loading.get(name):
+            return "loading"
+        if name in self._errors:
+            return "failed"
+        return "cold"
+
+    def status(self):
+        models = {}
+        for name in self.models:
+            models[name] = {
+                "state": self.state(name),
+                "preload": name in self.preload_names,
+                "load_seconds": self._seconds.get(name),
+                "error": self._errors.get(name),
+            }
+        return {
+            "ready": all(models[name]["state"] == "warm" for name in self.preload_names),
+            "models": models,
+        }
+
+warmup = Warmup()
@@ -0,0 +1,131 @@
+"""Worker de jobs em background (verificações e re-pontuação de relevância)
+
+Também roda o coletor de lixo dos blobs (services.blob_gc), uma rodada por
+intervalo entre todos os processos do worker.
+
+Roda separado da API, em um pool de processos; cada processo executa vários
+jobs concorrentes no seu próprio event loop:
+    python worker.py --processes 2 --concurrency 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import traceback
+
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from database import db, close_database
+from services import blob_gc, jobs
+from services.warmup import warmup
+from services.tracing import configure_tracing, extract_context, shutdown_tracing, tracer
+import services.rescore  # noqa: F401 (registra os handlers)
+import services.verification  # noqa: F401
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_MAX_POLL_INTERVAL = float(os.getenv("JOB_MAX_POLL_INTERVAL", "5"))
+
+async def heartbeat(job):
+    """Renova o lease periodicamente enquanto o job roda"""
+    while True:
+        await asyncio.sleep(jobs.JOB_LEASE_SECONDS / 3)
+        if not await jobs.extend_lease(db, job):
+            return
+
+async def run_one(job):
+    handler = jobs.HANDLERS.get(job["kind"])
+    if handler is None:
+        await jobs.fail(db, job, f"Tipo de job desconhecido: {job['kind']}")
+        return
+    lease_task = asyncio.create_task(heartbeat(job))
+    # Span filho do trace da requisição que enfileirou o job (quando houver)
+    with tracer.start_as_current_span(
+        f"job {job['kind']}",
+        context=extract_context(job.get("trace_context")),
+        kind=SpanKind.CONSUMER,
+        attributes={"job.id": str(job["_id"]), "job.kind": job["kind"], "job.attempt": job["attempts"]},
+    ) as span:
+        try:
+            result = await handler(db, job["payload"])
+            await jobs.complete(db, job, result)
+        except Exception:
+            span.set_status(Status(StatusCode.ERROR))
+            await jobs.fail(db, job, traceback.format_exc(limit=5))
+        finally:
+            lease_task.cancel()
+
+async def consume(worker_id, stop):
+    """Loop de um slot de concorrência: reserva e executa jobs até o stop"""
+    idle = JOB_POLL_INTERVAL
+    while not stop.is_set():
+        job = await jobs.claim(db, worker_id)
+        if job is None:
+            # Fila vazia: espera crescente para não martelar o MongoDB
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=idle)
+            except asyncio.TimeoutError:
+                pass
+            idle = min(idle * 2, JOB_MAX_POLL_INTERVAL)
+            continue
+        idle = JOB_POLL_INTERVAL
+        await run_one(job)
+
+async def serve(concurrency):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"Worker {worker_id} iniciado com {concurrency} slots")
+    # Os jobs começam a ser consumidos enquanto os modelos carregam
+    preload_task = asyncio.create_task(warmup.preload())
+    gc_task = None
+    if blob_gc.BLOB_GC_INTERVAL_SECONDS > 0:
+        gc_task = asyncio.create_task(blob_gc.run_periodically(db, worker_id))
+    await asyncio.gather(*(consume(worker_id, stop) for _ in range(concurrency)))
+    preload_task.cancel()
+    if gc_task:
+        gc_task.cancel()
+    close_database()
+    shutdown_tracing()
+    print(f"Worker {worker_id} encerrado")
+
+def run_process(concurrency):
+    configure_tracing(service_name="furia-kyf-worker")
+    asyncio.run(serve(concurrency))
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de jobs do FURIA Know Your Fan")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "8")))
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        run_process(args.concurrency)
+        return
+
+    # spawn: cada processo importa os módulos de novo e cria seu próprio
+    # cliente MongoDB, nada é herdado por fork
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_process, args=(args.concurrency,))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(sig, _frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, sig)
+
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
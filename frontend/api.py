@@ -0,0 +1,54 @@
+"""Chamadas à API usadas pelo app e pelas páginas do Streamlit
+
+GETs são revalidados com o ETag da última resposta guardada na sessão: um
+304 reaproveita o corpo já recebido.
+"""
+import os
+
+import streamlit as st
+
+import tracing
+
+API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+def make_api_request(endpoint, method="GET", data=None, files=None):
+    """Função para fazer requisições à API"""
+    url = f"{API_URL}{endpoint}"
+    headers = {}
+    
+    # Adiciona token de autenticação se existir
+    if "token" in st.session_state and st.session_state["token"]:
+        headers["Authorization"] = f"Bearer {st.session_state['token']}"
+    
+    try:
+        if method == "GET":
+            response = cached_get(url, headers)
+        elif method == "POST":
+            if files:
+                response = tracing.request("POST", url, headers, data=data, files=files)
+            else:
+                response = tracing.request("POST", url, headers, json=data)
+        elif method == "PUT":
+            response = tracing.request("PUT", url, headers, json=data)
+        elif method == "DELETE":
+            response = tracing.request("DELETE", url, headers)
+        else:
+            st.error("Método HTTP não suportado")
+            return None
+        
+        return response
+    except Exception as e:
+        st.error(f"Erro na comunicação com a API: {str(e)}")
+        return None
+
+def cached_get(url, headers):
+    """GET condicional com o ETag da última resposta desta URL na sessão"""
+    cached = st.session_state.setdefault("etag_cache", {}).get(url)
+    if cached is not None:
+        headers["If-None-Match"] = cached.headers["ETag"]
+    response = tracing.request("GET", url, headers)
+    if response.status_code == 304 and cached is not None:
+        return cached
+    if response.status_code == 200 and "ETag" in response.headers:
+        st.session_state["etag_cache"][url] = response
+    return response
@@ -1,7 +1,7 @@
 import streamlit as st
-import requests
+import tracing
+from api import make_api_request
 import json
-import os
 from PIL import Image
 import io
 
@@ -13,40 +13,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# URL da API
-API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-# Funções auxiliares
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Função para fazer requisições à API"""
-    url = f"{API_URL}{endpoint}"
-    headers = {}
-    
-    # Adiciona token de autenticação se existir
-    if "token" in st.session_state and st.session_state["token"]:
-        headers["Authorization"] = f"Bearer {st.session_state['token']}"
-    
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, data=data, files=files)
-            else:
-                response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error("Método HTTP não suportado")
-            return None
-        
-        return response
-    except Exception as e:
-        st.error(f"Erro na comunicação com a API: {str(e)}")
-        return None
-
 # Inicializar estado da sessão
 if "logged_in" not in st.session_state:
     st.session_state["logged_in"] = False
@@ -59,10 +25,18 @@ if "username" not in st.session_state:
 if "current_page" not in st.session_state:
     st.session_state["current_page"] = "home"
 
+# Span desta execução do script (rastreamento, TRACING_EXPORTER)
+tracing.start_rerun(f"app/{st.session_state['current_page']}")
+
 # Função de logout
 def logout():
+    # Revoga o token no backend antes de descartá-lo
+    if st.session_state["token"]:
+        make_api_request("/api/users/logout", method="POST")
     st.session_state["logged_in"] = False
     st.session_state["token"] = None
+    st.session_state.pop("etag_cache", None)
+    tracing.new_journey()
     st.session_state["user_id"] = None
     st.session_state["username"] = None
     st.session_state["current_page"] = "home"
@@ -226,26 +200,35 @@ elif st.session_state["current_page"] == "dashboard":
         st.title("Dashboard")
         st.subheader(f"Bem-vindo, {st.session_state['username']}!")
         
+        # Todos os dados do painel em uma única chamada
+        user_id = st.session_state.get("user_id", "user123")  # Fallback para teste
+        response = make_api_request(f"/api/dashboard/{user_id}")
+        dashboard = response.json() if response and response.status_code == 200 else None
+        if dashboard is None:
+            st.error("Erro ao carregar o dashboard")
+            st.stop()
+        completion = dashboard["completion"]
+        
         # Layout do dashboard com métricas
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Perfil", "Incompleto", "-")
+            st.metric("Perfil", "Completo" if completion["profile"] else "Incompleto")
         with col2:
-            st.metric("Documentos", "0/1", "-")
+            st.metric("Documentos", f"{completion['documents_verified']}/{max(completion['documents_total'], 1)}")
         with col3:
-            st.metric("Redes Sociais", "0", "-")
+            st.metric("Redes Sociais", str(completion["social_accounts"]))
         
         # Seção de conclusão de perfil
         st.subheader("Complete seu perfil")
-        st.progress(0.0)
+        st.progress(completion["progress"])
         
         st.write("Para completar seu perfil, siga os passos abaixo:")
         
         steps = {
-            "Dados Básicos": {"status": "pendente", "page": "profile"},
-            "Verificação de Identidade": {"status": "pendente", "page": "documents"},
-            "Conexão de Redes Sociais": {"status": "pendente", "page": "social"},
-            "Perfis de E-Sports": {"status": "pendente", "page": "esports"}
+            "Dados Básicos": {"done": completion["steps"]["profile"], "page": "profile"},
+            "Verificação de Identidade": {"done": completion["steps"]["documents"], "page": "documents"},
+            "Conexão de Redes Sociais": {"done": completion["steps"]["social"], "page": "social"},
+            "Perfis de E-Sports": {"done": completion["steps"]["esports"], "page": "esports"}
         }
         
         for step, info in steps.items():
@@ -253,16 +236,25 @@ elif st.session_state["current_page"] == "dashboard":
             with col1:
                 st.write(f"• {step}")
             with col2:
-                if info["status"] == "pendente":
+                if not info["done"]:
                     if st.button("Completar", key=f"complete_{info['page']}"):
                         st.session_state["current_page"] = info["page"]
                         st.experimental_rerun()
                 else:
                     st.success("Concluído")
         
-        # Placeholder para visualizações futuras
+        # Pontuação e segmento do fã
         st.subheader("Seu perfil como fã")
-        st.info("Complete seu perfil para ver sua análise como fã da FURIA")
+        fan_score = dashboard.get("fan_score")
+        if fan_score:
+            segments = {"casual": "Fã casual", "engajado": "Fã engajado", "superfa": "Superfã"}
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Pontuação de fã", f"{fan_score['score']:.0f}/100")
+            with col2:
+                st.metric("Segmento", segments.get(fan_score["segment"], fan_score["segment"]))
+        else:
+            st.info("Complete seu perfil para ver sua análise como fã da FURIA")
 
 # Apenas um placeholder - as páginas reais seriam implementadas separadamente
 else:
@@ -271,4 +263,7 @@ else:
     
     if st.button("Voltar para o Dashboard"):
         st.session_state["current_page"] = "dashboard"
-        st.experimental_rerun()
\ No newline at end of file
+        st.experimental_rerun()
+
+# Fim da execução do script
+tracing.finish_rerun()
@@ -1,6 +1,6 @@
 import streamlit as st
-import requests
-import os
+import tracing
+from api import make_api_request
 from PIL import Image
 import io
 from streamlit_webrtc import webrtc_streamer
@@ -8,40 +8,6 @@ import av
 import cv2
 import numpy as np
 
-# URL da API
-API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-# Funções auxiliares
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Função para fazer requisições à API"""
-    url = f"{API_URL}{endpoint}"
-    headers = {}
-    
-    # Adiciona token de autenticação se existir
-    if "token" in st.session_state and st.session_state["token"]:
-        headers["Authorization"] = f"Bearer {st.session_state['token']}"
-    
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, data=data, files=files)
-            else:
-                response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error("Método HTTP não suportado")
-            return None
-        
-        return response
-    except Exception as e:
-        st.error(f"Erro na comunicação com a API: {str(e)}")
-        return None
-
 # Função para capturar frame da webcam
 class VideoProcessor:
     def __init__(self):
@@ -75,6 +41,9 @@ class VideoProcessor:
             
         return av.VideoFrame.from_ndarray(img, format="bgr24")
 
+# Span desta execução do script (rastreamento, TRACING_EXPORTER)
+tracing.start_rerun("pages/documents.py")
+
 # Verificar se o usuário está logado
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
     st.warning("Faça login para acessar esta página")
@@ -90,6 +59,8 @@ if 'selfie_captured' not in st.session_state:
     st.session_state.selfie_captured = False
 if 'document_uploaded' not in st.session_state:
     st.session_state.document_uploaded = False
+if 'document_id' not in st.session_state:
+    st.session_state.document_id = None
 
 # Obter documentos existentes do usuário
 user_id = st.session_state.get("user_id", "user123")  # Fallback para teste
@@ -105,6 +76,8 @@ if response and response.status_code == 200:
             status = doc.get("verification_status", "pendente")
             status_color = "green" if status == "verified" else "orange"
             st.markdown(f"**Documento:** {doc.get('document_type')} - **Status:** :{status_color}[{status}]")
+            if doc.get("face_match_status"):
+                st.caption(f"Verificação facial: {doc['face_match_status']}")
             has_verified_docs = has_verified_docs or status == "verified"
         
         if has_verified_docs:
@@ -160,7 +133,7 @@ if st.session_state.document_processor.capture_done:
     # Preparar para envio
     buf = io.BytesIO()
     selfie_pil.save(buf, format='JPEG')
-    selfie_bytes = buf.getvalue()
+    st.session_state.selfie_bytes = buf.getvalue()
 
 # Processar envio dos dados
 if submit_doc and uploaded_file is not None:
@@ -178,6 +151,7 @@ if submit_doc and uploaded_file is not None:
     )
     
     if response and response.status_code in [200, 201]:
+        st.session_state.document_id = response.json().get("id")
         st.success("Documento enviado com sucesso! Aguarde a verificação.")
     else:
         error_detail = "Erro desconhecido"
@@ -189,23 +163,29 @@ if submit_doc and uploaded_file is not None:
         st.error(f"Erro ao enviar documento: {error_detail}")
 
 # Enviar selfie para verificação
-if st.session_state.selfie_captured and st.session_state.document_uploaded:
+if st.session_state.selfie_captured and st.session_state.document_uploaded and st.session_state.document_id:
     if st.button("Verificar Identidade"):
         st.info("Comparando selfie com documento...")
         
-        # Aqui você enviaria a selfie para o endpoint de verificação
-        # (Este endpoint precisaria ser implementado no backend)
-        
-        # Simulação de verificação bem-sucedida
-        st.success("Verificação completada! Sua identidade será analisada em breve.")
+        # Envia a selfie para comparação facial com o documento enviado
+        # (o backend processa em background e atualiza o status do documento)
+        files = {"selfie": ("selfie.jpg", st.session_state.selfie_bytes, "image/jpeg")}
+        response = make_api_request(
+            f"/api/documents/verify-face/{st.session_state.document_id}",
+            method="POST",
+            files=files
+        )
         
-        # Em um cenário real, enviaria a selfie para processamento pelo backend
-        # files = {"selfie": ("selfie.jpg", selfie_bytes, "image/jpeg")}
-        # response = make_api_request(
-        #     f"/api/documents/verify-face/{document_id}",
-        #     method="POST",
-        #     files=files
-        # )
+        if response and response.status_code in [200, 201, 202]:
+            st.success("Verificação iniciada! Sua identidade será analisada em breve.")
+        else:
+            error_detail = "Erro desconhecido"
+            if response:
+                try:
+                    error_detail = response.json().get("detail", error_detail)
+                except:
+                    pass
+            st.error(f"Erro na verificação facial: {error_detail}")
 
 # Instruções e dicas
 with st.expander("Instruções para verificação de identidade"):
@@ -225,4 +205,7 @@ with st.expander("Instruções para verificação de identidade"):
 # Voltar para o Dashboard
 if st.button("Voltar para o Dashboard"):
     st.session_state["current_page"] = "dashboard"
-    st.experimental_rerun()
\ No newline at end of file
+    st.experimental_rerun()
+
+# Fim da execução do script
+tracing.finish_rerun()
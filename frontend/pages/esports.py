@@ -1,43 +1,12 @@
 import streamlit as st
-import requests
-import os
+import tracing
+from api import make_api_request
 import pandas as pd
 from PIL import Image
 import io
 
-# URL da API
-API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-# Funções auxiliares
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Função para fazer requisições à API"""
-    url = f"{API_URL}{endpoint}"
-    headers = {}
-    
-    # Adiciona token de autenticação se existir
-    if "token" in st.session_state and st.session_state["token"]:
-        headers["Authorization"] = f"Bearer {st.session_state['token']}"
-    
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, data=data, files=files)
-            else:
-                response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error("Método HTTP não suportado")
-            return None
-        
-        return response
-    except Exception as e:
-        st.error(f"Erro na comunicação com a API: {str(e)}")
-        return None
+# Span desta execução do script (rastreamento, TRACING_EXPORTER)
+tracing.start_rerun("pages/esports.py")
 
 # Verificar se o usuário está logado
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -111,7 +80,7 @@ if "profile_to_verify" in st.session_state:
                 files=files
             )
             
-            if response and response.status_code in [200, 201]:
+            if response and response.status_code in [200, 201, 202]:
                 st.success("Screenshot enviado com sucesso! Seu perfil será verificado em breve.")
                 # Limpar o estado de verificação
                 del st.session_state["profile_to_verify"]
@@ -196,4 +165,7 @@ with st.expander("Por que vincular perfis de e-sports?"):
 # Voltar para o Dashboard
 if st.button("Voltar para o Dashboard"):
     st.session_state["current_page"] = "dashboard"
-    st.experimental_rerun()
\ No newline at end of file
+    st.experimental_rerun()
+
+# Fim da execução do script
+tracing.finish_rerun()
@@ -1,42 +1,11 @@
 import streamlit as st
-import requests
+import tracing
+from api import make_api_request
 import json
-import os
 from datetime import datetime
 
-# URL da API
-API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-# Funções auxiliares
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Função para fazer requisições à API"""
-    url = f"{API_URL}{endpoint}"
-    headers = {}
-    
-    # Adiciona token de autenticação se existir
-    if "token" in st.session_state and st.session_state["token"]:
-        headers["Authorization"] = f"Bearer {st.session_state['token']}"
-    
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, data=data, files=files)
-            else:
-                response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error("Método HTTP não suportado")
-            return None
-        
-        return response
-    except Exception as e:
-        st.error(f"Erro na comunicação com a API: {str(e)}")
-        return None
+# Span desta execução do script (rastreamento, TRACING_EXPORTER)
+tracing.start_rerun("pages/profile.py")
 
 # Verificar se o usuário está logado
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -175,4 +144,7 @@ with st.expander("Dicas úteis"):
 # Voltar para o Dashboard
 if st.button("Voltar para o Dashboard"):
     st.session_state["current_page"] = "dashboard"
-    st.experimental_rerun()
\ No newline at end of file
+    st.experimental_rerun()
+
+# Fim da execução do script
+tracing.finish_rerun()
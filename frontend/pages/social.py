@@ -1,42 +1,11 @@
 import streamlit as st
-import requests
-import os
+import tracing
+from api import make_api_request
 import pandas as pd
 import plotly.express as px
 
-# URL da API
-API_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
-
-# Funções auxiliares
-def make_api_request(endpoint, method="GET", data=None, files=None):
-    """Função para fazer requisições à API"""
-    url = f"{API_URL}{endpoint}"
-    headers = {}
-    
-    # Adiciona token de autenticação se existir
-    if "token" in st.session_state and st.session_state["token"]:
-        headers["Authorization"] = f"Bearer {st.session_state['token']}"
-    
-    try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            if files:
-                response = requests.post(url, headers=headers, data=data, files=files)
-            else:
-                response = requests.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = requests.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        else:
-            st.error("Método HTTP não suportado")
-            return None
-        
-        return response
-    except Exception as e:
-        st.error(f"Erro na comunicação com a API: {str(e)}")
-        return None
+# Span desta execução do script (rastreamento, TRACING_EXPORTER)
+tracing.start_rerun("pages/social.py")
 
 # Verificar se o usuário está logado
 if "logged_in" not in st.session_state or not st.session_state["logged_in"]:
@@ -90,10 +59,17 @@ if response and response.status_code == 200:
             
             if st.button("Analisar redes sociais"):
                 with st.spinner("Analisando suas redes sociais..."):
-                    # Na versão completa, chamar a API para cada conta
-                    # Aqui, apenas simulamos a análise
-                    st.success("Análise concluída com sucesso!")
-                    st.info("Atualize a página para ver os resultados atualizados")
+                    failed = []
+                    for account_id in accounts_df["ID"].tolist():
+                        response = make_api_request(f"/api/social/analyze/{account_id}", method="POST")
+                        if not response or response.status_code != 200:
+                            failed.append(account_id)
+                    
+                    if failed:
+                        st.error(f"Erro ao analisar {len(failed)} de {len(accounts_df)} contas")
+                    else:
+                        st.success("Análise concluída com sucesso!")
+                        st.experimental_rerun()
             
         # Adicionar botão para remover conta
         with st.expander("Gerenciar contas"):
@@ -186,4 +162,7 @@ with st.expander("Sobre a análise de relevância"):
 # Voltar para o Dashboard
 if st.button("Voltar para o Dashboard"):
     st.session_state["current_page"] = "dashboard"
-    st.experimental_rerun()
\ No newline at end of file
+    st.experimental_rerun()
+
+# Fim da execução do script
+tracing.finish_rerun()
@@ -0,0 +1,100 @@
+"""Rastreamento das páginas do Streamlit e das chamadas à API (OpenTelemetry)
+
+Cada execução de uma página (rerun) vira um span, e cada chamada à API um
+span filho que envia o cabeçalho traceparent (W3C Trace Context) para a API
+continuar o mesmo trace. Todas as execuções de uma sessão do navegador
+compartilham o trace id da "jornada", renovado no logout, então o cadastro
+completo de um fã aparece como um único trace.
+
+TRACING_EXPORTER: "off" (padrão), "file" (JSON por linha em TRACING_FILE,
+no formato do SDK; python -m services.tracing no backend lê os dois) ou
+"otlp" (OTEL_EXPORTER_OTLP_ENDPOINT).
+"""
+import os
+import random
+import time
+
+import requests
+import streamlit as st
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import NonRecordingSpan, SpanContext, SpanKind, Status, StatusCode, TraceFlags
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "off")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "furia-kyf-frontend")
+TRACING_ENABLED = TRACING_EXPORTER != "off"
+
+@st.cache_resource
+def get_tracer():
+    """Tracer do processo do Streamlit (o provider é criado uma única vez)"""
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    else:
+        # Exportador do próprio SDK, um span JSON por linha (lido pelo
+        # python -m services.tracing do backend)
+        os.makedirs(os.path.dirname(TRACING_FILE) or ".", exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a"), formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    return provider.get_tracer("furia-kyf-frontend")
+
+def journey_context():
+    """Contexto pai das execuções da sessão: o trace id da jornada atual"""
+    if "trace_journey" not in st.session_state:
+        st.session_state["trace_journey"] = (random.getrandbits(128), random.getrandbits(64))
+    trace_id, span_id = st.session_state["trace_journey"]
+    parent = SpanContext(trace_id, span_id, is_remote=True, trace_flags=TraceFlags(TraceFlags.SAMPLED))
+    return trace.set_span_in_context(NonRecordingSpan(parent))
+
+def new_journey():
+    """Começa um novo trace na próxima execução (logout)"""
+    st.session_state.pop("trace_journey", None)
+
+def start_rerun(page):
+    """Abre o span da execução da página (chamado no topo do script)"""
+    if not TRACING_ENABLED:
+        return
+    # Execução anterior interrompida por st.stop() ou rerun: termina na última atividade
+    finish_rerun(interrupted=True)
+    span = get_tracer().start_span(
+        f"streamlit {page}", context=journey_context(), attributes={"streamlit.page": page}
+    )
+    st.session_state["trace_rerun"] = {"span": span, "last_activity": time.time_ns()}
+
+def finish_rerun(interrupted=False):
+    """Fecha o span da execução (chamado no fim do script)"""
+    run = st.session_state.pop("trace_rerun", None)
+    if run is None:
+        return
+    if interrupted:
+        run["span"].set_attribute("streamlit.interrupted", True)
+        run["span"].end(end_time=run["last_activity"])
+    else:
+        run["span"].end()
+
+def request(method, url, headers, **kwargs):
+    """requests.request com um span de cliente e o cabeçalho traceparent"""
+    run = st.session_state.get("trace_rerun") if TRACING_ENABLED else None
+    if run is None:
+        return requests.request(method, url, headers=headers, **kwargs)
+
+    path = url.split("://", 1)[-1].partition("/")[2]
+    with get_tracer().start_as_current_span(
+        f"{method} /{path}",
+        context=trace.set_span_in_context(run["span"]),
+        kind=SpanKind.CLIENT,
+        attributes={"http.method": method, "http.url": url},
+    ) as span:
+        propagate.inject(headers)
+        response = requests.request(method, url, headers=headers, **kwargs)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+    run["last_activity"] = time.time_ns()
+    return response